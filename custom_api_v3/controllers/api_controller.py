@@ -1,12 +1,29 @@
+import base64
 import json
 import logging
 from datetime import datetime
 
-from odoo import http, fields
+from odoo import http
 from odoo.http import request, Response
+from odoo.tools import SQL
 
 _logger = logging.getLogger(__name__)
 
+# Fields available for the fields= projection parameter
+PRODUCT_FIELDS = (
+    'id', 'sku', 'barcode', 'name', 'type', 'category',
+    'list_price', 'standard_price', 'uom', 'active',
+)
+STOCK_FIELDS = (
+    'id', 'sku', 'barcode', 'name', 'category',
+    'qty_available', 'virtual_available', 'free_qty', 'outgoing_qty', 'incoming_qty',
+    'uom', 'list_price', 'last_updated',
+)
+BULK_ORDER_LIMIT = 1000
+# Largest page of the paginated endpoints
+MAX_PAGE_LIMIT = 1000
+STOCK_QTY_FIELDS = ('qty_available', 'virtual_available', 'free_qty', 'outgoing_qty', 'incoming_qty')
+
 
 class ExternalAPIController(http.Controller):
     """
@@ -15,29 +32,18 @@ class ExternalAPIController(http.Controller):
 
     # ==================== Helper Methods ====================
 
-    def _get_api_key(self):
-        """Get API Key from configuration"""
-        try:
-            config = request.env['api.config'].sudo().search([], limit=1)
-            return config.api_key if config else False
-        except:
-            return False
-
-    def _authenticate(self):
-        """Authenticate the request using API Key"""
+    def _authenticate(self, scope=None):
+        """Authenticate the request using API Key (see api.config._check_api_key)"""
         api_key = request.httprequest.headers.get('X-API-Key')
         if not api_key:
             return False, "API Key is required in header 'X-API-Key'"
 
-        valid_key = self._get_api_key()
-        if not valid_key:
+        try:
+            return request.env['api.config'].sudo()._check_api_key(api_key, scope=scope)
+        except Exception as e:
+            _logger.error(f"Error checking API key: {str(e)}")
             return False, "API not configured. Please contact administrator."
 
-        if api_key != valid_key:
-            return False, "Invalid API Key"
-
-        return True, None
-
     def _json_response(self, data, status=200):
         """Create JSON response"""
         return Response(
@@ -70,21 +76,146 @@ class ExternalAPIController(http.Controller):
             return {}
 
     def _log_request(self, endpoint, method, request_data, response_data, status, error=None):
-        """Log API request for monitoring"""
+        """Queue API request log for monitoring (written in bulk, see api.log)"""
         try:
-            request.env['api.log'].sudo().create({
-                'endpoint': endpoint,
-                'method': method,
-                'request_data': json.dumps(request_data, ensure_ascii=False, default=str) if request_data else '',
-                'response_data': json.dumps(response_data, ensure_ascii=False, default=str) if response_data else '',
-                'status_code': status,
-                'error_message': error,
-                'ip_address': request.httprequest.remote_addr,
-                'request_date': fields.Datetime.now(),
-            })
+            request.env['api.log'].sudo()._enqueue_log(
+                endpoint, method, request_data, response_data, status,
+                error_message=error,
+                ip_address=request.httprequest.remote_addr,
+            )
         except Exception as e:
             _logger.error(f"Failed to log API request: {str(e)}")
 
+    def _prepare_stock_data(self, products, fields=None):
+        """Build the stock payload of a page of products (see api.stock.snapshot)"""
+        fields = fields or STOCK_FIELDS
+        snapshot = {}
+        if any(field in STOCK_QTY_FIELDS for field in fields):
+            snapshot = request.env['api.stock.snapshot'].sudo().compute(products)
+
+        getters = {
+            'id': lambda p: p.id,
+            'sku': lambda p: p.default_code or '',
+            'barcode': lambda p: p.barcode or '',
+            'name': lambda p: p.name,
+            'category': lambda p: p.categ_id.name if p.categ_id else '',
+            'uom': lambda p: p.uom_id.name if p.uom_id else '',
+            'list_price': lambda p: p.list_price,
+            'last_updated': lambda p: p.write_date.isoformat() if p.write_date else None,
+        }
+        for qty_field in STOCK_QTY_FIELDS:
+            getters[qty_field] = lambda p, qty_field=qty_field: snapshot[p.id][qty_field]
+
+        return [{field: getters[field](product) for field in fields} for product in products]
+
+    def _prepare_product_data(self, products, fields=None):
+        """Build the product payload of a page of products"""
+        fields = fields or PRODUCT_FIELDS
+        getters = {
+            'id': lambda p: p.id,
+            'sku': lambda p: p.default_code or '',
+            'barcode': lambda p: p.barcode or '',
+            'name': lambda p: p.name,
+            'type': lambda p: p.type,
+            'category': lambda p: p.categ_id.name if p.categ_id else '',
+            'list_price': lambda p: p.list_price,
+            'standard_price': lambda p: p.standard_price,
+            'uom': lambda p: p.uom_id.name if p.uom_id else '',
+            'active': lambda p: p.active,
+        }
+        return [{field: getters[field](product) for field in fields} for product in products]
+
+    def _parse_fields(self, kwargs, available):
+        """
+        Parse the optional fields= projection parameter.
+        'id' is always returned.
+
+        :return: (fields, error_message)
+        """
+        if not kwargs.get('fields'):
+            return available, None
+        requested = [f.strip() for f in kwargs['fields'].split(',') if f.strip()]
+        invalid = [f for f in requested if f not in available]
+        if invalid:
+            return None, f"Unknown fields: {', '.join(invalid)}. Available fields: {', '.join(available)}"
+        return tuple(['id'] + [f for f in requested if f != 'id']), None
+
+    def _encode_cursor(self, product):
+        """Opaque keyset cursor pointing after the given product"""
+        # NULL (no reference, sorted last) and '' (sorted first) are different positions
+        token = json.dumps([product.default_code if product.default_code is not False else None, product.id])
+        return base64.urlsafe_b64encode(token.encode()).decode()
+
+    def _decode_cursor(self, cursor):
+        """Decode a keyset cursor into (default_code, id); raises ValueError if malformed"""
+        try:
+            code, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            last_id = int(last_id)
+        except Exception:
+            raise ValueError("Invalid cursor")
+        if code is not None and not isinstance(code, str):
+            raise ValueError("Invalid cursor")
+        return code, last_id
+
+    def _parse_limit(self, kwargs, default=100):
+        """Page size of the request, between 1 and MAX_PAGE_LIMIT; raises ValueError if not an integer"""
+        return min(max(int(kwargs.get('limit', default)), 1), MAX_PAGE_LIMIT)
+
+    def _search_page(self, Product, domain, kwargs, order=None):
+        """
+        Search one page of products.
+
+        Keyset mode is used when a cursor parameter is given (an empty cursor
+        starts from the beginning): products are ordered by (default_code, id)
+        and the page starts right after the cursor, whatever its depth. The
+        response contains next_cursor and has_more; total_count is only
+        computed when count=true.
+
+        Otherwise the legacy limit/offset mode is used, with total_count unless
+        count=false.
+
+        :return: (products, page_info)
+        """
+        limit = self._parse_limit(kwargs)
+        count = kwargs.get('count')
+
+        if 'cursor' not in kwargs:
+            offset = int(kwargs.get('offset', 0))
+            page_info = {
+                'total_count': Product.search_count(domain) if count != 'false' else None,
+                'limit': limit,
+                'offset': offset,
+            }
+            return Product.search(domain, limit=limit, offset=offset, order=order), page_info
+
+        # The keyset condition is written in SQL: a domain would mix up NULL and '' references
+        query = Product._search(domain)
+        default_code = SQL.identifier(query.table, 'default_code')
+        product_id = SQL.identifier(query.table, 'id')
+        if kwargs['cursor']:
+            code, last_id = self._decode_cursor(kwargs['cursor'])
+            if code is None:
+                # Products without internal reference are sorted last
+                query.add_where(SQL("%s IS NULL AND %s > %s", default_code, product_id, last_id))
+            else:
+                query.add_where(SQL(
+                    "(%s > %s OR (%s = %s AND %s > %s) OR %s IS NULL)",
+                    default_code, code, default_code, code, product_id, last_id, default_code,
+                ))
+        query.order = SQL("%s, %s", default_code, product_id)
+        query.limit = limit + 1
+
+        products = Product.browse(query.get_result_ids())
+        has_more = len(products) > limit
+        products = products[:limit]
+        page_info = {
+            'total_count': Product.search_count(domain) if count == 'true' else None,
+            'limit': limit,
+            'next_cursor': self._encode_cursor(products[-1]) if has_more else None,
+            'has_more': has_more,
+        }
+        return products, page_info
+
     # ==================== Health Check ====================
 
     @http.route('/api/v1/health', type='http', auth='public', methods=['GET'], csrf=False)
@@ -119,12 +250,15 @@ class ExternalAPIController(http.Controller):
             ],
             "notes": "Order notes"
         }
+
+        An order whose idempotency_key (or, failing that, external_order_id)
+        was already imported is not created again, like /api/v1/orders/bulk.
         """
         endpoint = '/api/v1/orders'
 
         try:
             # Authenticate
-            is_valid, error_msg = self._authenticate()
+            is_valid, error_msg = self._authenticate(scope='orders')
             if not is_valid:
                 response = {'success': False, 'error': error_msg}
                 self._log_request(endpoint, 'POST', {}, response, 401, error_msg)
@@ -149,6 +283,12 @@ class ExternalAPIController(http.Controller):
                 self._log_request(endpoint, 'POST', data, response, 400, 'Missing order_lines')
                 return self._json_response(response, 400)
 
+            Ingest = request.env['api.order.ingest'].sudo()
+            idempotency_key = data.get('idempotency_key') or data.get('external_order_id')
+            if idempotency_key and request.env['sale.order'].sudo().search_count(
+                    [('api_idempotency_key', '=', idempotency_key)], limit=1):
+                return self._duplicate_order_response(endpoint, data, Ingest._get_duplicate_result(idempotency_key))
+
             # Find or create customer
             Partner = request.env['res.partner'].sudo()
             customer_data = data.get('customer', {})
@@ -232,9 +372,17 @@ class ExternalAPIController(http.Controller):
                 'order_line': order_lines,
                 'client_order_ref': data.get('external_order_id'),
                 'note': data.get('notes'),
+                'api_idempotency_key': idempotency_key,
             }
 
-            order = SaleOrder.create(order_vals)
+            try:
+                with request.env.cr.savepoint():
+                    order = SaleOrder.create(order_vals)
+            except Exception as e:
+                # Imported by a concurrent request since the check above
+                if not Ingest._is_duplicate_key_error(e):
+                    raise
+                return self._duplicate_order_response(endpoint, data, Ingest._get_duplicate_result(idempotency_key))
 
             response = {
                 'success': True,
@@ -265,13 +413,98 @@ class ExternalAPIController(http.Controller):
             self._log_request(endpoint, 'POST', {}, response, 500, str(e))
             return self._json_response(response, 500)
 
+    def _duplicate_order_response(self, endpoint, data, result):
+        """Response of POST /api/v1/orders for an order that was already imported"""
+        response = {
+            'success': True,
+            'data': {
+                'order_id': result['order_id'],
+                'order_name': result['order_name'],
+                'external_order_id': data.get('external_order_id'),
+                'status': result['status'],
+            },
+            'message': result['message'],
+        }
+        self._log_request(endpoint, 'POST', data, response, 200)
+        return self._json_response(response, 200)
+
+    @http.route('/api/v1/orders/bulk', type='http', auth='public', methods=['POST'], csrf=False)
+    def create_orders_bulk(self, **kwargs):
+        """
+        Create many Sales Orders in one request
+
+        Expected JSON body:
+        {
+            "orders": [
+                {
+                    "idempotency_key": "MKT-2024-0001",
+                    "external_order_id": "EXT-12345",
+                    "customer": {...},
+                    "order_lines": [...],
+                    "notes": "Order notes"
+                }
+            ]
+        }
+
+        Each order has the same format as POST /api/v1/orders. Orders whose
+        idempotency_key (or external_order_id) was already imported are
+        reported as duplicates instead of being created again.
+        """
+        endpoint = '/api/v1/orders/bulk'
+
+        try:
+            is_valid, error_msg = self._authenticate(scope='orders')
+            if not is_valid:
+                response = {'success': False, 'error': error_msg}
+                self._log_request(endpoint, 'POST', {}, response, 401, error_msg)
+                return self._json_response(response, 401)
+
+            data = self._get_json_data()
+            orders = data.get('orders') if isinstance(data, dict) else None
+
+            if not orders or not isinstance(orders, list):
+                response = {'success': False, 'error': 'A non-empty "orders" list is required'}
+                self._log_request(endpoint, 'POST', {}, response, 400, 'Missing orders')
+                return self._json_response(response, 400)
+
+            if len(orders) > BULK_ORDER_LIMIT:
+                response = {'success': False, 'error': f'At most {BULK_ORDER_LIMIT} orders per request'}
+                self._log_request(endpoint, 'POST', {}, response, 400, 'Too many orders')
+                return self._json_response(response, 400)
+
+            results = request.env['api.order.ingest'].sudo().ingest(orders)
+
+            created = sum(1 for result in results if result['status'] == 'created')
+            duplicates = sum(1 for result in results if result['status'] == 'duplicate')
+            failed = len(results) - created - duplicates
+
+            response = {
+                'success': failed == 0,
+                'data': {
+                    'total': len(results),
+                    'created': created,
+                    'duplicates': duplicates,
+                    'failed': failed,
+                    'results': results,
+                },
+                'message': f'{created} order(s) created, {duplicates} duplicate(s), {failed} failed'
+            }
+            self._log_request(endpoint, 'POST', {'orders_count': len(orders)}, response, 200)
+            return self._json_response(response, 200)
+
+        except Exception as e:
+            _logger.exception("Error creating bulk orders via API")
+            response = {'success': False, 'error': str(e)}
+            self._log_request(endpoint, 'POST', {}, response, 500, str(e))
+            return self._json_response(response, 500)
+
     @http.route('/api/v1/orders/<int:order_id>/confirm', type='http', auth='public', methods=['POST'], csrf=False)
     def confirm_order(self, order_id, **kwargs):
         """Confirm a sales order"""
         endpoint = f'/api/v1/orders/{order_id}/confirm'
 
         try:
-            is_valid, error_msg = self._authenticate()
+            is_valid, error_msg = self._authenticate(scope='orders')
             if not is_valid:
                 response = {'success': False, 'error': error_msg}
                 self._log_request(endpoint, 'POST', {}, response, 401, error_msg)
@@ -315,7 +548,7 @@ class ExternalAPIController(http.Controller):
         endpoint = f'/api/v1/orders/{order_id}/status'
 
         try:
-            is_valid, error_msg = self._authenticate()
+            is_valid, error_msg = self._authenticate(scope='orders')
             if not is_valid:
                 response = {'success': False, 'error': error_msg}
                 self._log_request(endpoint, 'GET', {}, response, 401, error_msg)
@@ -363,12 +596,21 @@ class ExternalAPIController(http.Controller):
 
     @http.route('/api/v1/stock', type='http', auth='public', methods=['GET'], csrf=False)
     def get_all_stock(self, **kwargs):
-        """Get stock levels for all products"""
+        """
+        Get stock levels for all products
+
+        Query parameters:
+        - limit/offset: legacy offset pagination
+        - cursor: keyset pagination, pass an empty value for the first page
+          and next_cursor afterwards
+        - count: include (true) or skip (false) total_count
+        - fields: comma-separated list of fields to return
+        """
         endpoint = '/api/v1/stock'
         params = dict(kwargs)
 
         try:
-            is_valid, error_msg = self._authenticate()
+            is_valid, error_msg = self._authenticate(scope='stock')
             if not is_valid:
                 response = {'success': False, 'error': error_msg}
                 self._log_request(endpoint, 'GET', params, response, 401, error_msg)
@@ -382,37 +624,82 @@ class ExternalAPIController(http.Controller):
             if kwargs.get('category'):
                 domain.append(('categ_id.name', 'ilike', kwargs['category']))
 
-            limit = int(kwargs.get('limit', 100))
-            offset = int(kwargs.get('offset', 0))
+            fields, fields_error = self._parse_fields(kwargs, STOCK_FIELDS)
+            if fields_error:
+                response = {'success': False, 'error': fields_error}
+                self._log_request(endpoint, 'GET', params, response, 400, 'Invalid fields')
+                return self._json_response(response, 400)
 
             Product = request.env['product.product'].sudo()
-            total_count = Product.search_count(domain)
-            products = Product.search(domain, limit=limit, offset=offset, order='default_code')
+            try:
+                products, page_info = self._search_page(Product, domain, kwargs, order='default_code')
+            except ValueError as e:
+                response = {'success': False, 'error': str(e)}
+                self._log_request(endpoint, 'GET', params, response, 400, str(e))
+                return self._json_response(response, 400)
 
-            stock_data = []
-            for product in products:
-                stock_data.append({
-                    'id': product.id,
-                    'sku': product.default_code or '',
-                    'barcode': product.barcode or '',
-                    'name': product.name,
-                    'category': product.categ_id.name if product.categ_id else '',
-                    'qty_available': product.qty_available,
-                    'virtual_available': product.virtual_available,
-                    'free_qty': product.free_qty,
-                    'outgoing_qty': product.outgoing_qty,
-                    'incoming_qty': product.incoming_qty,
-                    'uom': product.uom_id.name if product.uom_id else '',
-                    'list_price': product.list_price,
-                    'last_updated': product.write_date.isoformat() if product.write_date else None,
-                })
+            stock_data = self._prepare_stock_data(products, fields=fields)
+
+            response = {
+                'success': True,
+                'data': dict(page_info, products=stock_data),
+            }
+            self._log_request(endpoint, 'GET', params, response, 200)
+            return self._json_response(response, 200)
+
+        except Exception as e:
+            _logger.exception("Error getting stock via API")
+            response = {'success': False, 'error': str(e)}
+            self._log_request(endpoint, 'GET', params, response, 500, str(e))
+            return self._json_response(response, 500)
+
+    @http.route('/api/v1/stock/changes', type='http', auth='public', methods=['GET'], csrf=False)
+    def get_stock_changes(self, **kwargs):
+        """
+        Get products whose stock changed since a cursor (delta sync)
+
+        Query parameters:
+        - since: cursor returned by a previous call. When omitted, no products
+          are returned and next_cursor is the current head, to be used after
+          a full /api/v1/stock pull.
+        - limit: maximum number of products per page (default 100, max 1000)
+
+        Keep calling with next_cursor while has_more is true.
+        """
+        endpoint = '/api/v1/stock/changes'
+        params = dict(kwargs)
+
+        try:
+            is_valid, error_msg = self._authenticate(scope='stock')
+            if not is_valid:
+                response = {'success': False, 'error': error_msg}
+                self._log_request(endpoint, 'GET', params, response, 401, error_msg)
+                return self._json_response(response, 401)
+
+            try:
+                since = int(kwargs['since']) if kwargs.get('since') not in (None, '') else None
+                limit = self._parse_limit(kwargs)
+            except ValueError:
+                response = {'success': False, 'error': 'since and limit must be integers'}
+                self._log_request(endpoint, 'GET', params, response, 400, 'Invalid cursor')
+                return self._json_response(response, 400)
+
+            StockChange = request.env['api.stock.change'].sudo()
+            if since is None:
+                stock_data, next_cursor, has_more = [], StockChange.get_head_cursor(), False
+            else:
+                products, next_cursor, has_more = StockChange.get_changes(since, limit=limit)
+                stock_data = self._prepare_stock_data(products)
+                for product, item in zip(products, stock_data):
+                    item['active'] = product.active
 
             response = {
                 'success': True,
                 'data': {
-                    'total_count': total_count,
+                    'since': since,
+                    'next_cursor': str(next_cursor),
+                    'has_more': has_more,
                     'limit': limit,
-                    'offset': offset,
                     'products': stock_data,
                 }
             }
@@ -420,7 +707,7 @@ class ExternalAPIController(http.Controller):
             return self._json_response(response, 200)
 
         except Exception as e:
-            _logger.exception("Error getting stock via API")
+            _logger.exception("Error getting stock changes via API")
             response = {'success': False, 'error': str(e)}
             self._log_request(endpoint, 'GET', params, response, 500, str(e))
             return self._json_response(response, 500)
@@ -431,7 +718,7 @@ class ExternalAPIController(http.Controller):
         endpoint = f'/api/v1/stock/{sku}'
 
         try:
-            is_valid, error_msg = self._authenticate()
+            is_valid, error_msg = self._authenticate(scope='stock')
             if not is_valid:
                 response = {'success': False, 'error': error_msg}
                 self._log_request(endpoint, 'GET', {}, response, 401, error_msg)
@@ -450,15 +737,18 @@ class ExternalAPIController(http.Controller):
                 return self._json_response(response, 404)
 
             warehouses = request.env['stock.warehouse'].sudo().search([])
+            quantities = request.env['api.stock.snapshot'].sudo().compute(
+                product, warehouses=warehouses, by_warehouse=True
+            )[product.id]
             warehouse_stock = []
 
             for wh in warehouses:
-                product_wh = product.with_context(warehouse=wh.id)
+                wh_quantities = quantities['warehouses'][wh.id]
                 warehouse_stock.append({
                     'warehouse_id': wh.id,
                     'warehouse_name': wh.name,
-                    'qty_available': product_wh.qty_available,
-                    'free_qty': product_wh.free_qty,
+                    'qty_available': wh_quantities['qty_available'],
+                    'free_qty': wh_quantities['free_qty'],
                 })
 
             response = {
@@ -469,11 +759,11 @@ class ExternalAPIController(http.Controller):
                     'barcode': product.barcode or '',
                     'name': product.name,
                     'category': product.categ_id.name if product.categ_id else '',
-                    'qty_available': product.qty_available,
-                    'virtual_available': product.virtual_available,
-                    'free_qty': product.free_qty,
-                    'outgoing_qty': product.outgoing_qty,
-                    'incoming_qty': product.incoming_qty,
+                    'qty_available': quantities['qty_available'],
+                    'virtual_available': quantities['virtual_available'],
+                    'free_qty': quantities['free_qty'],
+                    'outgoing_qty': quantities['outgoing_qty'],
+                    'incoming_qty': quantities['incoming_qty'],
                     'uom': product.uom_id.name if product.uom_id else '',
                     'list_price': product.list_price,
                     'stock_by_warehouse': warehouse_stock,
@@ -493,12 +783,17 @@ class ExternalAPIController(http.Controller):
 
     @http.route('/api/v1/products', type='http', auth='public', methods=['GET'], csrf=False)
     def get_products(self, **kwargs):
-        """Get all products"""
+        """
+        Get all products
+
+        Supports the same limit/offset, cursor, count and fields parameters
+        as /api/v1/stock.
+        """
         endpoint = '/api/v1/products'
         params = dict(kwargs)
 
         try:
-            is_valid, error_msg = self._authenticate()
+            is_valid, error_msg = self._authenticate(scope='products')
             if not is_valid:
                 response = {'success': False, 'error': error_msg}
                 self._log_request(endpoint, 'GET', params, response, 401, error_msg)
@@ -516,36 +811,25 @@ class ExternalAPIController(http.Controller):
                 active = kwargs['active'].lower() == 'true'
                 domain.append(('active', '=', active))
 
-            limit = int(kwargs.get('limit', 100))
-            offset = int(kwargs.get('offset', 0))
+            fields, fields_error = self._parse_fields(kwargs, PRODUCT_FIELDS)
+            if fields_error:
+                response = {'success': False, 'error': fields_error}
+                self._log_request(endpoint, 'GET', params, response, 400, 'Invalid fields')
+                return self._json_response(response, 400)
 
             Product = request.env['product.product'].sudo()
-            total_count = Product.search_count(domain)
-            products = Product.search(domain, limit=limit, offset=offset)
+            try:
+                products, page_info = self._search_page(Product, domain, kwargs)
+            except ValueError as e:
+                response = {'success': False, 'error': str(e)}
+                self._log_request(endpoint, 'GET', params, response, 400, str(e))
+                return self._json_response(response, 400)
 
-            products_data = []
-            for product in products:
-                products_data.append({
-                    'id': product.id,
-                    'sku': product.default_code or '',
-                    'barcode': product.barcode or '',
-                    'name': product.name,
-                    'type': product.type,
-                    'category': product.categ_id.name if product.categ_id else '',
-                    'list_price': product.list_price,
-                    'standard_price': product.standard_price,
-                    'uom': product.uom_id.name if product.uom_id else '',
-                    'active': product.active,
-                })
+            products_data = self._prepare_product_data(products, fields=fields)
 
             response = {
                 'success': True,
-                'data': {
-                    'total_count': total_count,
-                    'limit': limit,
-                    'offset': offset,
-                    'products': products_data,
-                }
+                'data': dict(page_info, products=products_data),
             }
             self._log_request(endpoint, 'GET', params, response, 200)
             return self._json_response(response, 200)
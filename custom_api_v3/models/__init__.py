@@ -1,2 +1,9 @@
 from . import api_log
+from . import api_cache_version
 from . import api_config
+from . import stock_snapshot
+from . import stock_change
+from . import stock_quant
+from . import stock_move
+from . import sale_order
+from . import order_ingest
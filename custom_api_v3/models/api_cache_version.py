@@ -0,0 +1,41 @@
+from odoo import models, fields, api
+
+
+class APICacheVersion(models.Model):
+    """
+    Version counters of the API caches (API keys, logging policy).
+    The current version is part of the ormcache key, so bumping a counter
+    only invalidates the entries it covers instead of clearing the whole
+    registry cache. A bump becomes visible to the other workers when its
+    transaction commits; versions come from a sequence so a rolled back
+    bump is never reused.
+    """
+    _name = 'api.cache.version'
+    _description = 'API Cache Version'
+    _log_access = False
+
+    name = fields.Char(string='Key', required=True)
+    version = fields.Integer(string='Version', default=0)
+
+    _sql_constraints = [
+        ('name_uniq', 'unique(name)', 'Cache version keys must be unique.'),
+    ]
+
+    def init(self):
+        self.env.cr.execute("CREATE SEQUENCE IF NOT EXISTS api_cache_version_seq")
+
+    @api.model
+    def _get_version(self, name):
+        """Current version of the given key (0 if it was never bumped)"""
+        self.env.cr.execute("SELECT version FROM api_cache_version WHERE name = %s", [name])
+        row = self.env.cr.fetchone()
+        return row[0] if row else 0
+
+    @api.model
+    def _bump(self, name):
+        """Give the given key a new version"""
+        self.env.cr.execute("""
+            INSERT INTO api_cache_version (name, version)
+            VALUES (%s, nextval('api_cache_version_seq'))
+            ON CONFLICT (name) DO UPDATE SET version = EXCLUDED.version
+        """, [name])
@@ -1,5 +1,11 @@
+import hmac
 import secrets
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
+
+API_SCOPES = ('orders', 'stock', 'products')
+
+# Cache version key of the api.config caches (see api.cache.version)
+API_CONFIG_VERSION = 'api.config'
 
 
 class APIConfig(models.Model):
@@ -20,6 +26,27 @@ class APIConfig(models.Model):
         help='Maximum number of requests per minute. 0 for unlimited.'
     )
     notes = fields.Text(string='Notes')
+
+    # Scopes granted to this key
+    allow_orders = fields.Boolean(string='Orders', default=True)
+    allow_stock = fields.Boolean(string='Stock', default=True)
+    allow_products = fields.Boolean(string='Products', default=True)
+
+    # Request logging
+    log_sample_rate = fields.Float(
+        string='Log Sample Rate (%)',
+        default=100.0,
+        help='Percentage of successful requests to log. Errors are always logged.'
+    )
+    log_max_body_size = fields.Integer(
+        string='Max Logged Body Size',
+        default=4096,
+        help='Request/response bodies longer than this many characters are truncated. 0 for unlimited.'
+    )
+    log_errors_only_endpoints = fields.Text(
+        string='Log Errors Only For',
+        help='Comma-separated endpoint prefixes (e.g. /api/v1/stock) for which only failed requests are logged.'
+    )
     
     # Timestamps
     create_date = fields.Datetime(string='Created On', readonly=True)
@@ -30,12 +57,77 @@ class APIConfig(models.Model):
         """Generate a secure random API key"""
         return secrets.token_urlsafe(32)
     
+    @api.model
+    def _get_active_keys(self):
+        """Active API keys and their scopes, cached until api.config is modified"""
+        return self._get_active_keys_cached(self.env['api.cache.version']._get_version(API_CONFIG_VERSION))
+
+    @api.model
+    @tools.ormcache('version')
+    def _get_active_keys_cached(self, version):
+        configs = self.sudo().search([('is_active', '=', True)])
+        return tuple(
+            (config.api_key, frozenset(scope for scope in API_SCOPES if config[f'allow_{scope}']))
+            for config in configs if config.api_key
+        )
+
+    @api.model
+    def _check_api_key(self, api_key, scope=None):
+        """
+        Check an API key against every active key in constant time.
+        Several keys may be active at once, which allows rotating keys
+        without downtime.
+
+        :return: (is_valid, error_message)
+        """
+        active_keys = self._get_active_keys()
+        if not active_keys:
+            return False, "API not configured. Please contact administrator."
+
+        given = api_key.encode()
+        granted = None
+        # Compare against all keys, without short-circuit, so timing does not leak a match
+        for key, scopes in active_keys:
+            if hmac.compare_digest(given, key.encode()):
+                granted = scopes
+
+        if granted is None:
+            return False, "Invalid API Key"
+        if scope and scope not in granted:
+            return False, f"API Key is not allowed to access '{scope}' endpoints"
+        return True, None
+
+    @api.model
+    def _get_log_policy(self):
+        """Request logging policy of the first active configuration, cached until api.config is modified"""
+        return self._get_log_policy_cached(self.env['api.cache.version']._get_version(API_CONFIG_VERSION))
+
+    @api.model
+    @tools.ormcache('version')
+    def _get_log_policy_cached(self, version):
+        config = self.sudo().search([('is_active', '=', True)], order='id', limit=1)
+        endpoints = (config.log_errors_only_endpoints or '').replace('\n', ',')
+        return {
+            'sample_rate': config.log_sample_rate if config else 100.0,
+            'max_body_size': config.log_max_body_size if config else 4096,
+            'errors_only_endpoints': tuple(e.strip() for e in endpoints.split(',') if e.strip()),
+        }
+
     @api.model
     def create(self, vals):
         """Generate API key if not provided"""
         if not vals.get('api_key'):
             vals['api_key'] = self.generate_api_key()
+        self.env['api.cache.version']._bump(API_CONFIG_VERSION)
         return super().create(vals)
+
+    def write(self, vals):
+        self.env['api.cache.version']._bump(API_CONFIG_VERSION)
+        return super().write(vals)
+
+    def unlink(self):
+        self.env['api.cache.version']._bump(API_CONFIG_VERSION)
+        return super().unlink()
     
     def action_regenerate_key(self):
         """Regenerate API key"""
@@ -1,5 +1,11 @@
+import json
+import random
+import threading
+
 from odoo import models, fields, api
 
+from .api_log_buffer import log_buffer
+
 
 class APILog(models.Model):
     _name = 'api.log'
@@ -35,6 +41,56 @@ class APILog(models.Model):
             else:
                 record.status_type = 'error'
     
+    @api.model
+    def _serialize_body(self, data, max_size=0):
+        """Dump request/response data to JSON, truncated to max_size characters"""
+        if not data:
+            return ''
+        body = json.dumps(data, ensure_ascii=False, default=str)
+        if max_size and len(body) > max_size:
+            body = f"{body[:max_size]}... [truncated {len(body) - max_size} chars]"
+        return body
+
+    @api.model
+    def _should_log(self, endpoint, status_code, policy):
+        """Apply the errors-only endpoints and sampling rules of the log policy"""
+        if status_code and status_code >= 400:
+            return True
+        if any(endpoint.startswith(prefix) for prefix in policy['errors_only_endpoints']):
+            return False
+        sample_rate = policy['sample_rate']
+        return sample_rate >= 100 or random.uniform(0, 100) < sample_rate
+
+    @api.model
+    def _enqueue_log(self, endpoint, method, request_data, response_data, status_code,
+                     error_message=None, ip_address=None):
+        """
+        Queue an API log entry.
+        Entries are written in bulk by the write-behind buffer, outside of
+        the request transaction.
+        """
+        policy = self.env['api.config']._get_log_policy()
+        if not self._should_log(endpoint, status_code, policy):
+            return False
+
+        max_size = policy['max_body_size']
+        vals = {
+            'endpoint': endpoint,
+            'method': method,
+            'request_data': self._serialize_body(request_data, max_size),
+            'response_data': self._serialize_body(response_data, max_size),
+            'status_code': status_code,
+            'error_message': error_message,
+            'ip_address': ip_address,
+            'request_date': fields.Datetime.now(),
+        }
+        if getattr(threading.current_thread(), 'testing', False):
+            # Keep tests deterministic: write in the current transaction
+            self.create(vals)
+        else:
+            log_buffer.push(self.env.cr.dbname, vals)
+        return True
+
     @api.autovacuum
     def _gc_api_logs(self):
         """
@@ -0,0 +1,87 @@
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+
+from odoo import api, SUPERUSER_ID
+from odoo.modules.registry import Registry
+
+_logger = logging.getLogger(__name__)
+
+# Flush when this many entries are waiting for a database
+FLUSH_THRESHOLD = 200
+# Maximum seconds an entry may wait in the buffer before being written
+FLUSH_INTERVAL = 5.0
+# Hard cap per database; oldest entries are dropped beyond this
+MAX_BUFFER_SIZE = 10000
+
+
+class APILogBuffer:
+    """
+    In-process write-behind buffer for api.log entries.
+
+    Entries are queued per database by the request threads and written
+    in bulk (a single multi-row INSERT per flush) by a daemon thread,
+    outside of the request transaction.
+    """
+
+    def __init__(self):
+        self._queues = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def push(self, dbname, vals):
+        """Queue one log entry for the given database"""
+        with self._lock:
+            queue = self._queues.get(dbname)
+            if queue is None:
+                queue = self._queues[dbname] = deque(maxlen=MAX_BUFFER_SIZE)
+            queue.append(vals)
+            size = len(queue)
+        self._ensure_worker()
+        if size >= FLUSH_THRESHOLD:
+            self._wakeup.set()
+
+    def flush(self, dbname=None):
+        """Write all pending entries (of one or every database)"""
+        with self._lock:
+            dbnames = [dbname] if dbname else list(self._queues)
+            batches = {}
+            for name in dbnames:
+                queue = self._queues.get(name)
+                if queue:
+                    batches[name] = list(queue)
+                    queue.clear()
+
+        for name, vals_list in batches.items():
+            try:
+                with Registry(name).cursor() as cr:
+                    env = api.Environment(cr, SUPERUSER_ID, {})
+                    env['api.log'].create(vals_list)
+            except Exception as e:
+                _logger.error(f"Failed to flush {len(vals_list)} API log entries for {name}: {str(e)}")
+
+    def _ensure_worker(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name='api.log.flusher', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(FLUSH_INTERVAL)
+            self._wakeup.clear()
+            started = time.monotonic()
+            self.flush()
+            _logger.debug(f"API log buffer flushed in {time.monotonic() - started:.3f}s")
+
+
+log_buffer = APILogBuffer()
+atexit.register(log_buffer.flush)
@@ -0,0 +1,290 @@
+import logging
+
+from psycopg2 import IntegrityError
+
+from odoo import models, api
+
+_logger = logging.getLogger(__name__)
+
+# Orders are created in chunks of this size, each in its own savepoint
+ORDER_CREATE_BATCH = 100
+# Unique constraint of sale.order.api_idempotency_key
+IDEMPOTENCY_CONSTRAINT = 'sale_order_api_idempotency_key_uniq'
+
+
+class APIOrderIngest(models.AbstractModel):
+    _name = 'api.order.ingest'
+    _description = 'API Bulk Order Ingestion'
+
+    @api.model
+    def ingest(self, orders):
+        """
+        Create many sales orders at once.
+
+        Partners, products and countries of all orders are resolved with one
+        query each, missing partners are created in one batch and orders are
+        created in chunks. An order whose idempotency key (or, failing that,
+        external_order_id) was already imported is not created again.
+
+        :param orders: list of order dicts, same format as POST /api/v1/orders
+                       plus an optional 'idempotency_key'
+        :return: list of per-order result dicts, in input order
+        """
+        results = [None] * len(orders)
+        pending = []
+
+        for index, data in enumerate(orders):
+            key = (data.get('idempotency_key') or data.get('external_order_id')) if isinstance(data, dict) else None
+            result = {
+                'index': index,
+                'idempotency_key': key,
+                'external_order_id': data.get('external_order_id') if isinstance(data, dict) else None,
+            }
+            results[index] = result
+            if not isinstance(data, dict):
+                result.update(success=False, status='error', error='Invalid order data')
+            elif not data.get('customer') or not isinstance(data['customer'], dict):
+                result.update(success=False, status='error', error='Customer information is required')
+            elif not data.get('order_lines') or not all(isinstance(line, dict) for line in data['order_lines']):
+                result.update(success=False, status='error', error='Order lines are required')
+            else:
+                pending.append((index, data, key))
+
+        pending = self._skip_existing(pending, results)
+        if not pending:
+            return results
+
+        customers = [data['customer'] for __, data, __ in pending]
+        partners = self._resolve_partners(customers)
+        products = self._resolve_products(
+            [line.get('sku') for __, data, __ in pending for line in data['order_lines']]
+        )
+
+        to_create = []
+        for (index, data, key), partner in zip(pending, partners):
+            order_lines = []
+            invalid_products = []
+            for line in data['order_lines']:
+                product = products.get(line.get('sku'))
+                if not product:
+                    invalid_products.append(line.get('sku'))
+                    continue
+                order_lines.append((0, 0, {
+                    'product_id': product.id,
+                    'product_uom_qty': line.get('quantity', 1),
+                    'price_unit': line.get('price', product.list_price),
+                    'discount': line.get('discount', 0),
+                }))
+
+            result = results[index]
+            if invalid_products:
+                result['warnings'] = {
+                    'invalid_skus': invalid_products,
+                    'message': f'{len(invalid_products)} product(s) not found and skipped',
+                }
+            if not order_lines:
+                result.update(success=False, status='error', error='No valid products found')
+                continue
+
+            to_create.append((index, {
+                'partner_id': partner.id,
+                'order_line': order_lines,
+                'client_order_ref': data.get('external_order_id'),
+                'note': data.get('notes'),
+                'api_idempotency_key': key,
+            }))
+
+        for start in range(0, len(to_create), ORDER_CREATE_BATCH):
+            self._create_orders(to_create[start:start + ORDER_CREATE_BATCH], results)
+
+        return results
+
+    @api.model
+    def _skip_existing(self, pending, results):
+        """Report orders whose idempotency key was already imported, return the others"""
+        keys = {key for __, __, key in pending if key}
+        if not keys:
+            return pending
+
+        existing = {
+            order.api_idempotency_key: order
+            for order in self.env['sale.order'].search([('api_idempotency_key', 'in', list(keys))])
+        }
+        remaining = []
+        seen = set()
+        for index, data, key in pending:
+            if key in existing or key in seen:
+                order = existing.get(key)
+                results[index].update(
+                    success=True,
+                    status='duplicate',
+                    order_id=order.id if order else None,
+                    order_name=order.name if order else None,
+                    message='Order already imported',
+                )
+                continue
+            if key:
+                seen.add(key)
+            remaining.append((index, data, key))
+        return remaining
+
+    @api.model
+    def _is_duplicate_key_error(self, error):
+        """Whether error is the idempotency key constraint, i.e. the order was imported concurrently"""
+        return isinstance(error, IntegrityError) and error.diag.constraint_name == IDEMPOTENCY_CONSTRAINT
+
+    @api.model
+    def _get_duplicate_result(self, key):
+        """Result values of an order whose idempotency key was already imported"""
+        order = self.env['sale.order'].search([('api_idempotency_key', '=', key)], limit=1)
+        return {
+            'success': True,
+            'status': 'duplicate',
+            'order_id': order.id or None,
+            'order_name': order.name or None,
+            'message': 'Order already imported',
+        }
+
+    @api.model
+    def _resolve_partners(self, customers):
+        """
+        Find or create the partner of every customer, matching on email,
+        then phone, then mobile like POST /api/v1/orders.
+
+        :return: list of res.partner records, aligned with customers
+        """
+        Partner = self.env['res.partner']
+        emails = {c['email'] for c in customers if c.get('email')}
+        phones = {c['phone'] for c in customers if c.get('phone')}
+        mobiles = {c['mobile'] for c in customers if c.get('mobile')}
+
+        by_field = {'email': {}, 'phone': {}, 'mobile': {}}
+        if emails or phones or mobiles:
+            found = Partner.search([
+                '|', '|',
+                ('email', 'in', list(emails)),
+                ('phone', 'in', list(phones)),
+                ('mobile', 'in', list(mobiles)),
+            ])
+            for partner in found:
+                for field_name in by_field:
+                    if partner[field_name]:
+                        by_field[field_name].setdefault(partner[field_name], partner)
+
+        def lookup(customer):
+            for field_name in ('email', 'phone', 'mobile'):
+                value = customer.get(field_name)
+                if value and value in by_field[field_name]:
+                    return by_field[field_name][value]
+            return None
+
+        partners = [lookup(customer) for customer in customers]
+
+        # Create missing partners in one batch, once per distinct customer
+        missing = {}
+        for position, customer in enumerate(customers):
+            if partners[position]:
+                continue
+            identity = (customer.get('email'), customer.get('phone'), customer.get('mobile'))
+            if not any(identity):
+                identity = ('position', position)
+            missing.setdefault(identity, []).append(position)
+
+        if missing:
+            website_tag = self._get_website_tag()
+            country_codes = {
+                customers[positions[0]]['country_code'].upper()
+                for positions in missing.values() if customers[positions[0]].get('country_code')
+            }
+            countries = {
+                country.code: country
+                for country in self.env['res.country'].search([('code', 'in', list(country_codes))])
+            } if country_codes else {}
+
+            vals_list = []
+            for positions in missing.values():
+                customer = customers[positions[0]]
+                country = countries.get((customer.get('country_code') or '').upper())
+                vals_list.append({
+                    'name': customer.get('name', 'Unknown Customer'),
+                    'email': customer.get('email'),
+                    'phone': customer.get('phone'),
+                    'mobile': customer.get('mobile') or customer.get('phone'),
+                    'street': customer.get('address'),
+                    'city': customer.get('city'),
+                    'country_id': country.id if country else False,
+                    'category_id': [(6, 0, [website_tag.id])],
+                })
+            new_partners = Partner.create(vals_list)
+            for partner, positions in zip(new_partners, missing.values()):
+                for position in positions:
+                    partners[position] = partner
+
+        return partners
+
+    @api.model
+    def _get_website_tag(self):
+        PartnerTag = self.env['res.partner.category']
+        website_tag = PartnerTag.search([('name', '=', 'website')], limit=1)
+        if not website_tag:
+            website_tag = PartnerTag.create({'name': 'website'})
+        return website_tag
+
+    @api.model
+    def _resolve_products(self, skus):
+        """
+        Map every SKU to a product, by internal reference first, then barcode.
+
+        :return: {sku: product.product}
+        """
+        skus = list({sku for sku in skus if sku})
+        if not skus:
+            return {}
+        products = self.env['product.product'].search([
+            '|',
+            ('default_code', 'in', skus),
+            ('barcode', 'in', skus),
+        ])
+        by_code = {}
+        by_barcode = {}
+        for product in products:
+            if product.default_code:
+                by_code.setdefault(product.default_code, product)
+            if product.barcode:
+                by_barcode.setdefault(product.barcode, product)
+        return {sku: by_code.get(sku) or by_barcode.get(sku) for sku in skus}
+
+    @api.model
+    def _create_orders(self, batch, results):
+        """
+        Create one chunk of orders in a single call. If the chunk fails, retry
+        its orders one by one so a single bad order does not reject the others.
+        """
+        SaleOrder = self.env['sale.order']
+        try:
+            with self.env.cr.savepoint():
+                orders = SaleOrder.create([vals for __, vals in batch])
+            created = list(zip(batch, orders))
+        except Exception:
+            _logger.info("Bulk order chunk failed, retrying %s orders one by one", len(batch))
+            created = []
+            for index, vals in batch:
+                try:
+                    with self.env.cr.savepoint():
+                        created.append(((index, vals), SaleOrder.create(vals)))
+                except Exception as e:
+                    if self._is_duplicate_key_error(e):
+                        results[index].update(self._get_duplicate_result(vals['api_idempotency_key']))
+                    else:
+                        results[index].update(success=False, status='error', error=str(e))
+
+        for (index, __), order in created:
+            results[index].update(
+                success=True,
+                status='created',
+                order_id=order.id,
+                order_name=order.name,
+                customer_id=order.partner_id.id,
+                amount_total=order.amount_total,
+                created_at=order.create_date.isoformat() if order.create_date else None,
+            )
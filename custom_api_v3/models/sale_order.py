@@ -0,0 +1,12 @@
+from odoo import models, fields
+
+
+class SaleOrder(models.Model):
+    _inherit = 'sale.order'
+
+    api_idempotency_key = fields.Char(string='API Idempotency Key', copy=False, index=True, readonly=True)
+
+    _sql_constraints = [
+        ('api_idempotency_key_uniq', 'unique(api_idempotency_key)',
+         'An order with this API idempotency key already exists.'),
+    ]
@@ -0,0 +1,94 @@
+from odoo import models, fields, api
+
+# Changes younger than this are not served yet, so that transactions that
+# drew a lower sequence number but committed slightly later are not skipped
+SAFETY_LAG_SECONDS = 5
+# Largest page of changes served in one call
+MAX_CHANGES_LIMIT = 1000
+
+
+class APIStockChange(models.Model):
+    _name = 'api.stock.change'
+    _description = 'API Stock Change Cursor'
+    _order = 'change_seq'
+    _rec_name = 'product_id'
+
+    product_id = fields.Many2one('product.product', string='Product', required=True, ondelete='cascade')
+    change_seq = fields.Integer(string='Change Sequence', required=True, index=True, readonly=True)
+    change_date = fields.Datetime(string='Changed On', readonly=True)
+
+    _sql_constraints = [
+        ('product_uniq', 'unique(product_id)', 'Only one change cursor per product is allowed.'),
+    ]
+
+    def init(self):
+        self.env.cr.execute("CREATE SEQUENCE IF NOT EXISTS api_stock_change_seq")
+
+    @api.model
+    def _mark_products(self, product_ids):
+        """
+        Record that the availability of these products changed.
+        The cursor rows are bumped once per transaction, right before commit,
+        to keep the lock on them short and the sequence close to commit order.
+        """
+        product_ids = set(product_ids) - {False}
+        if not product_ids:
+            return
+        pending = self.env.cr.precommit.data.setdefault('api.stock.change.product_ids', set())
+        if not pending:
+            self.env.cr.precommit.add(self._flush_marked_products)
+        pending.update(product_ids)
+
+    def _flush_marked_products(self):
+        product_ids = self.env.cr.precommit.data.pop('api.stock.change.product_ids', set())
+        if not product_ids:
+            return
+        self.env.cr.execute("""
+            INSERT INTO api_stock_change (product_id, change_seq, change_date,
+                                          create_uid, create_date, write_uid, write_date)
+            SELECT p.id, nextval('api_stock_change_seq'), clock_timestamp() AT TIME ZONE 'UTC',
+                   %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+              FROM unnest(%(product_ids)s) AS p(id)
+             ORDER BY p.id
+            ON CONFLICT (product_id) DO UPDATE
+               SET change_seq = EXCLUDED.change_seq,
+                   change_date = EXCLUDED.change_date,
+                   write_uid = EXCLUDED.write_uid,
+                   write_date = EXCLUDED.write_date
+        """, {'product_ids': sorted(product_ids), 'uid': self.env.uid})
+
+    @api.model
+    def get_head_cursor(self):
+        """Latest change sequence that is safe to resume from"""
+        self.env.cr.execute("""
+            SELECT COALESCE(MAX(change_seq), 0)
+              FROM api_stock_change
+             WHERE change_date < (NOW() AT TIME ZONE 'UTC') - make_interval(secs => %s)
+        """, [SAFETY_LAG_SECONDS])
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def get_changes(self, since, limit=100):
+        """
+        Products whose availability changed after the given cursor.
+        limit is clamped to 1..MAX_CHANGES_LIMIT so a page always moves the cursor.
+
+        :return: (products, next_cursor, has_more)
+        """
+        limit = min(max(int(limit), 1), MAX_CHANGES_LIMIT)
+        self.env.cr.execute("""
+            SELECT product_id, change_seq
+              FROM api_stock_change
+             WHERE change_seq > %s
+               AND change_date < (NOW() AT TIME ZONE 'UTC') - make_interval(secs => %s)
+             ORDER BY change_seq
+             LIMIT %s
+        """, [since, SAFETY_LAG_SECONDS, limit + 1])
+        rows = self.env.cr.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = rows[-1][1] if rows else since
+        products = self.env['product.product'].with_context(active_test=False).browse(
+            [product_id for product_id, __ in rows]
+        )
+        return products, next_cursor, has_more
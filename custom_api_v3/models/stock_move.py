@@ -0,0 +1,21 @@
+from odoo import models, api
+
+TRACKED_MOVE_FIELDS = {'state', 'product_uom_qty', 'product_qty', 'product_id', 'location_id', 'location_dest_id'}
+
+
+class StockMove(models.Model):
+    _inherit = 'stock.move'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        moves = super().create(vals_list)
+        self.env['api.stock.change'].sudo()._mark_products(moves.product_id.ids)
+        return moves
+
+    def write(self, vals):
+        if TRACKED_MOVE_FIELDS.intersection(vals):
+            product_ids = set(self.product_id.ids)
+            res = super().write(vals)
+            self.env['api.stock.change'].sudo()._mark_products(product_ids | set(self.product_id.ids))
+            return res
+        return super().write(vals)
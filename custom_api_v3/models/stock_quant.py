@@ -0,0 +1,25 @@
+from odoo import models, api
+
+TRACKED_QUANT_FIELDS = {'quantity', 'reserved_quantity', 'location_id', 'product_id'}
+
+
+class StockQuant(models.Model):
+    _inherit = 'stock.quant'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        quants = super().create(vals_list)
+        self.env['api.stock.change'].sudo()._mark_products(quants.product_id.ids)
+        return quants
+
+    def write(self, vals):
+        if TRACKED_QUANT_FIELDS.intersection(vals):
+            product_ids = set(self.product_id.ids)
+            res = super().write(vals)
+            self.env['api.stock.change'].sudo()._mark_products(product_ids | set(self.product_id.ids))
+            return res
+        return super().write(vals)
+
+    def unlink(self):
+        self.env['api.stock.change'].sudo()._mark_products(self.product_id.ids)
+        return super().unlink()
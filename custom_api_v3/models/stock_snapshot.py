@@ -0,0 +1,114 @@
+from collections import defaultdict
+
+from odoo import models, api
+from odoo.tools import float_round
+
+STOCK_FIELDS = ('qty_available', 'virtual_available', 'free_qty', 'outgoing_qty', 'incoming_qty')
+PENDING_MOVE_STATES = ('waiting', 'confirmed', 'assigned', 'partially_available')
+
+
+class APIStockSnapshot(models.AbstractModel):
+    _name = 'api.stock.snapshot'
+    _description = 'API Stock Snapshot'
+
+    @api.model
+    def compute(self, products, warehouses=None, by_warehouse=False):
+        """
+        Compute stock quantities for a set of products in a constant number of queries.
+
+        Mirrors product.product qty_available / virtual_available / free_qty /
+        outgoing_qty / incoming_qty computed without context (all warehouses),
+        using one grouped query on stock.quant and one on stock.move.
+
+        :param products: product.product recordset
+        :param warehouses: stock.warehouse recordset (defaults to all warehouses)
+        :param by_warehouse: also return per-warehouse quantities
+        :return: {product_id: {field: qty, ..., 'warehouses': {warehouse_id: {field: qty}}}}
+        """
+        if warehouses is None:
+            warehouses = self.env['stock.warehouse'].search([])
+
+        totals = {product.id: dict.fromkeys(STOCK_FIELDS, 0.0) for product in products}
+        per_warehouse = defaultdict(lambda: defaultdict(lambda: dict.fromkeys(STOCK_FIELDS, 0.0)))
+        if not products or not warehouses:
+            return self._finalize(products, totals, per_warehouse, by_warehouse)
+
+        Location = self.env['stock.location']
+        warehouse_ids = set(warehouses.ids)
+        location_warehouse = {}
+
+        def warehouse_of(location):
+            if location.id not in location_warehouse:
+                warehouse_id = location.warehouse_id.id
+                location_warehouse[location.id] = warehouse_id if warehouse_id in warehouse_ids else False
+            return location_warehouse[location.id]
+
+        # On hand and reserved quantities, grouped by product and location
+        quant_groups = self.env['stock.quant']._read_group(
+            [('product_id', 'in', products.ids), ('location_id.warehouse_id', 'in', warehouses.ids)],
+            ['product_id', 'location_id'],
+            ['quantity:sum', 'reserved_quantity:sum'],
+        )
+        # Pending moves, grouped by product and source/destination location
+        move_groups = self.env['stock.move']._read_group(
+            [
+                ('product_id', 'in', products.ids),
+                ('state', 'in', PENDING_MOVE_STATES),
+                '|',
+                ('location_id.warehouse_id', 'in', warehouses.ids),
+                ('location_dest_id.warehouse_id', 'in', warehouses.ids),
+            ],
+            ['product_id', 'location_id', 'location_dest_id'],
+            ['product_qty:sum'],
+        )
+
+        # Prefetch the warehouse of every location involved in a single read
+        locations = Location.union(
+            *(location for __, location, __, __ in quant_groups),
+            *(location for __, location, __, __ in move_groups),
+            *(location for __, __, location, __ in move_groups),
+        )
+        locations.mapped('warehouse_id')
+
+        for product, location, quantity, reserved in quant_groups:
+            warehouse_id = warehouse_of(location)
+            if not warehouse_id:
+                continue
+            for target in (totals[product.id], per_warehouse[product.id][warehouse_id]):
+                target['qty_available'] += quantity
+                target['free_qty'] += quantity - reserved
+
+        for product, source, destination, quantity in move_groups:
+            source_wh = warehouse_of(source)
+            dest_wh = warehouse_of(destination)
+            if dest_wh and not source_wh:
+                totals[product.id]['incoming_qty'] += quantity
+            elif source_wh and not dest_wh:
+                totals[product.id]['outgoing_qty'] += quantity
+            if dest_wh and dest_wh != source_wh:
+                per_warehouse[product.id][dest_wh]['incoming_qty'] += quantity
+            if source_wh and source_wh != dest_wh:
+                per_warehouse[product.id][source_wh]['outgoing_qty'] += quantity
+
+        return self._finalize(products, totals, per_warehouse, by_warehouse, warehouses)
+
+    @api.model
+    def _finalize(self, products, totals, per_warehouse, by_warehouse, warehouses=None):
+        """Derive virtual_available and round everything to the product UoM"""
+        def rounded(values, rounding):
+            values['virtual_available'] = values['qty_available'] + values['incoming_qty'] - values['outgoing_qty']
+            return {
+                field: float_round(values[field], precision_rounding=rounding)
+                for field in STOCK_FIELDS
+            }
+
+        result = {}
+        for product in products:
+            rounding = product.uom_id.rounding
+            result[product.id] = rounded(totals[product.id], rounding)
+            if by_warehouse:
+                result[product.id]['warehouses'] = {
+                    warehouse.id: rounded(per_warehouse[product.id][warehouse.id], rounding)
+                    for warehouse in (warehouses or [])
+                }
+        return result
@@ -212,7 +212,10 @@ class DailyCashRegister(models.Model):
                 else:
                     vals['name'] = 'DCR/%s' % date_str
 
-        return super(DailyCashRegister, self).create(vals_list)
+        registers = super(DailyCashRegister, self).create(vals_list)
+        # New registers change the counts and lists, drop cached dashboard bundles
+        self.env['daily.register.dashboard']._clear_bundle_cache()
+        return registers
 
     def write(self, vals):
         """Prevent editing posted registers"""
@@ -221,7 +224,11 @@ class DailyCashRegister(models.Model):
                 if record.state == 'posted':
                     raise UserError(_('You cannot modify a posted register. Please cancel it first.'))
 
-        return super(DailyCashRegister, self).write(vals)
+        res = super(DailyCashRegister, self).write(vals)
+        if 'state' in vals:
+            # Posted totals changed, drop cached dashboard bundles
+            self.env['daily.register.dashboard']._clear_bundle_cache()
+        return res
 
     def unlink(self):
         """Prevent deleting posted registers"""
@@ -229,7 +236,9 @@ class DailyCashRegister(models.Model):
             if record.state == 'posted':
                 raise UserError(_('You cannot delete a posted register. Please cancel it first.'))
 
-        return super(DailyCashRegister, self).unlink()
+        res = super(DailyCashRegister, self).unlink()
+        self.env['daily.register.dashboard']._clear_bundle_cache()
+        return res
 
     # ==================== ACTIONS ====================
 
@@ -2,6 +2,13 @@
 from odoo import api, fields, models
 from datetime import date, timedelta
 from dateutil.relativedelta import relativedelta
+import time
+
+# Seconds a dashboard bundle is served from cache
+BUNDLE_CACHE_TTL = 60
+
+# (db, uid, companies, journals, date_from, date_to, today) -> (timestamp, bundle)
+_bundle_cache = {}
 
 
 class DailyRegisterDashboard(models.Model):
@@ -10,12 +17,53 @@ class DailyRegisterDashboard(models.Model):
 
     name = fields.Char(string="Name", default="Dashboard")
 
+    @api.model
+    def _get_period_domain(self, period):
+        """Domain on register date for the dashboard period filter"""
+        today = date.today()
+        if period == 'today':
+            return [('date', '=', today)]
+        elif period == 'week':
+            return [('date', '>=', today - timedelta(days=today.weekday()))]
+        elif period == 'month':
+            return [('date', '>=', today.replace(day=1))]
+        elif period == 'year':
+            return [('date', '>=', today.replace(month=1, day=1))]
+        return []
+
+    @api.model
+    def get_dashboard_bundle(self, journal_ids=False, date_from=False, date_to=False):
+        """
+        Get everything the dashboard client shows (journal filter and report) in one call,
+        cached for a short time per (journals, date range)
+        """
+        key = (self.env.cr.dbname, self.env.uid, tuple(self.env.companies.ids),
+               tuple(sorted(journal_ids or ())), date_from or False, date_to or False, date.today())
+        cached = _bundle_cache.get(key)
+        if cached and time.monotonic() - cached[0] < BUNDLE_CACHE_TTL:
+            return cached[1]
+
+        bundle = {
+            'journals': self.get_journals(),
+            'report': self.get_report_data(journal_ids, date_from, date_to),
+        }
+        now = time.monotonic()
+        # Drop expired bundles so keys of past days, users and filters do not pile up
+        for cached_key, (timestamp, __) in list(_bundle_cache.items()):
+            if now - timestamp >= BUNDLE_CACHE_TTL:
+                _bundle_cache.pop(cached_key, None)
+        _bundle_cache[key] = (now, bundle)
+        return bundle
+
+    @api.model
+    def _clear_bundle_cache(self):
+        _bundle_cache.clear()
+
     @api.model
     def get_dashboard_data(self, journal_id=False, period='all'):
         """Get main dashboard KPIs"""
         Register = self.env['daily.cash.register']
 
-        today = date.today()
         domain = [('state', '=', 'posted')]
 
         # Journal filter
@@ -23,44 +71,29 @@ class DailyRegisterDashboard(models.Model):
             domain.append(('journal_id', '=', journal_id))
 
         # Period filter
-        if period == 'today':
-            domain.append(('date', '=', today))
-        elif period == 'week':
-            week_start = today - timedelta(days=today.weekday())
-            domain.append(('date', '>=', week_start))
-        elif period == 'month':
-            month_start = today.replace(day=1)
-            domain.append(('date', '>=', month_start))
-        elif period == 'year':
-            year_start = today.replace(month=1, day=1)
-            domain.append(('date', '>=', year_start))
+        domain += self._get_period_domain(period)
 
-        # Get posted registers
-        posted_registers = Register.search(domain)
+        # Totals of posted registers in one grouped query
+        [(total_registers, total_debit, total_credit, total_tax)] = Register._read_group(
+            domain, [], ['__count', 'total_debit:sum', 'total_credit:sum', 'total_tax:sum'])
 
         # Get draft registers (without period filter for alerts)
         draft_domain = [('state', '=', 'draft')]
         if journal_id:
             draft_domain.append(('journal_id', '=', journal_id))
-        draft_registers = Register.search(draft_domain)
-
-        # Calculate totals
-        total_debit = sum(posted_registers.mapped('total_debit'))
-        total_credit = sum(posted_registers.mapped('total_credit'))
-
-        # Check if total_tax field exists
-        total_tax = 0
-        if 'total_tax' in Register._fields:
-            total_tax = sum(posted_registers.mapped('total_tax'))
+        draft_registers = Register.search_count(draft_domain)
 
+        total_debit = total_debit or 0.0
+        total_credit = total_credit or 0.0
+        total_tax = total_tax or 0.0
         net_balance = total_debit - total_credit
 
         # Count lines
-        total_lines = sum(len(r.line_ids) for r in posted_registers)
+        total_lines = self.env['daily.cash.register.line'].search_count([('register_id', 'any', domain)])
 
         return {
-            'total_registers': len(posted_registers),
-            'draft_registers': len(draft_registers),
+            'total_registers': total_registers,
+            'draft_registers': draft_registers,
             'total_debit': total_debit,
             'total_credit': total_credit,
             'total_tax': total_tax,
@@ -85,25 +118,11 @@ class DailyRegisterDashboard(models.Model):
     def get_registers_by_journal_chart(self, period='all'):
         """Get registers count by journal for chart"""
         Register = self.env['daily.cash.register']
-        Journal = self.env['account.journal']
 
-        today = date.today()
-        domain = [('state', '=', 'posted')]
+        domain = [('state', '=', 'posted'), ('journal_id.type', 'in', ['bank', 'cash'])]
 
         # Period filter
-        if period == 'today':
-            domain.append(('date', '=', today))
-        elif period == 'week':
-            week_start = today - timedelta(days=today.weekday())
-            domain.append(('date', '>=', week_start))
-        elif period == 'month':
-            month_start = today.replace(day=1)
-            domain.append(('date', '>=', month_start))
-        elif period == 'year':
-            year_start = today.replace(month=1, day=1)
-            domain.append(('date', '>=', year_start))
-
-        journals = Journal.search([('type', 'in', ['bank', 'cash'])])
+        domain += self._get_period_domain(period)
 
         labels = []
         data = []
@@ -114,13 +133,10 @@ class DailyRegisterDashboard(models.Model):
             'cash': '#2ecc71',
         }
 
-        for journal in journals:
-            j_domain = domain + [('journal_id', '=', journal.id)]
-            count = Register.search_count(j_domain)
-            if count > 0:
-                labels.append(journal.name)
-                data.append(count)
-                colors.append(color_map.get(journal.type, '#95a5a6'))
+        for journal, count in Register._read_group(domain, ['journal_id'], ['__count']):
+            labels.append(journal.name)
+            data.append(count)
+            colors.append(color_map.get(journal.type, '#95a5a6'))
 
         return {
             'labels': labels,
@@ -134,32 +150,32 @@ class DailyRegisterDashboard(models.Model):
         Register = self.env['daily.cash.register']
         today = date.today()
 
-        result = []
         months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
                   'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
 
         # Last 6 months
-        for i in range(5, -1, -1):
-            month_date = today - relativedelta(months=i)
-            month_start = date(month_date.year, month_date.month, 1)
-            month_end = month_start + relativedelta(months=1) - timedelta(days=1)
-
-            domain = [
-                ('state', '=', 'posted'),
-                ('date', '>=', month_start),
-                ('date', '<=', month_end)
-            ]
-
-            if journal_id:
-                domain.append(('journal_id', '=', journal_id))
+        first_month = (today - relativedelta(months=5)).replace(day=1)
+        domain = [
+            ('state', '=', 'posted'),
+            ('date', '>=', first_month),
+            ('date', '<=', today.replace(day=1) + relativedelta(months=1) - timedelta(days=1)),
+        ]
 
-            registers = Register.search(domain)
+        if journal_id:
+            domain.append(('journal_id', '=', journal_id))
 
-            total_debit = sum(registers.mapped('total_debit'))
-            total_credit = sum(registers.mapped('total_credit'))
+        totals = {
+            month_start: (total_debit, total_credit)
+            for month_start, total_debit, total_credit in Register._read_group(
+                domain, ['date:month'], ['total_debit:sum', 'total_credit:sum'])
+        }
 
+        result = []
+        for i in range(6):
+            month_start = first_month + relativedelta(months=i)
+            total_debit, total_credit = totals.get(month_start, (0.0, 0.0))
             result.append({
-                'month': months[month_date.month - 1],
+                'month': months[month_start.month - 1],
                 'debit': total_debit,
                 'credit': total_credit,
             })
@@ -225,25 +241,27 @@ class DailyRegisterDashboard(models.Model):
         """Get daily debit/credit trend for line chart"""
         Register = self.env['daily.cash.register']
         today = date.today()
+        first_day = today - timedelta(days=days - 1)
 
-        result = []
-
-        for i in range(days - 1, -1, -1):
-            day = today - timedelta(days=i)
-
-            domain = [
-                ('state', '=', 'posted'),
-                ('date', '=', day)
-            ]
+        domain = [
+            ('state', '=', 'posted'),
+            ('date', '>=', first_day),
+            ('date', '<=', today),
+        ]
 
-            if journal_id:
-                domain.append(('journal_id', '=', journal_id))
-
-            registers = Register.search(domain)
+        if journal_id:
+            domain.append(('journal_id', '=', journal_id))
 
-            total_debit = sum(registers.mapped('total_debit'))
-            total_credit = sum(registers.mapped('total_credit'))
+        totals = {
+            day: (total_debit, total_credit)
+            for day, total_debit, total_credit in Register._read_group(
+                domain, ['date:day'], ['total_debit:sum', 'total_credit:sum'])
+        }
 
+        result = []
+        for i in range(days):
+            day = first_day + timedelta(days=i)
+            total_debit, total_credit = totals.get(day, (0.0, 0.0))
             result.append({
                 'date': day.strftime('%d/%m'),
                 'debit': total_debit,
@@ -166,24 +166,31 @@ class DailyCashRegisterLine(models.Model):
 
     @api.depends('register_id.line_ids', 'register_id.line_ids.debit', 'register_id.line_ids.credit', 'sequence')
     def _compute_running_balance(self):
-        """Calculate running balance"""
-        for line in self:
-            if line.register_id and line.register_id.line_ids:
-                # Sort lines by sequence and id
-                sorted_lines = line.register_id.line_ids.sorted(
-                    lambda l: (l.sequence, l.id if isinstance(l.id, int) else 0))
-
-                # Calculate running balance up to current line
-                running_balance = 0.0
-                for sorted_line in sorted_lines:
-                    running_balance += sorted_line.debit - sorted_line.credit
-                    if sorted_line.id == line.id or (
-                            not isinstance(line.id, int) and sorted_line.sequence >= line.sequence):
-                        break
-
-                line.running_balance = running_balance
-            else:
-                line.running_balance = 0.0
+        """Calculate running balance with one pass over each register's lines"""
+        lines_without_register = self.filtered(lambda l: not l.register_id)
+        lines_without_register.running_balance = 0.0
+
+        for register, lines in (self - lines_without_register).grouped('register_id').items():
+            # Sort lines by sequence and id, then accumulate once
+            sorted_lines = register.line_ids.sorted(
+                lambda l: (l.sequence, l.id if isinstance(l.id, int) else 0))
+
+            running_balance = 0.0
+            balances = {}
+            sequence_balances = []
+            for sorted_line in sorted_lines:
+                running_balance += sorted_line.debit - sorted_line.credit
+                balances[sorted_line.id] = running_balance
+                sequence_balances.append((sorted_line.sequence, running_balance))
+
+            for line in lines:
+                if line.id in balances:
+                    line.running_balance = balances[line.id]
+                else:
+                    # New line not yet in the register: balance up to the first line at or after its sequence
+                    line.running_balance = next(
+                        (balance for sequence, balance in sequence_balances if sequence >= line.sequence),
+                        running_balance)
 
     # ==================== CONSTRAINTS ====================
 
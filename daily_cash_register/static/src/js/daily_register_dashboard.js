@@ -39,7 +39,6 @@ export class DailyRegisterDashboard extends Component {
         });
 
         onWillStart(async () => {
-            await this.loadJournals();
             await this.loadReportData();
         });
     }
@@ -54,16 +53,6 @@ export class DailyRegisterDashboard extends Component {
         return `${now.getFullYear()}-${String(now.getMonth() + 1).padStart(2, '0')}-${String(now.getDate()).padStart(2, '0')}`;
     }
 
-    async loadJournals() {
-        try {
-            this.state.journals = await this.orm.call(
-                'daily.register.dashboard', 'get_journals', []
-            );
-        } catch (error) {
-            console.error("Error loading journals:", error);
-        }
-    }
-
     async loadReportData() {
         this.state.isLoading = true;
         try {
@@ -71,12 +60,15 @@ export class DailyRegisterDashboard extends Component {
                 ? this.state.selectedJournals
                 : false;
 
-            const data = await this.orm.call(
+            // Journals and report in one call (see get_dashboard_bundle)
+            const bundle = await this.orm.call(
                 'daily.register.dashboard',
-                'get_report_data',
+                'get_dashboard_bundle',
                 [journalIds, this.state.dateFrom, this.state.dateTo]
             );
 
+            const data = bundle.report;
+            this.state.journals = bundle.journals;
             this.state.reportData = data;
 
             // Update KPIs from totals
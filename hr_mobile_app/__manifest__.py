@@ -29,9 +29,14 @@ Features:
         'views/hr_announcement_views.xml',
         'views/hr_leave_mobile_views.xml',
         'data/mobile_user_data.xml',
+        'data/mobile_token_data.xml',
         # 'data/hr_leave_mobile_data.xml',
         'data/announcement_data.xml',
+        'data/attendance_event_cron.xml',
+        'data/payslip_pdf_cron.xml',
+        'data/login_stats_cron.xml',
         'views/hr_office_location_views.xml',
+        'views/hr_attendance_event_views.xml',
         'views/menu.xml',
     ],
     'demo': [],
@@ -1,17 +1,79 @@
 # -*- coding: utf-8 -*-
-from odoo import http, fields, _
+from odoo import http, fields, tools, _
+from odoo.exceptions import AccessError
 from odoo.http import request
 import werkzeug.exceptions
+import hashlib
 import json
 import logging
 from datetime import datetime, timedelta
 
+from ..models.hr_employee import MOBILE_IMAGE_SIZES, MOBILE_IMAGE_PLACEHOLDER_KEY
+
 _logger = logging.getLogger(__name__)
 
+# جلسة المستخدم المشترك بدون رمز دخول مسموحة حتى يرسل التطبيق الرموز
+LEGACY_SESSION_PARAM = 'hr_mobile_app.allow_legacy_session'
+
 
 class MobileAPI(http.Controller):
     """واجهة برمجة تطبيقات للتطبيق المحمول"""
 
+    def _get_client_address(self):
+        """
+        عنوان العميل الفعلي: خلف البروكسي (proxy_mode) يكون آخر عنوان في X-Forwarded-For
+        وهو العنوان الذي أضافه البروكسي نفسه ولا يمكن للعميل تزويره
+        """
+        forwarded_for = request.httprequest.headers.get('X-Forwarded-For')
+        if tools.config['proxy_mode'] and forwarded_for:
+            return forwarded_for.split(',')[-1].strip()
+        return request.httprequest.remote_addr
+
+    def _get_mobile_user(self):
+        """المستخدم الفعلي للطلب: مستخدم الموظف صاحب رمز الدخول أو مستخدم الجلسة"""
+        token_employee_id = request.context.get('mobile_employee_id')
+        if token_employee_id:
+            return request.env['hr.employee'].sudo().browse(token_employee_id).user_id
+        return request.env.user
+
+    def _is_legacy_service_session(self):
+        """
+        جلسة المستخدم المشترك بدون رمز دخول (التطبيق الحالي يرسل معرف الموظف بنفسه).
+        يمكن إيقافها بعد تحديث التطبيق من المعامل hr_mobile_app.allow_legacy_session = 0
+        """
+        if request.env.uid != request.env['hr.mobile.token'].sudo()._get_service_uid():
+            return False
+        return request.env['ir.config_parameter'].sudo().get_param(
+            LEGACY_SESSION_PARAM, '1') not in ('0', 'False', 'false')
+
+    def _get_mobile_employee_id(self, employee_id=None):
+        """
+        الموظف الذي يخصه الطلب: موظف رمز الدخول دائماً، ولا يسمح بطلب بيانات موظف آخر.
+        طلبات الجلسة (بدون رمز) مقصورة على موظفي المستخدم إلا لمسؤولي الموارد البشرية
+        وجلسة المستخدم المشترك القديمة.
+        """
+        token_employee_id = request.context.get('mobile_employee_id')
+        if token_employee_id:
+            if employee_id and int(employee_id) != token_employee_id:
+                raise AccessError(_('غير مصرح لك بالوصول إلى بيانات موظف آخر'))
+            return token_employee_id
+
+        if self._is_legacy_service_session():
+            return int(employee_id) if employee_id else False
+
+        user = self._get_mobile_user()
+        if not employee_id:
+            return user.employee_id.id
+        if not user.has_group('hr.group_hr_user') and int(employee_id) not in user.employee_ids.ids:
+            raise AccessError(_('غير مصرح لك بالوصول إلى بيانات موظف آخر'))
+        return int(employee_id)
+
+    def _check_mobile_record_access(self, record):
+        """رفض الوصول إلى سجل (طلب إجازة، كشف مرتب) لا يخص موظف الطلب"""
+        if not record.employee_id:
+            raise AccessError(_('غير مصرح لك بالوصول إلى هذا السجل'))
+        self._get_mobile_employee_id(record.employee_id.id)
+
     @http.route('/api/mobile/version', type='http', auth='none', methods=['GET'], csrf=False)
     def get_api_version(self):
         """الحصول على إصدار API"""
@@ -65,102 +127,49 @@ class MobileAPI(http.Controller):
 
             _logger.info("محاولة تسجيل دخول للمستخدم: %s في قاعدة البيانات: %s", username, db)
 
-            # تسجيل دخول المستخدم المشترك
-            try:
-                uid = request.session.authenticate(db, 'mobile_app_service', 'Secure_P@ssword123')
-                if not uid:
-                    _logger.error("فشل تسجيل دخول المستخدم المشترك")
-                    return json.dumps({
-                        'success': False,
-                        'error': 'فشل تسجيل دخول المستخدم المشترك'
-                    })
-                _logger.info("تم تسجيل دخول المستخدم المشترك بنجاح، معرف المستخدم: %s", uid)
-            except Exception as e:
-                _logger.error("خطأ في تسجيل دخول المستخدم المشترك: %s", str(e))
-                return json.dumps({
-                    'success': False,
-                    'error': f'خطأ في تسجيل دخول المستخدم المشترك: {str(e)}'
-                })
-
-            # البحث عن الموظف بطريقتين (دعم أكبر)
-            # 1. بحث مباشر
-            employee = request.env['hr.employee'].sudo().search([
-                ('mobile_username', '=', username),
-                ('allow_mobile_access', '=', True),
-            ], limit=1)
-
-            # 2. إذا لم يتم العثور، جرب بحث غير حساس لحالة الأحرف
-            if not employee:
-                employee = request.env['hr.employee'].sudo().search([
-                    ('mobile_username', 'ilike', username),
-                    ('allow_mobile_access', '=', True),
-                ], limit=1)
-
-            # 3. إذا لم يتم العثور بعد، جرب البحث بالاسم
-            if not employee:
-                employee = request.env['hr.employee'].sudo().search([
-                    ('name', 'ilike', username),
-                    ('allow_mobile_access', '=', True),
-                ], limit=1)
-
-            _logger.info("نتيجة البحث عن الموظف: %s", "تم العثور" if employee else "لم يتم العثور")
+            # خط تسجيل الدخول: تحديد عدد المحاولات لكل مستخدم وعنوان IP ثم التحقق من PIN المشفر
+            login = request.env['hr.employee'].sudo().authenticate_mobile(
+                username, password, self._get_client_address()
+            )
 
-            if not employee:
-                _logger.warning("لم يتم العثور على موظف بهذا الاسم: %s", username)
+            if not login['success']:
+                _logger.warning("فشل تسجيل الدخول للمستخدم %s: %s", username, login['error'])
                 return json.dumps({
                     'success': False,
-                    'error': 'لم يتم العثور على موظف بهذا الاسم'
+                    'error': login['error'],
+                    'retry_after': login['retry_after'],
                 })
 
-            # للاختبار فقط: السماح بالوصول دائمًا بغض النظر عن كلمة المرور
-            # في البيئة الإنتاجية، يجب تعديل هذا ليستخدم تشفير حقيقي للـ PIN
-            _logger.info("التحقق من كلمة المرور (مبسط للاختبار)")
-            password_check = (password == '123456' or True)  # دائماً صح للاختبار
-
-            if password_check:
-                _logger.info("تم التحقق من كلمة المرور بنجاح")
-
-                # جلب بيانات القسم إذا كان متاحاً
-                department_name = employee.department_id.name if employee.department_id else 'غير محدد'
-
-                # جلب صورة الموظف
-                avatar_128 = None
-                image_1920 = None
-
-                # قراءة الصورة من Odoo
-                if employee.avatar_128:
-                    avatar_128 = employee.avatar_128.decode('utf-8') if isinstance(employee.avatar_128,
-                                                                                   bytes) else employee.avatar_128
-                if employee.image_1920:
-                    image_1920 = employee.image_1920.decode('utf-8') if isinstance(employee.image_1920,
-                                                                                   bytes) else employee.image_1920
+            employee = login['employee']
+            _logger.info("تم التحقق من كلمة المرور بنجاح")
+
+            # جلب بيانات القسم إذا كان متاحاً
+            department_name = employee.department_id.name if employee.department_id else 'غير محدد'
+
+            # تحضير بيانات الموظف للإرجاع
+            employee_data = {
+                'id': employee.id,
+                'name': employee.name,
+                'job_title': employee.job_title or 'غير محدد',
+                'department': department_name,
+                'work_email': employee.work_email or '',
+                'work_phone': employee.work_phone or '',
+                'mobile_phone': employee.mobile_phone or '',
+                # روابط الصورة، مع بياناتها المضمنة التي يقرأها التطبيق الحالي
+                **employee.get_mobile_avatar_data(),
+            }
 
-                # تحضير بيانات الموظف للإرجاع
-                employee_data = {
-                    'id': employee.id,
-                    'name': employee.name,
-                    'job_title': employee.job_title or 'غير محدد',
-                    'department': department_name,
-                    'work_email': employee.work_email or '',
-                    'work_phone': employee.work_phone or '',
-                    'mobile_phone': employee.mobile_phone or '',
-                    # إضافة بيانات الصورة
-                    'avatar_128': avatar_128,
-                    'image_1920': image_1920,
-                }
+            # رمز الدخول الذي يرسله التطبيق في ترويسة Authorization مع كل طلب
+            token_data = request.env['hr.mobile.token'].sudo().issue_token(employee)
 
-                _logger.info("إرجاع بيانات الموظف: %s",
-                             {k: v for k, v in employee_data.items() if k not in ['avatar_128', 'image_1920']})
-                return json.dumps({
-                    'success': True,
-                    'employee': employee_data
-                })
-            else:
-                _logger.warning("كلمة المرور غير صحيحة")
-                return json.dumps({
-                    'success': False,
-                    'error': 'كلمة المرور غير صحيحة'
-                })
+            _logger.info("إرجاع بيانات الموظف: %s",
+                         {k: v for k, v in employee_data.items() if k not in ['avatar_128', 'image_1920']})
+            return json.dumps({
+                'success': True,
+                'employee': employee_data,
+                'token': token_data['token'],
+                'token_expires_at': token_data['expires_at'],
+            })
 
         except Exception as e:
             _logger.error("خطأ عام في تسجيل الدخول المبسط: %s", str(e))
@@ -169,7 +178,61 @@ class MobileAPI(http.Controller):
                 'error': str(e)
             })
 
-    @http.route('/api/mobile/authenticate', type='json', auth='user', csrf=False)
+    @http.route('/api/mobile/logout', type='json', auth='mobile_token', csrf=False)
+    def logout(self, **kw):
+        """تسجيل الخروج وإلغاء رمز الدخول الحالي"""
+        authorization = request.httprequest.headers.get('Authorization', '')
+        if authorization.startswith('Bearer '):
+            request.env['hr.mobile.token'].sudo().revoke_token(authorization[7:].strip())
+        return {'success': True}
+
+    @http.route('/api/mobile/employee/image/<int:employee_id>/<string:size>/<string:checksum>',
+                type='http', auth='mobile_token', methods=['GET'], csrf=False)
+    def get_employee_image(self, employee_id, size, checksum, **kw):
+        """
+        صورة الموظف حسب الحجم والبصمة (content hash)
+        المحتوى لا يتغير لنفس الرابط لذلك يتم تخزينه مؤقتاً بشكل دائم في التطبيق
+        """
+        employee_id = self._get_mobile_employee_id(employee_id)
+        field_name = MOBILE_IMAGE_SIZES.get(size)
+        if not field_name:
+            raise werkzeug.exceptions.NotFound()
+
+        attachment = request.env['ir.attachment'].sudo().search([
+            ('res_model', '=', 'hr.employee'),
+            ('res_id', '=', employee_id),
+            ('res_field', '=', field_name),
+        ], limit=1)
+        # الموظف بدون صورة: صورة افتراضية
+        current_checksum = attachment.checksum if attachment else MOBILE_IMAGE_PLACEHOLDER_KEY
+
+        if current_checksum != checksum:
+            # تم تغيير الصورة: إعادة التوجيه إلى الرابط الحالي
+            response = request.redirect(
+                f'/api/mobile/employee/image/{employee_id}/{size}/{current_checksum}', local=True
+            )
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        headers = [
+            ('ETag', f'"{checksum}"'),
+            ('Cache-Control', 'private, max-age=31536000, immutable'),
+        ]
+        if checksum in request.httprequest.headers.get('If-None-Match', ''):
+            return request.make_response(b'', headers=headers, status=304)
+
+        if not attachment:
+            content = request.env['hr.employee'].sudo()._get_mobile_image_placeholder()
+            return request.make_response(content, headers=headers + [
+                ('Content-Type', 'image/png'),
+                ('Content-Length', len(content)),
+            ])
+        return request.make_response(attachment.raw, headers=headers + [
+            ('Content-Type', attachment.mimetype or 'image/png'),
+            ('Content-Length', attachment.file_size),
+        ])
+
+    @http.route('/api/mobile/authenticate', type='json', auth='mobile_token', csrf=False)
     def authenticate_employee(self, username=None, pin=None):
         """المصادقة على الموظف عبر اسم المستخدم و PIN"""
         _logger.info("====== طلب مصادقة الموظف ======")
@@ -177,31 +240,14 @@ class MobileAPI(http.Controller):
             return {'success': False, 'error': _('معلومات غير كافية')}
 
         try:
-            # العثور على الموظف بواسطة اسم المستخدم
-            employee = request.env['hr.employee'].sudo().search([
-                ('mobile_username', '=', username),
-                ('allow_mobile_access', '=', True),
-            ], limit=1)
-
-            # التحقق من وجود الموظف
-            if not employee:
-                _logger.warning("المستخدم غير موجود أو غير مفعل: %s", username)
-                return {'success': False, 'error': _('المستخدم غير موجود أو غير مفعل')}
-
-            # للاختبار: قبول أي PIN
-            verification_result = True
-            _logger.info("تم التحقق من PIN (مبسط للاختبار)")
-
-            # جلب صورة الموظف
-            avatar_128 = None
-            image_1920 = None
-
-            if employee.avatar_128:
-                avatar_128 = employee.avatar_128.decode('utf-8') if isinstance(employee.avatar_128,
-                                                                               bytes) else employee.avatar_128
-            if employee.image_1920:
-                image_1920 = employee.image_1920.decode('utf-8') if isinstance(employee.image_1920,
-                                                                               bytes) else employee.image_1920
+            # التحقق عبر خط تسجيل الدخول (تحديد المحاولات والتحقق من PIN المشفر)
+            login = request.env['hr.employee'].sudo().authenticate_mobile(
+                username, pin, self._get_client_address()
+            )
+            if not login['success']:
+                _logger.warning("فشل التحقق للمستخدم %s: %s", username, login['error'])
+                return {'success': False, 'error': login['error'], 'retry_after': login['retry_after']}
+            employee = login['employee']
 
             # إرجاع معلومات الموظف
             return {
@@ -214,9 +260,8 @@ class MobileAPI(http.Controller):
                     'work_email': employee.work_email or False,
                     'work_phone': employee.work_phone or False,
                     'mobile_phone': employee.mobile_phone or False,
-                    # إضافة بيانات الصورة
-                    'avatar_128': avatar_128,
-                    'image_1920': image_1920,
+                    # روابط الصورة، مع بياناتها المضمنة التي يقرأها التطبيق الحالي
+                    **employee.get_mobile_avatar_data(),
                 }
             }
 
@@ -227,9 +272,10 @@ class MobileAPI(http.Controller):
     # في ملف hr_mobile_app/controllers/mobile_api.py
     # استبدل دالة get_employee_info بهذه النسخة المحدثة:
 
-    @http.route('/api/mobile/employee/info', type='json', auth='user', csrf=False)
+    @http.route('/api/mobile/employee/info', type='json', auth='mobile_token', csrf=False)
     def get_employee_info(self, employee_id=None):
         """الحصول على معلومات الموظف بناءً على المعرف"""
+        employee_id = self._get_mobile_employee_id(employee_id)
         _logger.info("====== طلب معلومات الموظف ======")
         if not employee_id:
             return {'success': False, 'error': _('معلومات غير كافية')}
@@ -289,11 +335,52 @@ class MobileAPI(http.Controller):
             'timestamp': fields.Datetime.now(),
         })
 
+    # ==================== الشاشة الرئيسية ====================
+
+    @http.route('/api/mobile/home', type='http', auth='mobile_token', methods=['GET', 'POST'], csrf=False)
+    def get_home_dashboard(self, employee_id=None, announcement_limit=5, **kw):
+        """
+        جميع بيانات الشاشة الرئيسية في طلب واحد: حالة وملخص الحضور، إحصائيات الإجازات،
+        الإعلانات وملخص كشوف المرتبات.
+        يدعم ETag: إذا أرسل التطبيق If-None-Match بنفس القيمة يتم الرد بـ 304 بدون محتوى
+        """
+        employee_id = self._get_mobile_employee_id(employee_id)
+        try:
+            _logger.info("====== طلب الشاشة الرئيسية للموظف %s ======", employee_id)
+
+            if not employee_id:
+                return request.make_json_response({'success': False, 'error': 'معرف الموظف مطلوب'})
+
+            data = request.env['hr.mobile.home'].sudo().get_home_data(
+                int(employee_id), int(announcement_limit)
+            )
+            if data is None:
+                return request.make_json_response({'success': False, 'error': 'الموظف غير موجود'})
+
+            body = json.dumps({'success': True, 'home': data}, ensure_ascii=False, default=str, sort_keys=True)
+            etag = '"%s"' % hashlib.sha1(body.encode('utf-8')).hexdigest()
+            headers = [
+                ('ETag', etag),
+                ('Cache-Control', 'private, no-cache'),
+            ]
+
+            if etag in request.httprequest.headers.get('If-None-Match', ''):
+                return request.make_response('', headers=headers, status=304)
+
+            return request.make_response(body, headers=headers + [
+                ('Content-Type', 'application/json; charset=utf-8'),
+            ])
+
+        except Exception as e:
+            _logger.error("خطأ في جلب بيانات الشاشة الرئيسية: %s", str(e))
+            return request.make_json_response({'success': False, 'error': str(e)})
+
     # ==================== واجهات الحضور والانصراف مع الموقع ====================
 
-    @http.route('/api/mobile/attendance/check_location', type='json', auth='user', csrf=False)
+    @http.route('/api/mobile/attendance/check_location', type='json', auth='mobile_token', csrf=False)
     def check_attendance_location(self, employee_id=None, latitude=None, longitude=None):
         """التحقق من الموقع قبل السماح بتسجيل الحضور/الانصراف"""
+        employee_id = self._get_mobile_employee_id(employee_id)
         try:
             _logger.info("====== التحقق من موقع الحضور ======")
             _logger.info("employee_id: %s, lat: %s, lng: %s", employee_id, latitude, longitude)
@@ -320,9 +407,10 @@ class MobileAPI(http.Controller):
                 'error': str(e)
             }
 
-    @http.route('/api/mobile/attendance/check_in', type='json', auth='user', csrf=False)
+    @http.route('/api/mobile/attendance/check_in', type='json', auth='mobile_token', csrf=False)
     def mobile_attendance_check_in(self, employee_id=None, latitude=None, longitude=None):
         """تسجيل حضور مع الموقع الجغرافي"""
+        employee_id = self._get_mobile_employee_id(employee_id)
         try:
             _logger.info("====== تسجيل حضور مع الموقع ======")
             _logger.info("employee_id: %s, lat: %s, lng: %s", employee_id, latitude, longitude)
@@ -332,8 +420,8 @@ class MobileAPI(http.Controller):
 
             # تحويل القيم إلى الأنواع الصحيحة
             emp_id = int(employee_id)
-            lat = float(latitude) if latitude else None
-            lng = float(longitude) if longitude else None
+            lat = float(latitude) if latitude is not None else None
+            lng = float(longitude) if longitude is not None else None
 
             # استدعاء دالة تسجيل الحضور مع الموقع
             result = request.env['hr.attendance'].sudo().mobile_check_in(
@@ -355,9 +443,10 @@ class MobileAPI(http.Controller):
                 'error': str(e)
             }
 
-    @http.route('/api/mobile/attendance/check_out', type='json', auth='user', csrf=False)
+    @http.route('/api/mobile/attendance/check_out', type='json', auth='mobile_token', csrf=False)
     def mobile_attendance_check_out(self, employee_id=None, latitude=None, longitude=None):
         """تسجيل انصراف مع الموقع الجغرافي"""
+        employee_id = self._get_mobile_employee_id(employee_id)
         try:
             _logger.info("====== تسجيل انصراف مع الموقع ======")
             _logger.info("employee_id: %s, lat: %s, lng: %s", employee_id, latitude, longitude)
@@ -367,8 +456,8 @@ class MobileAPI(http.Controller):
 
             # تحويل القيم إلى الأنواع الصحيحة
             emp_id = int(employee_id)
-            lat = float(latitude) if latitude else None
-            lng = float(longitude) if longitude else None
+            lat = float(latitude) if latitude is not None else None
+            lng = float(longitude) if longitude is not None else None
 
             # استدعاء دالة تسجيل الانصراف مع الموقع
             result = request.env['hr.attendance'].sudo().mobile_check_out(
@@ -390,9 +479,66 @@ class MobileAPI(http.Controller):
                 'error': str(e)
             }
 
-    @http.route('/api/mobile/attendance/status', type='json', auth='user', csrf=False)
+    @http.route('/api/mobile/attendance/event', type='json', auth='mobile_token', csrf=False)
+    def mobile_attendance_event(self, employee_id=None, event_type=None, client_event_id=None,
+                                client_timestamp=None, latitude=None, longitude=None):
+        """
+        استقبال حدث حضور/انصراف وإضافته لقائمة الانتظار (وضع الذروة)
+        يتم الرد فوراً ويقوم cron بإنشاء سجل الحضور، ويمكن إعادة إرسال نفس الحدث بأمان
+        """
+        employee_id = self._get_mobile_employee_id(employee_id)
+        try:
+            if not employee_id or not event_type or not client_event_id:
+                return {'success': False, 'error': 'معرف الموظف ونوع الحدث ومعرف الحدث مطلوبة'}
+
+            lat = float(latitude) if latitude is not None else None
+            lng = float(longitude) if longitude is not None else None
+
+            return request.env['hr.attendance.event'].sudo().enqueue_mobile_event(
+                int(employee_id), event_type, client_event_id,
+                client_timestamp=client_timestamp, latitude=lat, longitude=lng
+            )
+
+        except ValueError as e:
+            _logger.error("خطأ في تحويل البيانات: %s", str(e))
+            return {
+                'success': False,
+                'error': 'البيانات المرسلة غير صالحة'
+            }
+        except Exception as e:
+            _logger.error("خطأ في استقبال حدث الحضور: %s", str(e))
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    @http.route('/api/mobile/attendance/event/status', type='json', auth='mobile_token', csrf=False)
+    def mobile_attendance_event_status(self, employee_id=None, client_event_ids=None):
+        """الحصول على حالة معالجة أحداث الحضور المرسلة"""
+        employee_id = self._get_mobile_employee_id(employee_id)
+        try:
+            if not employee_id or not client_event_ids:
+                return {'success': False, 'error': 'معرف الموظف ومعرفات الأحداث مطلوبة'}
+
+            events = request.env['hr.attendance.event'].sudo().get_events_status(
+                int(employee_id), client_event_ids
+            )
+            return {
+                'success': True,
+                'events': events
+            }
+
+        except Exception as e:
+            _logger.error("خطأ في جلب حالة أحداث الحضور: %s", str(e))
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    @http.route('/api/mobile/attendance/status', type='json', auth='mobile_token', csrf=False)
     def get_attendance_status(self, employee_id=None):
         """الحصول على حالة الحضور الحالية للموظف"""
+        employee_id = self._get_mobile_employee_id(employee_id)
         try:
             _logger.info("====== طلب حالة الحضور ======")
 
@@ -416,9 +562,10 @@ class MobileAPI(http.Controller):
                 'error': str(e)
             }
 
-    @http.route('/api/mobile/attendance/history', type='json', auth='user', csrf=False)
+    @http.route('/api/mobile/attendance/history', type='json', auth='mobile_token', csrf=False)
     def get_attendance_history(self, employee_id=None, limit=10):
         """الحصول على سجل الحضور السابق"""
+        employee_id = self._get_mobile_employee_id(employee_id)
         try:
             _logger.info("====== طلب سجل الحضور ======")
 
@@ -443,9 +590,10 @@ class MobileAPI(http.Controller):
                 'error': str(e)
             }
 
-    @http.route('/api/mobile/attendance/summary', type='json', auth='user', csrf=False)
+    @http.route('/api/mobile/attendance/summary', type='json', auth='mobile_token', csrf=False)
     def get_attendance_summary(self, employee_id=None):
         """الحصول على ملخص الحضور اليومي"""
+        employee_id = self._get_mobile_employee_id(employee_id)
         try:
             _logger.info("====== طلب ملخص الحضور ======")
 
@@ -469,7 +617,7 @@ class MobileAPI(http.Controller):
                 'error': str(e)
             }
 
-    @http.route('/api/mobile/leave/types', type='json', auth='user', csrf=False)
+    @http.route('/api/mobile/leave/types', type='json', auth='mobile_token', csrf=False)
     def get_leave_types(self):
         """الحصول على أنواع الإجازات المتاحة"""
         try:
@@ -504,9 +652,10 @@ class MobileAPI(http.Controller):
                 'error': str(e)
             }
 
-    @http.route('/api/mobile/leave/requests', type='json', auth='user', csrf=False)
+    @http.route('/api/mobile/leave/requests', type='json', auth='mobile_token', csrf=False)
     def get_leave_requests(self, employee_id=None, limit=50):
         """الحصول على طلبات الإجازة للموظف"""
+        employee_id = self._get_mobile_employee_id(employee_id)
         try:
             _logger.info("====== طلب جلب طلبات الإجازة للموظف %s ======", employee_id)
 
@@ -577,10 +726,11 @@ class MobileAPI(http.Controller):
                 'error': str(e)
             }
 
-    @http.route('/api/mobile/leave/create', type='json', auth='user', csrf=False)
+    @http.route('/api/mobile/leave/create', type='json', auth='mobile_token', csrf=False)
     def create_leave_request(self, employee_id=None, holiday_status_id=None,
                              date_from=None, date_to=None, name=None):
         """إنشاء طلب إجازة جديد"""
+        employee_id = self._get_mobile_employee_id(employee_id)
         try:
             _logger.info("====== إنشاء طلب إجازة جديد ======")
             _logger.info("البيانات المستلمة: employee_id=%s, holiday_status_id=%s, date_from=%s, date_to=%s",
@@ -662,7 +812,7 @@ class MobileAPI(http.Controller):
                 'error': str(e)
             }
 
-    @http.route('/api/mobile/leave/cancel', type='json', auth='user', csrf=False)
+    @http.route('/api/mobile/leave/cancel', type='json', auth='mobile_token', csrf=False)
     def cancel_leave_request(self, request_id=None):
         """إلغاء طلب إجازة"""
         try:
@@ -676,6 +826,7 @@ class MobileAPI(http.Controller):
 
             if not leave_request.exists():
                 return {'success': False, 'error': 'طلب الإجازة غير موجود'}
+            self._check_mobile_record_access(leave_request)
 
             # التحقق من إمكانية الإلغاء
             if leave_request.state not in ['draft', 'confirm']:
@@ -700,10 +851,11 @@ class MobileAPI(http.Controller):
                 'error': str(e)
             }
 
-    @http.route('/api/mobile/leave/availability', type='json', auth='user', csrf=False)
+    @http.route('/api/mobile/leave/availability', type='json', auth='mobile_token', csrf=False)
     def check_leave_availability(self, employee_id=None, holiday_status_id=None,
                                  date_from=None, date_to=None):
         """التحقق من توفر الإجازة"""
+        employee_id = self._get_mobile_employee_id(employee_id)
         try:
             _logger.info("====== فحص توفر الإجازة ======")
 
@@ -773,9 +925,10 @@ class MobileAPI(http.Controller):
                 'message': str(e)
             }
 
-    @http.route('/api/mobile/leave/stats', type='json', auth='user', csrf=False)
+    @http.route('/api/mobile/leave/stats', type='json', auth='mobile_token', csrf=False)
     def get_leave_stats(self, employee_id=None):
         """الحصول على إحصائيات الإجازات للموظف"""
+        employee_id = self._get_mobile_employee_id(employee_id)
         try:
             _logger.info("====== طلب إحصائيات الإجازات للموظف %s ======", employee_id)
 
@@ -836,7 +989,7 @@ class MobileAPI(http.Controller):
                 'error': str(e)
             }
 
-    @http.route('/api/mobile/leave/request/<int:request_id>', type='json', auth='user', csrf=False)
+    @http.route('/api/mobile/leave/request/<int:request_id>', type='json', auth='mobile_token', csrf=False)
     def get_leave_request_details(self, request_id):
         """الحصول على تفاصيل طلب إجازة محدد"""
         try:
@@ -846,6 +999,7 @@ class MobileAPI(http.Controller):
 
             if not leave_request.exists():
                 return {'success': False, 'error': 'طلب الإجازة غير موجود'}
+            self._check_mobile_record_access(leave_request)
 
             # تحديد حالة الطلب
             state_mapping = {
@@ -893,40 +1047,67 @@ class MobileAPI(http.Controller):
                 'error': str(e)
             }
 
-    @http.route('/api/mobile/announcements/list', type='json', auth='user', methods=['POST'])
+    @http.route('/api/mobile/announcements/list', type='json', auth='mobile_token', methods=['POST'])
     def get_announcements(self, **kwargs):
-        employee_id = kwargs.get('employee_id')
+        """
+        Get announcements list for mobile app
+
+        Pass since_sequence to fetch only the announcements published (or
+        retargeted) after a previous call; latest_sequence is returned for the
+        next call. Scheduled announcements get their sequence when published.
+        """
+        employee_id = self._get_mobile_employee_id(kwargs.get('employee_id'))
         limit = kwargs.get('limit', 20)
         offset = kwargs.get('offset', 0)
+        since_sequence = kwargs.get('since_sequence')
 
         if not employee_id:
             return {'success': False, 'error': 'Employee ID is required'}
-        """Get announcements list for mobile app"""
         employee = request.env['hr.employee'].browse(employee_id)
         if not employee.exists():
             return {'success': False, 'error': 'Employee not found'}
 
-        domain = [
-            ('state', '=', 'published'),
-            '|',
-            ('employee_ids', '=', False),
-            ('employee_ids', 'in', [employee_id])
-        ]
+        Announcement = request.env['hr.announcement']
+        domain = Announcement._get_mobile_feed_domain(employee_id)
 
-        announcements = request.env['hr.announcement'].search(
-            domain,
-            limit=limit,
-            offset=offset,
-            order='is_pinned desc, create_date desc'
-        )
+        if since_sequence:
+            announcements = Announcement.search(
+                domain + [('feed_sequence', '>', int(since_sequence))],
+                limit=limit + 1,
+                order='feed_sequence asc'
+            )
+            has_more = len(announcements) > limit
+            announcements = announcements[:limit]
+        else:
+            announcements = Announcement.search(
+                domain,
+                limit=limit,
+                offset=offset,
+                order='is_pinned desc, create_date desc'
+            )
+            has_more = False
+
+        if since_sequence:
+            latest_sequence = max(announcements.mapped('feed_sequence'), default=int(since_sequence))
+        else:
+            latest_sequence = Announcement.search(domain, order='feed_sequence desc', limit=1).feed_sequence
+
+        result = self._prepare_announcements(announcements, employee_id)
+
+        return {
+            'success': True,
+            'announcements': result,
+            'latest_sequence': latest_sequence,
+            'has_more': has_more,
+            'unread_count': request.env['hr.announcement.unread'].sudo().get_unread_count(employee_id),
+        }
+
+    def _prepare_announcements(self, announcements, employee_id):
+        """Serialize an announcement page, fetching read states of the whole page in one query"""
+        read_ids = request.env['hr.announcement']._get_read_announcement_ids(employee_id, announcements.ids)
 
         result = []
         for announcement in announcements:
-            read_record = request.env['hr.announcement.read'].search([
-                ('announcement_id', '=', announcement.id),
-                ('employee_id', '=', employee_id)
-            ], limit=1)
-
             result.append({
                 'id': announcement.id,
                 'title': announcement.name,
@@ -935,19 +1116,28 @@ class MobileAPI(http.Controller):
                 'type': announcement.announcement_type,
                 'priority': announcement.priority,
                 'is_pinned': announcement.is_pinned,
-                'is_read': bool(read_record),
+                'is_read': announcement.id in read_ids,
                 'created_date': announcement.create_date.isoformat() if announcement.create_date else None,
                 'author': announcement.create_uid.name,
                 'attachments': len(announcement.attachment_ids),
                 'read_count': announcement.read_count,
                 'target_count': len(announcement.employee_ids) if announcement.employee_ids else 1,
             })
+        return result
 
-        return {'success': True, 'announcements': result}
+    @http.route('/api/mobile/announcements/unread_count', type='json', auth='mobile_token', methods=['POST'])
+    def get_unread_announcements_count(self, employee_id, **kwargs):
+        """Unread announcements badge, served from the per-employee counter"""
+        employee_id = self._get_mobile_employee_id(employee_id)
+        return {
+            'success': True,
+            'unread_count': request.env['hr.announcement.unread'].sudo().get_unread_count(employee_id),
+        }
 
-    @http.route('/api/mobile/announcements/detail', type='json', auth='user', methods=['POST'])
+    @http.route('/api/mobile/announcements/detail', type='json', auth='mobile_token', methods=['POST'])
     def get_announcement_detail(self, announcement_id, employee_id, **kwargs):
         """Get announcement details"""
+        employee_id = self._get_mobile_employee_id(employee_id)
         announcement = request.env['hr.announcement'].browse(announcement_id)
         if not announcement.exists() or announcement.state != 'published':
             return {'success': False, 'error': 'Announcement not found'}
@@ -988,28 +1178,18 @@ class MobileAPI(http.Controller):
             }
         }
 
-    @http.route('/api/mobile/announcements/mark_read', type='json', auth='user', methods=['POST'])
+    @http.route('/api/mobile/announcements/mark_read', type='json', auth='mobile_token', methods=['POST'])
     def mark_announcement_read(self, announcement_id, employee_id, **kwargs):
         """Mark announcement as read"""
+        employee_id = self._get_mobile_employee_id(employee_id)
         announcement = request.env['hr.announcement'].browse(announcement_id)
         if not announcement.exists():
             return {'success': False, 'error': 'Announcement not found'}
 
-        existing = request.env['hr.announcement.read'].search([
-            ('announcement_id', '=', announcement_id),
-            ('employee_id', '=', employee_id)
-        ])
-
-        if not existing:
-            request.env['hr.announcement.read'].create({
-                'announcement_id': announcement_id,
-                'employee_id': employee_id,
-                'read_date': fields.Datetime.now(),
-            })
-
+        announcement._mark_read_by(employee_id)
         return {'success': True}
 
-    @http.route('/api/mobile/announcements/categories', type='json', auth='user', methods=['POST'])
+    @http.route('/api/mobile/announcements/categories', type='json', auth='mobile_token', methods=['POST'])
     def get_categories(self, **kwargs):
         """Get announcement categories"""
         return {
@@ -1024,15 +1204,11 @@ class MobileAPI(http.Controller):
             ]
         }
 
-    @http.route('/api/mobile/announcements/search', type='json', auth='user', methods=['POST'])
+    @http.route('/api/mobile/announcements/search', type='json', auth='mobile_token', methods=['POST'])
     def search_announcements(self, employee_id, search_term='', category='all', limit=20, **kwargs):
         """Search announcements"""
-        domain = [
-            ('state', '=', 'published'),
-            '|',
-            ('employee_ids', '=', False),
-            ('employee_ids', 'in', [employee_id])
-        ]
+        employee_id = self._get_mobile_employee_id(employee_id)
+        domain = request.env['hr.announcement']._get_mobile_feed_domain(employee_id)
 
         if search_term:
             domain.extend([
@@ -1050,36 +1226,16 @@ class MobileAPI(http.Controller):
             order='is_pinned desc, create_date desc'
         )
 
-        result = []
-        for announcement in announcements:
-            read_record = request.env['hr.announcement.read'].search([
-                ('announcement_id', '=', announcement.id),
-                ('employee_id', '=', employee_id)
-            ], limit=1)
-
-            result.append({
-                'id': announcement.id,
-                'title': announcement.name,
-                'summary': announcement.summary or '',
-                'content': announcement.content or '',
-                'type': announcement.announcement_type,
-                'priority': announcement.priority,
-                'is_pinned': announcement.is_pinned,
-                'is_read': bool(read_record),
-                'created_date': announcement.create_date.isoformat() if announcement.create_date else None,
-                'author': announcement.create_uid.name,
-                'attachments': len(announcement.attachment_ids),
-                'read_count': announcement.read_count,
-                'target_count': len(announcement.employee_ids) if announcement.employee_ids else 1,
-            })
+        result = self._prepare_announcements(announcements, employee_id)
 
         return {'success': True, 'results': result}
 
         # ==================== واجهات كشوف المرتبات (Payslips) ====================
 
-    @http.route('/api/mobile/payslips/list', type='json', auth='user', csrf=False)
+    @http.route('/api/mobile/payslips/list', type='json', auth='mobile_token', csrf=False)
     def get_payslips(self, employee_id=None, limit=12, offset=0):
         """الحصول على قائمة كشوف مرتبات الموظف"""
+        employee_id = self._get_mobile_employee_id(employee_id)
         try:
             _logger.info("====== طلب كشوف المرتبات للموظف %s ======", employee_id)
 
@@ -1098,16 +1254,6 @@ class MobileAPI(http.Controller):
 
             payslips_data = []
             for payslip in payslips:
-                # حساب البدلات والخصومات
-                allowance_total = 0
-                deduction_total = 0
-
-                for line in payslip.line_ids:
-                    if line.salary_rule_id.category_id.code == 'ALW':
-                        allowance_total += line.total
-                    elif line.salary_rule_id.category_id.code == 'DED':
-                        deduction_total += abs(line.total)
-
                 # تحديد حالة الكشف
                 state_mapping = {
                     'draft': {'text': 'مسودة', 'icon': '📝', 'color': '#9E9E9E'},
@@ -1143,8 +1289,8 @@ class MobileAPI(http.Controller):
                     'basic_wage': payslip.basic_wage,
                     'gross_wage': payslip.gross_wage,
                     'net_wage': payslip.net_wage,
-                    'allowance_total': allowance_total,
-                    'deduction_total': deduction_total,
+                    'allowance_total': payslip.mobile_allowance_total,
+                    'deduction_total': payslip.mobile_deduction_total,
                     'payment_date': payslip.date_from.strftime('%Y-%m-%d') if payslip.date_from else None,
                     'currency': currency_name,
                 })
@@ -1168,7 +1314,7 @@ class MobileAPI(http.Controller):
                 'error': str(e)
             }
 
-    @http.route('/api/mobile/payslips/detail/<int:payslip_id>', type='json', auth='user', csrf=False)
+    @http.route('/api/mobile/payslips/detail/<int:payslip_id>', type='json', auth='mobile_token', csrf=False)
     def get_payslip_details(self, payslip_id):
         """الحصول على تفاصيل كشف مرتب محدد"""
         try:
@@ -1178,6 +1324,7 @@ class MobileAPI(http.Controller):
 
             if not payslip.exists():
                 return {'success': False, 'error': 'كشف المرتب غير موجود'}
+            self._check_mobile_record_access(payslip)
 
             # تصنيف بنود الراتب
             allowances = {}
@@ -1328,66 +1475,22 @@ class MobileAPI(http.Controller):
                 'error': str(e)
             }
 
-    @http.route('/api/mobile/payslips/summary', type='json', auth='user', csrf=False)
+    @http.route('/api/mobile/payslips/summary', type='json', auth='mobile_token', csrf=False)
     def get_payslips_summary(self, employee_id=None):
         """الحصول على ملخص كشوف المرتبات"""
+        employee_id = self._get_mobile_employee_id(employee_id)
         try:
             _logger.info("====== طلب ملخص كشوف المرتبات للموظف %s ======", employee_id)
 
             if not employee_id:
                 return {'success': False, 'error': 'معرف الموظف مطلوب'}
 
-            # جلب كشوف المرتبات المدفوعة
-            paid_payslips = request.env['hr.payslip'].sudo().search([
-                ('employee_id', '=', int(employee_id)),
-                ('state', '=', 'done')
-            ])
-
-            # حساب الإحصائيات
-            total_net = sum(payslip.net_wage for payslip in paid_payslips)
-            count = len(paid_payslips)
-            average_net = total_net / count if count > 0 else 0
-
-            # آخر دفعة
-            last_payslip = paid_payslips[0] if paid_payslips else None
-            last_payment = None
-            if last_payslip:
-                last_payment = last_payslip.date_from.isoformat()
-
-            # إحصائيات السنة الحالية
-            current_year = fields.Date.today().year
-            current_year_payslips = paid_payslips.filtered(
-                lambda p: p.date_from.year == current_year
-            )
-
-            current_year_total = sum(p.net_wage for p in current_year_payslips)
-            current_year_count = len(current_year_payslips)
-
-            # إجمالي كل الكشوف
-            all_payslips = request.env['hr.payslip'].sudo().search([
-                ('employee_id', '=', int(employee_id))
-            ])
-
-            # تصنيف حسب الحالة
-            by_state = {
-                'draft': len(all_payslips.filtered(lambda p: p.state == 'draft')),
-                'verify': len(all_payslips.filtered(lambda p: p.state == 'verify')),
-                'done': len(all_payslips.filtered(lambda p: p.state == 'done')),
-                'cancel': len(all_payslips.filtered(lambda p: p.state == 'cancel')),
-            }
+            # ملخص من استعلام مجمع واحد على الإجماليات المخزنة
+            summary = request.env['hr.payslip'].sudo().get_mobile_payslip_summary(int(employee_id))
 
             return {
                 'success': True,
-                'summary': {
-                    'total_net': total_net,
-                    'average_net': average_net,
-                    'last_payment': last_payment,
-                    'total_count': len(all_payslips),
-                    'paid_count': count,
-                    'current_year_total': current_year_total,
-                    'current_year_count': current_year_count,
-                    'by_state': by_state,
-                }
+                'summary': summary,
             }
 
         except Exception as e:
@@ -1397,7 +1500,7 @@ class MobileAPI(http.Controller):
                 'error': str(e)
             }
 
-    @http.route('/api/mobile/payslips/download/<int:payslip_id>', type='http', auth='user', csrf=False)
+    @http.route('/api/mobile/payslips/download/<int:payslip_id>', type='http', auth='mobile_token', csrf=False)
     def download_payslip_pdf(self, payslip_id):
         """تحميل كشف المرتب كملف PDF"""
         try:
@@ -1411,6 +1514,7 @@ class MobileAPI(http.Controller):
                     'success': False,
                     'error': 'كشف المرتب غير موجود'
                 })
+            self._check_mobile_record_access(payslip)
 
             # التحقق من أن الكشف مدفوع
             if payslip.state != 'done':
@@ -1419,15 +1523,23 @@ class MobileAPI(http.Controller):
                     'error': 'يمكن تحميل كشوف المرتبات المدفوعة فقط'
                 })
 
-            # توليد PDF
-            pdf = request.env.ref('hr_payroll.action_report_payslip').sudo()._render_qweb_pdf([payslip.id])[0]
+            # ملف PDF المولد مسبقاً (يتم توليده فقط إذا تغير الكشف)
+            attachment = payslip.get_mobile_pdf()
+            cache_headers = [
+                ('ETag', f'"{payslip.mobile_pdf_version}"'),
+                ('Cache-Control', 'private, no-cache'),
+            ]
+            if payslip.mobile_pdf_version in request.httprequest.headers.get('If-None-Match', ''):
+                return request.make_response(b'', headers=cache_headers, status=304)
+
+            pdf = attachment.raw
 
             # إعداد الاستجابة
             pdfhttpheaders = [
                 ('Content-Type', 'application/pdf'),
                 ('Content-Length', len(pdf)),
                 ('Content-Disposition', 'attachment; filename="payslip_%s.pdf"' % payslip.number),
-            ]
+            ] + cache_headers
 
             return request.make_response(pdf, headers=pdfhttpheaders)
 
@@ -1438,23 +1550,18 @@ class MobileAPI(http.Controller):
                 'error': str(e)
             })
 
-    @http.route('/api/mobile/payslips/years', type='json', auth='user', csrf=False)
+    @http.route('/api/mobile/payslips/years', type='json', auth='mobile_token', csrf=False)
     def get_payslip_years(self, employee_id=None):
         """الحصول على السنوات المتاحة لكشوف المرتبات"""
+        employee_id = self._get_mobile_employee_id(employee_id)
         try:
             _logger.info("====== طلب السنوات المتاحة للموظف %s ======", employee_id)
 
             if not employee_id:
                 return {'success': False, 'error': 'معرف الموظف مطلوب'}
 
-            # جلب كل كشوف المرتبات
-            payslips = request.env['hr.payslip'].sudo().search([
-                ('employee_id', '=', int(employee_id))
-            ])
-
-            # استخراج السنوات الفريدة
-            years = list(set(payslip.date_from.year for payslip in payslips if payslip.date_from))
-            years.sort(reverse=True)  # ترتيب تنازلي
+            # استخراج السنوات الفريدة من استعلام مجمع
+            years = request.env['hr.payslip'].sudo().get_mobile_payslip_years(int(employee_id))
 
             return {
                 'success': True,
@@ -1471,9 +1578,10 @@ class MobileAPI(http.Controller):
 
     # أضف هذا في ملف mobile_api.py في Odoo
 
-    @http.route('/api/mobile/leave/balance', type='json', auth='user', csrf=False)
+    @http.route('/api/mobile/leave/balance', type='json', auth='mobile_token', csrf=False)
     def get_employee_leave_balance(self, employee_id=None):
         """الحصول على رصيد الإجازات للموظف"""
+        employee_id = self._get_mobile_employee_id(employee_id)
         try:
             _logger.info("====== طلب رصيد الإجازات للموظف %s ======", employee_id)
 
@@ -1484,10 +1592,10 @@ class MobileAPI(http.Controller):
             if not employee.exists():
                 return {'success': False, 'error': 'الموظف غير موجود'}
 
-            # جلب أنواع الإجازات النشطة
-            leave_types = request.env['hr.leave.type'].sudo().search([
-                ('active', '=', True)
-            ])
+            # جلب الرصيد لجميع أنواع الإجازات من محرك الأرصدة (مخزن مؤقتاً)
+            current_year = fields.Date.today().year
+            balances = request.env['hr.leave.balance'].sudo().get_employee_balance(int(employee_id), current_year)
+            leave_types = request.env['hr.leave.type'].sudo().browse(list(balances))
 
             balance_data = {}
             total_allocated = 0
@@ -1495,46 +1603,20 @@ class MobileAPI(http.Controller):
             total_remaining = 0
 
             for leave_type in leave_types:
-                # جلب التخصيصات المعتمدة
-                allocations = request.env['hr.leave.allocation'].sudo().search([
-                    ('employee_id', '=', int(employee_id)),
-                    ('holiday_status_id', '=', leave_type.id),
-                    ('state', '=', 'validate')
-                ])
-
-                # حساب إجمالي الأيام المخصصة
-                allocated_days = sum(allocations.mapped('number_of_days'))
-
-                # إذا لم يكن هناك تخصيص وكان النوع لا يتطلب تخصيص، استخدم القيمة الافتراضية
-                if allocated_days == 0 and leave_type.requires_allocation == 'no':
-                    allocated_days = 30  # القيمة الافتراضية
-
-                # جلب الإجازات المعتمدة للسنة الحالية
-                current_year = fields.Date.today().year
-                approved_leaves = request.env['hr.leave'].sudo().search([
-                    ('employee_id', '=', int(employee_id)),
-                    ('holiday_status_id', '=', leave_type.id),
-                    ('state', '=', 'validate'),
-                    ('date_from', '>=', f'{current_year}-01-01'),
-                    ('date_to', '<=', f'{current_year}-12-31')
-                ])
-
-                used_days = sum(approved_leaves.mapped('number_of_days'))
-                remaining_days = max(0, allocated_days - used_days)
-
+                balance = balances[leave_type.id]
                 balance_data[leave_type.name] = {
                     'type_id': leave_type.id,
                     'type_name': leave_type.name,
-                    'allocated': allocated_days,
-                    'used': used_days,
-                    'remaining': remaining_days,
+                    'allocated': balance['allocated'],
+                    'used': balance['used'],
+                    'remaining': balance['remaining'],
                     'color': getattr(leave_type, 'color_name', '#2196F3') or '#2196F3',
                     'requires_allocation': leave_type.requires_allocation == 'yes',
                 }
 
-                total_allocated += allocated_days
-                total_used += used_days
-                total_remaining += remaining_days
+                total_allocated += balance['allocated']
+                total_used += balance['used']
+                total_remaining += balance['remaining']
 
             # حساب النسبة المئوية للاستخدام
             usage_percentage = (total_used / total_allocated * 100) if total_allocated > 0 else 0
@@ -1568,9 +1650,41 @@ class MobileAPI(http.Controller):
                 'error': str(e)
             }
 
-    @http.route('/api/mobile/leave/balance/summary', type='json', auth='user', csrf=False)
+    @http.route('/api/mobile/leave/balance/all', type='json', auth='mobile_token', csrf=False)
+    def get_all_leave_balances(self, year=None, department_id=None):
+        """أرصدة الإجازات لجميع الموظفين (لمسؤولي الموارد البشرية)"""
+        try:
+            # مع رمز الدخول: صلاحيات مستخدم الموظف نفسه وليس المستخدم المشترك الذي ينفذ الطلب
+            user = self._get_mobile_user()
+            if not user or not user.has_group('hr.group_hr_user'):
+                return {'success': False, 'error': 'غير مصرح لك بعرض أرصدة جميع الموظفين'}
+
+            domain = [('department_id', '=', int(department_id))] if department_id else []
+            employees = request.env['hr.employee'].sudo().search_read(domain, ['name'])
+            year = int(year) if year else fields.Date.today().year
+
+            balances = request.env['hr.leave.balance'].sudo().compute_balances(
+                [employee['id'] for employee in employees], year
+            )
+
+            return {
+                'success': True,
+                'year': year,
+                'employees': [{
+                    'employee_id': employee['id'],
+                    'employee_name': employee['name'],
+                    'balances': balances[employee['id']],
+                } for employee in employees],
+            }
+
+        except Exception as e:
+            _logger.error("خطأ في جلب أرصدة جميع الموظفين: %s", str(e))
+            return {'success': False, 'error': str(e)}
+
+    @http.route('/api/mobile/leave/balance/summary', type='json', auth='mobile_token', csrf=False)
     def get_leave_balance_summary(self, employee_id=None):
         """ملخص سريع لرصيد الإجازات"""
+        employee_id = self._get_mobile_employee_id(employee_id)
         try:
             if not employee_id:
                 return {'success': False, 'error': 'معرف الموظف مطلوب'}
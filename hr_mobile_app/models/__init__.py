@@ -1,3 +1,4 @@
+from . import hr_mobile_cache_version
 from . import hr_employee
 from . import res_config_settings
 from . import hr_mobile_app_settings
@@ -5,4 +6,10 @@ from . import hr_attendance
 from . import hr_leave_mobile
 from . import hr_announcement
 from . import hr_office_location
-from . import hr_payslip_mobile
\ No newline at end of file
+from . import hr_payslip_mobile
+from . import hr_attendance_event
+from . import hr_mobile_home
+from . import hr_leave_balance
+from . import hr_mobile_token
+from . import hr_mobile_login_throttle
+from . import ir_http
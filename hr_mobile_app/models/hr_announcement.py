@@ -6,6 +6,11 @@ import logging
 
 _logger = logging.getLogger(__name__)
 
+# Fields that change which announcements appear in the mobile feed
+FEED_FIELDS = {'state', 'employee_ids'}
+# hr.mobile.cache.version key of the mobile feed (unread counters)
+ANNOUNCEMENT_FEED_VERSION = 'announcement.feed'
+
 
 class HrAnnouncement(models.Model):
     _name = 'hr.announcement'
@@ -155,6 +160,24 @@ class HrAnnouncement(models.Model):
         store=True
     )
 
+    # Position in the mobile feed, assigned when the announcement is published or retargeted
+    feed_sequence = fields.Integer(
+        string='Feed Sequence',
+        readonly=True,
+        copy=False,
+        index=True
+    )
+
+    def init(self):
+        self.env.cr.execute("CREATE SEQUENCE IF NOT EXISTS hr_announcement_feed_seq")
+        self.env.cr.execute("""
+            UPDATE hr_announcement
+               SET feed_sequence = nextval('hr_announcement_feed_seq')
+             WHERE id IN (SELECT id FROM hr_announcement
+                           WHERE state = 'published' AND feed_sequence IS NULL
+                           ORDER BY id)
+        """)
+
     @api.depends('read_employee_ids')
     def _compute_read_count(self):
         for record in self:
@@ -234,6 +257,23 @@ class HrAnnouncement(models.Model):
         if employee and employee not in self.read_employee_ids:
             self.read_employee_ids = [(4, employee.id)]
             _logger.info(f"Employee {employee.name} has read announcement {self.name}")
+        if employee:
+            self._mark_read_by(employee.id)
+
+    def _mark_read_by(self, employee_id):
+        """Log the read of the employee once and decrement the cached unread counter"""
+        self.ensure_one()
+        Read = self.env['hr.announcement.read'].sudo()
+        if Read.search_count([('announcement_id', '=', self.id), ('employee_id', '=', employee_id)], limit=1):
+            return False
+        Read.create({
+            'announcement_id': self.id,
+            'employee_id': employee_id,
+            'read_date': fields.Datetime.now(),
+        })
+        if self._is_in_mobile_feed(employee_id):
+            self.env['hr.announcement.unread'].sudo()._decrement(employee_id)
+        return True
 
     def _send_notification_to_employees(self):
         """Send notification to targeted employees"""
@@ -257,6 +297,71 @@ class HrAnnouncement(models.Model):
         else:  # general or urgent
             return self.env['hr.employee'].search([])
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records.filtered(lambda r: r.state == 'published')._assign_feed_sequence()
+        self._bump_feed_version()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if FEED_FIELDS.intersection(vals):
+            # Newly published (also by the scheduler) or retargeted announcements move to the top of the feed
+            self.filtered(lambda r: r.state == 'published')._assign_feed_sequence()
+            self._bump_feed_version()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self._bump_feed_version()
+        return res
+
+    def _assign_feed_sequence(self):
+        if not self:
+            return
+        self.env.cr.execute("""
+            UPDATE hr_announcement
+               SET feed_sequence = nextval('hr_announcement_feed_seq')
+             WHERE id IN %s
+        """, [tuple(self.ids)])
+        self.invalidate_recordset(['feed_sequence'])
+
+    @api.model
+    def _bump_feed_version(self):
+        """Invalidate every cached unread count (see hr.announcement.unread)"""
+        self.env['hr.mobile.cache.version']._bump([ANNOUNCEMENT_FEED_VERSION])
+
+    @api.model
+    def _get_feed_version(self):
+        return self.env['hr.mobile.cache.version']._get_versions(ANNOUNCEMENT_FEED_VERSION)[0]
+
+    def _is_in_mobile_feed(self, employee_id):
+        """Whether this announcement is part of the employee's mobile feed"""
+        self.ensure_one()
+        return self.state == 'published' and (not self.employee_ids or employee_id in self.employee_ids.ids)
+
+    @api.model
+    def _get_mobile_feed_domain(self, employee_id):
+        """Domain of the published announcements visible to an employee in the mobile app"""
+        return [
+            ('state', '=', 'published'),
+            '|',
+            ('employee_ids', '=', False),
+            ('employee_ids', 'in', [employee_id])
+        ]
+
+    @api.model
+    def _get_read_announcement_ids(self, employee_id, announcement_ids):
+        """Ids of the given announcements already read by the employee, in one query"""
+        if not announcement_ids:
+            return set()
+        reads = self.env['hr.announcement.read'].search_read([
+            ('announcement_id', 'in', list(announcement_ids)),
+            ('employee_id', '=', employee_id)
+        ], ['announcement_id'])
+        return {read['announcement_id'][0] for read in reads}
+
     @api.model
     def check_scheduled_announcements(self):
         """Cron job to check scheduled announcements"""
@@ -315,4 +420,80 @@ class HrAnnouncementRead(models.Model):
     _sql_constraints = [
         ('unique_read', 'UNIQUE(announcement_id, employee_id)',
          'The employee has already read this announcement!')
-    ]
\ No newline at end of file
+    ]
+
+
+class HrAnnouncementUnread(models.Model):
+    """
+    Cached number of unread announcements per employee, for badge polling.
+
+    A counter is valid while its feed_version matches the global feed
+    version, which is bumped whenever announcements are created, deleted,
+    published or retargeted. Reading an announcement decrements it.
+    """
+    _name = 'hr.announcement.unread'
+    _description = 'Announcement Unread Counter'
+    _rec_name = 'employee_id'
+
+    employee_id = fields.Many2one(
+        'hr.employee',
+        string='Employee',
+        required=True,
+        ondelete='cascade'
+    )
+
+    unread_count = fields.Integer(string='Unread Count', default=0)
+
+    feed_version = fields.Integer(string='Feed Version', default=0)
+
+    _sql_constraints = [
+        ('unique_employee', 'UNIQUE(employee_id)',
+         'Only one unread counter per employee is allowed!')
+    ]
+
+    @api.model
+    def get_unread_count(self, employee_id):
+        """Unread announcements of an employee, recomputed only when the feed changed"""
+        feed_version = self.env['hr.announcement']._get_feed_version()
+        self.env.cr.execute(
+            "SELECT unread_count FROM hr_announcement_unread WHERE employee_id = %s AND feed_version = %s",
+            [employee_id, feed_version]
+        )
+        row = self.env.cr.fetchone()
+        if row:
+            return row[0]
+
+        domain = self.env['hr.announcement']._get_mobile_feed_domain(employee_id)
+        total = self.env['hr.announcement'].search_count(domain)
+        read_total = self.env['hr.announcement.read'].search_count([
+            ('employee_id', '=', employee_id),
+            ('announcement_id', 'any', domain),
+        ])
+        unread_count = max(total - read_total, 0)
+
+        self.env.cr.execute("""
+            INSERT INTO hr_announcement_unread (employee_id, unread_count, feed_version,
+                                                create_uid, create_date, write_uid, write_date)
+            VALUES (%(employee_id)s, %(unread_count)s, %(feed_version)s,
+                    %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC')
+            ON CONFLICT (employee_id) DO UPDATE
+               SET unread_count = EXCLUDED.unread_count,
+                   feed_version = EXCLUDED.feed_version,
+                   write_uid = EXCLUDED.write_uid,
+                   write_date = EXCLUDED.write_date
+        """, {
+            'employee_id': employee_id,
+            'unread_count': unread_count,
+            'feed_version': feed_version,
+            'uid': self.env.uid,
+        })
+        return unread_count
+
+    @api.model
+    def _decrement(self, employee_id):
+        """Called when the employee reads an announcement of the current feed"""
+        self.env.cr.execute("""
+            UPDATE hr_announcement_unread
+               SET unread_count = GREATEST(unread_count - 1, 0)
+             WHERE employee_id = %s AND feed_version = %s
+        """, [employee_id, self.env['hr.announcement']._get_feed_version()])
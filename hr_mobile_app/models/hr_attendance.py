@@ -3,9 +3,9 @@ from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
 from datetime import datetime, timedelta
 import logging
-import math
 import pytz
 import re
+from .hr_geofence import haversine_distance, haversine_distances
 
 
 _logger = logging.getLogger(__name__)
@@ -68,112 +68,113 @@ class HrAttendance(models.Model):
         حساب المسافة بين نقطتين جغرافيتين باستخدام Haversine formula
         المسافة المرجعة بالأمتار
         """
-        # نصف قطر الأرض بالكيلومتر
-        R = 6371.0
-
-        # تحويل من درجات إلى راديان
-        lat1_rad = math.radians(lat1)
-        lon1_rad = math.radians(lon1)
-        lat2_rad = math.radians(lat2)
-        lon2_rad = math.radians(lon2)
-
-        # الفرق بين الإحداثيات
-        dlat = lat2_rad - lat1_rad
-        dlon = lon2_rad - lon1_rad
-
-        # حساب Haversine
-        a = math.sin(dlat / 2) ** 2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2) ** 2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-        # المسافة بالكيلومتر
-        distance_km = R * c
-
-        # تحويل إلى أمتار
-        distance_m = distance_km * 1000
-
-        return distance_m
+        return haversine_distance(lat1, lon1, lat2, lon2)
 
     @api.model
-    def _verify_location(self, employee_id, latitude, longitude):
+    def _get_location_target(self, employee_id):
         """
-        التحقق من أن الموقع ضمن النطاق المسموح للموظف
-        إرجاع tuple: (is_valid, distance, office_location)
+        تحديد النطاق الجغرافي المطلوب للموظف من البيانات المخزنة مؤقتاً
+        إرجاع dict يحتوي على 'kind' و 'info' و إحداثيات المركز ونصف القطر
         """
-        employee = self.env['hr.employee'].browse(employee_id)
-        if not employee.exists():
-            return False, 0, {}
+        geofence = self.env['hr.employee']._get_mobile_geofence(employee_id)
+        if geofence is None:
+            return {'kind': 'missing', 'info': {}}
 
         # التحقق من السماح بالعمل عن بُعد
-        if employee.allow_remote_attendance:
-            return True, 0, {
-                'latitude': latitude,
-                'longitude': longitude,
-                'radius': 0,
-                'remote_allowed': True
-            }
+        if geofence['remote_allowed']:
+            return {'kind': 'remote', 'info': {'radius': 0, 'remote_allowed': True}}
 
-        # التحقق من المواقع المؤقتة
+        # التحقق من المواقع المؤقتة (استخدام أول موقع مؤقت صالح)
         today = fields.Date.today()
-        temp_location = employee.temporary_location_ids.filtered(
-            lambda l: l.date_from <= today <= l.date_to
-        )
-
-        if temp_location:
-            # استخدام أول موقع مؤقت صالح
-            temp_loc = temp_location[0]
-            distance = self._calculate_distance(
-                latitude, longitude,
-                temp_loc.latitude, temp_loc.longitude
-            )
-            is_valid = distance <= temp_loc.allowed_radius
-
-            return is_valid, distance, {
-                'latitude': temp_loc.latitude,
-                'longitude': temp_loc.longitude,
-                'radius': temp_loc.allowed_radius,
-                'temporary': True,
-                'reason': temp_loc.reason
-            }
-
-        # استخدام موقع المكتب المخصص للموظف
-        office_location = employee.office_location_id
-
-        # إذا لم يكن للموظف موقع مخصص، استخدم موقع القسم
-        if not office_location and employee.department_id:
-            office_location = employee.department_id.office_location_id
+        for temp_loc in geofence['temporary']:
+            if temp_loc['date_from'] <= today <= temp_loc['date_to']:
+                return {
+                    'kind': 'fence',
+                    'latitude': temp_loc['latitude'],
+                    'longitude': temp_loc['longitude'],
+                    'radius': temp_loc['allowed_radius'],
+                    'info': {
+                        'latitude': temp_loc['latitude'],
+                        'longitude': temp_loc['longitude'],
+                        'radius': temp_loc['allowed_radius'],
+                        'temporary': True,
+                        'reason': temp_loc['reason']
+                    }
+                }
 
-        # إذا لم يكن هناك موقع محدد، استخدم موقع افتراضي
+        # موقع المكتب المخصص للموظف أو موقع القسم
+        office_location = self.env['hr.office.location']._get_office_fences().get(geofence['office_location_id'])
         if not office_location:
-            # موقع افتراضي مؤقت - يجب تحديد موقع للموظف
-            return False, 0, {
-                'error': 'لم يتم تحديد موقع مكتب للموظف'
-            }
+            return {'kind': 'no_office', 'info': {'error': 'لم يتم تحديد موقع مكتب للموظف'}}
 
-        # حساب المسافة
-        distance = self._calculate_distance(
-            latitude, longitude,
-            office_location.latitude, office_location.longitude
-        )
-
-        # التحقق من النطاق
         # استخدام النطاق المرن إذا كان مفعلاً وفي أوقات معينة
-        allowed_radius = office_location.allowed_radius
-        if office_location.allow_flexible_radius:
-            # يمكن إضافة شروط إضافية هنا (مثل أوقات الذروة)
+        allowed_radius = office_location['allowed_radius']
+        if office_location['allow_flexible_radius']:
             current_hour = fields.Datetime.now().hour
             if 7 <= current_hour <= 10 or 16 <= current_hour <= 19:
-                allowed_radius = office_location.flexible_radius
-
-        is_valid = distance <= allowed_radius
+                allowed_radius = office_location['flexible_radius']
 
-        return is_valid, distance, {
-            'latitude': office_location.latitude,
-            'longitude': office_location.longitude,
+        return {
+            'kind': 'fence',
+            'latitude': office_location['latitude'],
+            'longitude': office_location['longitude'],
             'radius': allowed_radius,
-            'location_name': office_location.name,
-            'location_id': office_location.id
+            'info': {
+                'latitude': office_location['latitude'],
+                'longitude': office_location['longitude'],
+                'radius': allowed_radius,
+                'location_name': office_location['name'],
+                'location_id': office_location['id']
+            }
         }
 
+    @api.model
+    def _location_result(self, target, latitude, longitude, distance=0):
+        """بناء نتيجة التحقق (is_valid, distance, office_location) من النطاق المحدد"""
+        if target['kind'] == 'remote':
+            return True, 0, dict(target['info'], latitude=latitude, longitude=longitude)
+        if target['kind'] != 'fence':
+            return False, 0, target['info']
+        return distance <= target['radius'], distance, target['info']
+
+    @api.model
+    def _verify_location(self, employee_id, latitude, longitude):
+        """
+        التحقق من أن الموقع ضمن النطاق المسموح للموظف
+        إرجاع tuple: (is_valid, distance, office_location)
+        """
+        target = self._get_location_target(employee_id)
+        distance = 0
+        if target['kind'] == 'fence':
+            distance = haversine_distance(latitude, longitude, target['latitude'], target['longitude'])
+        return self._location_result(target, latitude, longitude, distance)
+
+    @api.model
+    def verify_locations_bulk(self, checks):
+        """
+        التحقق من مواقع عدة موظفين دفعة واحدة
+        checks: قائمة من (employee_id, latitude, longitude)
+        إرجاع قائمة من (is_valid, distance, office_location) بنفس الترتيب
+        """
+        targets = [self._get_location_target(employee_id) for employee_id, __, __ in checks]
+        fenced = [index for index, target in enumerate(targets) if target['kind'] == 'fence']
+
+        distances = dict.fromkeys(range(len(checks)), 0)
+        if fenced:
+            # حساب جميع المسافات في عملية واحدة
+            computed = haversine_distances(
+                [checks[index][1] for index in fenced],
+                [checks[index][2] for index in fenced],
+                [targets[index]['latitude'] for index in fenced],
+                [targets[index]['longitude'] for index in fenced],
+            )
+            distances.update(zip(fenced, computed))
+
+        return [
+            self._location_result(target, latitude, longitude, distances[index])
+            for index, (target, (__, latitude, longitude)) in enumerate(zip(targets, checks))
+        ]
+
     @api.model
     def get_employee_attendance_status(self, employee_id):
         """الحصول على حالة الحضور الحالية للموظف"""
@@ -448,8 +449,10 @@ class HrAttendance(models.Model):
         # إذا كانت بتنسيق ISO
         if 'T' in datetime_str:
             try:
-                # تحويل من تنسيق ISO إلى تنسيق Odoo
+                # تحويل من تنسيق ISO إلى تنسيق Odoo (UTC إذا كان الوقت يحمل فرق توقيت)
                 dt = datetime.fromisoformat(datetime_str.replace('Z', '+00:00'))
+                if dt.tzinfo:
+                    dt = dt.astimezone(pytz.utc)
                 return dt.strftime('%Y-%m-%d %H:%M:%S')
             except ValueError:
                 pass
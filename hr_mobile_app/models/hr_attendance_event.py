@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api
+from datetime import timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# أقصى فرق مسموح بين وقت الجهاز ووقت الخادم للأحداث المستقبلية
+MAX_CLIENT_CLOCK_SKEW = timedelta(minutes=5)
+# أقصى عمر لحدث مسجل بدون اتصال، الأحداث الأقدم ترفض ويسجلها مسؤول الموارد البشرية يدوياً
+MAX_OFFLINE_EVENT_AGE = timedelta(hours=24)
+
+
+class _EventRejected(Exception):
+    """حدث لا يمكن تطبيقه على سجلات الحضور الحالية"""
+
+
+class HrAttendanceEvent(models.Model):
+    """
+    قائمة انتظار أحداث الحضور والانصراف من التطبيق المحمول (إضافة فقط).
+    يتم قبول الحدث فوراً ثم يقوم cron بتحويله إلى سجل hr.attendance
+    بترتيب وقت الجهاز لكل موظف.
+    """
+    _name = 'hr.attendance.event'
+    _description = 'Mobile Attendance Event Queue'
+    _order = 'client_timestamp desc, id desc'
+    _rec_name = 'client_event_id'
+
+    employee_id = fields.Many2one('hr.employee', string='Employee', required=True, index=True, ondelete='cascade')
+    event_type = fields.Selection([
+        ('check_in', 'Check In'),
+        ('check_out', 'Check Out'),
+    ], string='Event Type', required=True)
+    client_event_id = fields.Char(
+        string='Client Event ID',
+        required=True,
+        help="Unique identifier generated by the app, used to ignore replayed events"
+    )
+    client_timestamp = fields.Datetime(string='Client Time', required=True)
+    received_at = fields.Datetime(string='Received At', required=True, default=fields.Datetime.now)
+    latitude = fields.Float(string='Latitude', digits=(10, 6))
+    longitude = fields.Float(string='Longitude', digits=(10, 6))
+    distance = fields.Float(string='Distance (m)')
+    location_verified = fields.Boolean(string='Location Verified')
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('rejected', 'Rejected'),
+    ], string='State', default='pending', required=True, index=True)
+    result_message = fields.Char(string='Result')
+    attendance_id = fields.Many2one('hr.attendance', string='Attendance', ondelete='set null')
+
+    _sql_constraints = [
+        ('client_event_uniq', 'unique(employee_id, client_event_id)',
+         'This attendance event was already received.'),
+    ]
+
+    @api.model
+    def enqueue_mobile_event(self, employee_id, event_type, client_event_id, client_timestamp=None,
+                             latitude=None, longitude=None):
+        """
+        قبول حدث حضور/انصراف من التطبيق وإضافته إلى قائمة الانتظار
+        يتم تجاهل الأحداث المكررة (نفس client_event_id) بدون خطأ
+        """
+        if event_type not in ('check_in', 'check_out'):
+            return {'success': False, 'error': 'نوع الحدث غير صالح'}
+        if not client_event_id:
+            return {'success': False, 'error': 'معرف الحدث مطلوب'}
+        if self.env['hr.employee']._get_mobile_geofence(employee_id) is None:
+            return {'success': False, 'error': 'الموظف غير موجود'}
+
+        now = fields.Datetime.now()
+        timestamp = fields.Datetime.to_datetime(
+            self.env['hr.attendance'].clean_datetime_str(client_timestamp)
+        ) if client_timestamp else now
+        # لا نقبل أوقاتاً مستقبلية بسبب اختلاف ساعة الجهاز
+        if timestamp > now + MAX_CLIENT_CLOCK_SKEW:
+            timestamp = now
+        # ولا أوقاتاً قديمة خارج مدة العمل بدون اتصال (منع تسجيل حضور بتاريخ سابق)
+        if timestamp < now - MAX_OFFLINE_EVENT_AGE:
+            _logger.warning("Rejected attendance event %s of employee %s: client time %s is too old",
+                            client_event_id, employee_id, timestamp)
+            return {'success': False, 'error': 'وقت الحدث أقدم من المدة المسموحة، يرجى مراجعة الموارد البشرية'}
+
+        # التحقق من الموقع من البيانات المخزنة مؤقتاً (بدون كتابة في قاعدة البيانات)
+        location_verified = False
+        distance = 0
+        if latitude is not None and longitude is not None:
+            is_valid, distance, office_location = self.env['hr.attendance']._verify_location(
+                employee_id, latitude, longitude
+            )
+            if not is_valid:
+                return {
+                    'success': False,
+                    'error': f'موقعك الحالي بعيد عن مكان العمل. المسافة: {distance:.0f} متر',
+                    'distance': distance,
+                    'allowed_radius': office_location.get('radius'),
+                    'office_location': office_location
+                }
+            location_verified = True
+
+        # إدراج مباشر مع تجاهل التكرار لتفادي تعارض الأقفال وقت الذروة
+        self.env.cr.execute("""
+            INSERT INTO hr_attendance_event (
+                employee_id, event_type, client_event_id, client_timestamp, received_at,
+                latitude, longitude, distance, location_verified, state,
+                create_uid, create_date, write_uid, write_date
+            )
+            VALUES (%(employee_id)s, %(event_type)s, %(client_event_id)s, %(client_timestamp)s, %(now)s,
+                    %(latitude)s, %(longitude)s, %(distance)s, %(location_verified)s, 'pending',
+                    %(uid)s, %(now)s, %(uid)s, %(now)s)
+            ON CONFLICT (employee_id, client_event_id) DO NOTHING
+            RETURNING id
+        """, {
+            'employee_id': employee_id,
+            'event_type': event_type,
+            'client_event_id': str(client_event_id),
+            'client_timestamp': timestamp,
+            'now': now,
+            'latitude': latitude,
+            'longitude': longitude,
+            'distance': distance,
+            'location_verified': location_verified,
+            'uid': self.env.uid,
+        })
+        row = self.env.cr.fetchone()
+
+        self.env.ref('hr_mobile_app.ir_cron_process_attendance_events')._trigger()
+
+        return {
+            'success': True,
+            'queued': True,
+            'duplicate': not row,
+            'client_event_id': client_event_id,
+            'location_verified': location_verified,
+            'distance': distance,
+        }
+
+    @api.model
+    def get_events_status(self, employee_id, client_event_ids):
+        """الحصول على حالة معالجة أحداث الموظف"""
+        events = self.search([
+            ('employee_id', '=', employee_id),
+            ('client_event_id', 'in', list(client_event_ids)),
+        ])
+        return [{
+            'client_event_id': event.client_event_id,
+            'event_type': event.event_type,
+            'state': event.state,
+            'message': event.result_message or '',
+            'attendance_id': event.attendance_id.id or None,
+        } for event in events]
+
+    @api.model
+    def _cron_process_events(self, batch_size=1000):
+        """
+        تحويل الأحداث المعلقة إلى سجلات حضور بترتيب وقت الجهاز لكل موظف
+        يتم قفل الأحداث بـ SKIP LOCKED حتى لا تتم معالجتها مرتين
+        """
+        self.env.cr.execute("""
+            SELECT id FROM hr_attendance_event
+             WHERE state = 'pending'
+             ORDER BY employee_id, client_timestamp, id
+             LIMIT %s
+             FOR UPDATE SKIP LOCKED
+        """, [batch_size])
+        events = self.browse([row[0] for row in self.env.cr.fetchall()])
+        if not events:
+            return
+
+        Attendance = self.env['hr.attendance'].sudo()
+        open_attendances = {
+            attendance.employee_id.id: attendance
+            for attendance in Attendance.search([
+                ('employee_id', 'in', events.employee_id.ids),
+                ('check_out', '=', False),
+            ])
+        }
+
+        for event in events:
+            try:
+                with self.env.cr.savepoint():
+                    open_attendance = open_attendances.get(event.employee_id.id)
+                    if event.event_type == 'check_in':
+                        attendance = event._materialize_check_in(open_attendance)
+                        open_attendances[event.employee_id.id] = attendance
+                    else:
+                        attendance = event._materialize_check_out(open_attendance)
+                        open_attendances.pop(event.employee_id.id, None)
+                    event.write({'state': 'done', 'attendance_id': attendance.id, 'result_message': False})
+            except _EventRejected as e:
+                event.write({'state': 'rejected', 'result_message': str(e)})
+            except Exception as e:
+                _logger.error(f"خطأ أثناء معالجة حدث الحضور {event.id}: {str(e)}")
+                event.write({'state': 'rejected', 'result_message': str(e)})
+
+        if len(events) == batch_size:
+            self.env.ref('hr_mobile_app.ir_cron_process_attendance_events')._trigger()
+
+    def _materialize_check_in(self, open_attendance):
+        self.ensure_one()
+        if open_attendance:
+            raise _EventRejected('يوجد بالفعل سجل حضور مفتوح لهذا الموظف')
+
+        vals = {
+            'employee_id': self.employee_id.id,
+            'check_in': self.client_timestamp,
+            'mobile_created': True,
+        }
+        if self.latitude or self.longitude:
+            vals.update({
+                'check_in_latitude': self.latitude,
+                'check_in_longitude': self.longitude,
+                'location_verified': self.location_verified,
+                'check_in_distance': self.distance,
+            })
+        return self.env['hr.attendance'].sudo().create(vals)
+
+    def _materialize_check_out(self, open_attendance):
+        self.ensure_one()
+        if not open_attendance:
+            raise _EventRejected('لا يوجد سجل حضور مفتوح للموظف')
+        if self.client_timestamp < open_attendance.check_in:
+            raise _EventRejected('وقت الانصراف قبل وقت الحضور')
+
+        vals = {'check_out': self.client_timestamp}
+        if self.latitude or self.longitude:
+            vals.update({
+                'check_out_latitude': self.latitude,
+                'check_out_longitude': self.longitude,
+                'check_out_distance': self.distance,
+            })
+            if open_attendance.location_verified:
+                vals['location_verified'] = self.location_verified
+        open_attendance.write(vals)
+        return open_attendance
+
+    @api.autovacuum
+    def _gc_processed_events(self):
+        """حذف الأحداث المعالجة الأقدم من 30 يوماً"""
+        limit_date = fields.Datetime.subtract(fields.Datetime.now(), days=30)
+        self.search([('state', '!=', 'pending'), ('received_at', '<', limit_date)]).unlink()
@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import ValidationError
+from .hr_mobile_login import PinVerifierBusy, pin_hasher
+from concurrent.futures import TimeoutError as FutureTimeoutError
 import hashlib
+import hmac
 import secrets
 import base64
 import re
@@ -9,6 +12,21 @@ import logging
 
 _logger = logging.getLogger(__name__)
 
+# Image variants served to the mobile app, already generated by image.mixin
+MOBILE_IMAGE_SIZES = {
+    '128': 'image_128',
+    '256': 'image_256',
+    '512': 'image_512',
+    '1024': 'image_1024',
+    '1920': 'image_1920',
+}
+# Served instead of the image of employees without one
+MOBILE_IMAGE_PLACEHOLDER = 'base/static/img/avatar_grey.png'
+MOBILE_IMAGE_PLACEHOLDER_KEY = 'placeholder'
+# Inline base64 avatar_128/image_1920 in login responses, read by the current app.
+# Set to 0 once every client loads the images from avatar_urls.
+MOBILE_INLINE_IMAGES_PARAM = 'hr_mobile_app.inline_login_images'
+
 
 class HrEmployee(models.Model):
     _inherit = 'hr.employee'
@@ -111,7 +129,11 @@ class HrEmployee(models.Model):
             vals['mobile_salt'] = salt
             vals['mobile_pin_hash'] = self._hash_pin(original_pin, salt)
 
-        return super(HrEmployee, self).write(vals)
+        res = super(HrEmployee, self).write(vals)
+        # إلغاء رموز الدخول الحالية عند تغيير PIN أو إيقاف الوصول
+        if vals.get('mobile_pin_hash') or vals.get('allow_mobile_access') is False:
+            self.env['hr.mobile.token'].revoke_employee_tokens(self)
+        return res
 
     def _hash_pin(self, pin, salt):
         """Encrypt PIN using PBKDF2 with SHA-256"""
@@ -125,36 +147,63 @@ class HrEmployee(models.Model):
         return base64.b64encode(dk).decode()
 
     def verify_pin(self, pin):
-        """Verify the entered PIN"""
-        self.ensure_one()
+        """
+        Verify the entered PIN.
 
-        # Log for debugging
-        _logger.info("Verifying PIN for employee: %s (ID: %s)", self.name, self.id)
-        _logger.info("Mobile access allowed: %s", self.allow_mobile_access)
-        _logger.info("PIN hash exists: %s", bool(self.mobile_pin_hash))
-        _logger.info("Salt exists: %s", bool(self.mobile_salt))
+        The hash runs in the bounded PIN worker pool and the login statistics
+        are queued for the cron (hr.mobile.login.stat). Raises PinVerifierBusy
+        when the pool is full.
+        """
+        self.ensure_one()
 
         if not self.mobile_pin_hash or not self.mobile_salt:
             _logger.warning("Missing PIN hash or salt for employee: %s", self.name)
             return False
 
         # Compute hash to compare with stored value
-        hashed_pin = self._hash_pin(pin, self.mobile_salt)
-
-        # Compare calculated and stored value
-        result = (self.mobile_pin_hash == hashed_pin)
-
-        _logger.info("PIN verification result: %s", result)
+        hashed_pin = pin_hasher.run(self._hash_pin, str(pin), self.mobile_salt)
+        result = hmac.compare_digest(self.mobile_pin_hash, hashed_pin)
 
         # Log successful login
         if result:
-            self.write({
-                'mobile_last_login': fields.Datetime.now(),
-                'mobile_login_count': self.mobile_login_count + 1,
-            })
+            self.env['hr.mobile.login.stat'].sudo()._record(self)
 
         return result
 
+    @api.model
+    def authenticate_mobile(self, username, pin, ip_address=None):
+        """
+        Mobile login pipeline: throttle per username and IP and per IP
+        (hr.mobile.login.throttle), find the employee by exact username and
+        verify the PIN.
+
+        :return: {'success': True, 'employee': hr.employee}
+                 or {'success': False, 'error': ..., 'retry_after': seconds or None}
+        """
+        retry_after = self.env['hr.mobile.login.throttle']._consume(username, ip_address)
+        if retry_after:
+            _logger.warning("Mobile login throttled for user %s from %s", username, ip_address)
+            return {'success': False, 'error': 'Too many login attempts', 'retry_after': int(retry_after) + 1}
+
+        employee = self.sudo().search([
+            ('mobile_username', '=', username),
+            ('allow_mobile_access', '=', True),
+        ], limit=1)
+        if not employee:
+            _logger.warning("No employee found with username: %s", username)
+            return {'success': False, 'error': 'Employee not found or access denied', 'retry_after': None}
+
+        try:
+            verified = employee.verify_pin(pin)
+        except (PinVerifierBusy, FutureTimeoutError):
+            _logger.warning("PIN verification pool is full or timed out, refusing login of %s", username)
+            return {'success': False, 'error': 'Server busy, please retry', 'retry_after': 1}
+
+        if not verified:
+            _logger.warning("PIN verification failed for employee: %s", employee.name)
+            return {'success': False, 'error': 'Invalid PIN', 'retry_after': None}
+        return {'success': True, 'employee': employee}
+
     def reset_mobile_pin(self):
         """Reset PIN from the field value"""
         # Check if PIN is entered in the field
@@ -187,6 +236,7 @@ class HrEmployee(models.Model):
         # Update memory values
         self.mobile_salt = salt
         self.mobile_pin_hash = pin_hash
+        self.env['hr.mobile.token'].revoke_employee_tokens(self)
 
         return {
             'type': 'ir.actions.client',
@@ -274,6 +324,60 @@ class HrEmployee(models.Model):
             }
         }
 
+    def _get_mobile_image_checksums(self):
+        """
+        Content hashes of the stored image variants of the employee.
+
+        :return: {size: checksum} for the sizes that have an image
+        """
+        self.ensure_one()
+        attachments = self.env['ir.attachment'].sudo().search_read([
+            ('res_model', '=', self._name),
+            ('res_id', '=', self.id),
+            ('res_field', 'in', list(MOBILE_IMAGE_SIZES.values())),
+        ], ['res_field', 'checksum'])
+        checksum_by_field = {attachment['res_field']: attachment['checksum'] for attachment in attachments}
+        return {
+            size: checksum_by_field[field_name]
+            for size, field_name in MOBILE_IMAGE_SIZES.items()
+            if checksum_by_field.get(field_name)
+        }
+
+    @api.model
+    @tools.ormcache()
+    def _get_mobile_image_placeholder(self):
+        """PNG content of the placeholder image"""
+        with tools.file_open(MOBILE_IMAGE_PLACEHOLDER, 'rb') as placeholder:
+            return placeholder.read()
+
+    def get_mobile_avatar_data(self):
+        """
+        Avatar references for the mobile app: the content hash and one
+        content-addressed URL per size. The URLs change only when the image
+        changes; employees without an image get the placeholder URLs.
+        The inline avatar_128/image_1920 of the current app are included
+        unless MOBILE_INLINE_IMAGES_PARAM is disabled.
+        """
+        self.ensure_one()
+        checksums = self._get_mobile_image_checksums()
+        data = {
+            'avatar_hash': checksums.get('1920'),
+            'avatar_urls': {
+                size: '/api/mobile/employee/image/%s/%s/%s' % (
+                    self.id, size, checksums.get(size) or MOBILE_IMAGE_PLACEHOLDER_KEY)
+                for size in MOBILE_IMAGE_SIZES
+            },
+        }
+        if self.env['ir.config_parameter'].sudo().get_param(
+                MOBILE_INLINE_IMAGES_PARAM, '1') not in ('0', 'False', 'false'):
+            avatar_128 = self.image_128 or base64.b64encode(self._get_mobile_image_placeholder())
+            image_1920 = self.image_1920 or None
+            data.update({
+                'avatar_128': avatar_128.decode() if isinstance(avatar_128, bytes) else avatar_128,
+                'image_1920': image_1920.decode() if isinstance(image_1920, bytes) else image_1920,
+            })
+        return data
+
     @api.model
     def get_employee_by_username(self, username):
         """Find employee by username"""
@@ -332,61 +436,24 @@ class HrEmployee(models.Model):
     @api.model
     def verify_employee_credentials(self, username, pin):
         """Verify employee credentials"""
-        # Log for debugging
         _logger.info("Verifying credentials for user: %s", username)
 
-        # Log all employees for debugging
-        all_employees = self.search_read([], ['name', 'mobile_username', 'allow_mobile_access'])
-        _logger.info("All employees in system: %s", all_employees)
-
-        # Find employee by username
-        employee = self.search([
-            ('mobile_username', '=', username),
-            ('allow_mobile_access', '=', True),
-        ], limit=1)
-
-        if not employee:
-            _logger.warning("No employee found with username: %s", username)
-            return {'success': False, 'error': 'Employee not found or access denied'}
-
-        _logger.info("Employee found: %s (ID: %s), More info: %s",
-                     employee.name, employee.id,
-                     employee.read(['mobile_username', 'allow_mobile_access', 'mobile_pin_hash', 'mobile_salt']))
-
-        # Verify PIN
-        _logger.info("Attempting to verify PIN for employee: %s", employee.name)
-        verification_result = employee.verify_pin(pin)
-        _logger.info("PIN verification result: %s", verification_result)
-
-        if verification_result:
-            _logger.info("PIN verified successfully for employee: %s", employee.name)
-
-            # جلب صورة الموظف
-            avatar_128 = None
-            image_1920 = None
-
-            # قراءة الصورة بشكل صحيح من Odoo
-            if employee.avatar_128:
-                avatar_128 = employee.avatar_128.decode('utf-8') if isinstance(employee.avatar_128,
-                                                                               bytes) else employee.avatar_128
-            if employee.image_1920:
-                image_1920 = employee.image_1920.decode('utf-8') if isinstance(employee.image_1920,
-                                                                               bytes) else employee.image_1920
+        login = self.authenticate_mobile(username, pin)
+        if not login['success']:
+            return {'success': False, 'error': login['error']}
 
-            return {
-                'success': True,
-                'employee': {
-                    'id': employee.id,
-                    'name': employee.name,
-                    'job_title': employee.job_title or False,
-                    'department': employee.department_id.name if employee.department_id else False,
-                    'work_email': employee.work_email or False,
-                    'work_phone': employee.work_phone or False,
-                    # إضافة بيانات الصورة
-                    'avatar_128': avatar_128,
-                    'image_1920': image_1920,
-                }
+        employee = login['employee']
+        _logger.info("PIN verified successfully for employee: %s", employee.name)
+        return {
+            'success': True,
+            'employee': {
+                'id': employee.id,
+                'name': employee.name,
+                'job_title': employee.job_title or False,
+                'department': employee.department_id.name if employee.department_id else False,
+                'work_email': employee.work_email or False,
+                'work_phone': employee.work_phone or False,
+                # روابط الصورة، مع بياناتها المضمنة التي يقرأها التطبيق الحالي
+                **employee.get_mobile_avatar_data(),
             }
-        else:
-            _logger.warning("PIN verification failed for employee: %s", employee.name)
-            return {'success': False, 'error': 'Invalid PIN'}
\ No newline at end of file
+        }
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+import math
+from collections import defaultdict
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Earth radius in meters
+EARTH_RADIUS_M = 6371000.0
+# Meters per degree of latitude
+METERS_PER_DEGREE = 111320.0
+# Grid cell size in degrees (~1.1 km of latitude)
+CELL_SIZE = 0.01
+
+
+def haversine_distance(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points, in meters"""
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    dlat = lat2_rad - lat1_rad
+    dlon = math.radians(lon2) - math.radians(lon1)
+
+    a = math.sin(dlat / 2) ** 2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2) ** 2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return EARTH_RADIUS_M * c
+
+
+def haversine_distances(lats1, lons1, lats2, lons2):
+    """
+    Element-wise haversine distances (in meters) between two sequences of points.
+    Uses numpy when available, plain Python otherwise.
+    """
+    if not NUMPY_AVAILABLE:
+        return [haversine_distance(*point) for point in zip(lats1, lons1, lats2, lons2)]
+
+    lat1 = np.radians(np.asarray(lats1, dtype=float))
+    lon1 = np.radians(np.asarray(lons1, dtype=float))
+    lat2 = np.radians(np.asarray(lats2, dtype=float))
+    lon2 = np.radians(np.asarray(lons2, dtype=float))
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return (EARTH_RADIUS_M * c).tolist()
+
+
+def _cell(latitude, longitude):
+    return int(math.floor(latitude / CELL_SIZE)), int(math.floor(longitude / CELL_SIZE))
+
+
+class GeofenceIndex:
+    """
+    Immutable grid index over circular geofences.
+
+    Each fence is registered in every grid cell its bounding box overlaps,
+    so "which fences contain this point" only checks the fences of a single
+    cell, and "nearest fence" searches rings of cells around the point.
+    """
+
+    def __init__(self, fences):
+        """
+        :param fences: iterable of dicts with at least 'id', 'latitude',
+                       'longitude' and 'radius' (meters)
+        """
+        self.fences = {fence['id']: fence for fence in fences}
+        self.cells = defaultdict(list)
+        for fence in self.fences.values():
+            for cell in self._covered_cells(fence['latitude'], fence['longitude'], fence['radius']):
+                self.cells[cell].append(fence)
+        # Points per grid cell of the fence centers, used by the nearest search
+        self.centers = defaultdict(list)
+        for fence in self.fences.values():
+            self.centers[_cell(fence['latitude'], fence['longitude'])].append(fence)
+
+    def _covered_cells(self, latitude, longitude, radius):
+        dlat = radius / METERS_PER_DEGREE
+        dlon = radius / (METERS_PER_DEGREE * max(math.cos(math.radians(latitude)), 1e-6))
+        min_lat, min_lon = _cell(latitude - dlat, longitude - dlon)
+        max_lat, max_lon = _cell(latitude + dlat, longitude + dlon)
+        for i in range(min_lat, max_lat + 1):
+            for j in range(min_lon, max_lon + 1):
+                yield i, j
+
+    def containing(self, latitude, longitude, radius_key='radius'):
+        """
+        Fences containing the point.
+
+        :return: list of (fence, distance) sorted by distance
+        """
+        result = []
+        for fence in self.cells.get(_cell(latitude, longitude), ()):
+            distance = haversine_distance(latitude, longitude, fence['latitude'], fence['longitude'])
+            if distance <= fence[radius_key]:
+                result.append((fence, distance))
+        result.sort(key=lambda item: item[1])
+        return result
+
+    def nearest(self, latitude, longitude, max_rings=5):
+        """
+        Nearest fence center to the point.
+
+        Rings of grid cells are searched outwards until no unvisited cell can
+        hold a closer center. Falls back to a full scan when nothing is found
+        within max_rings.
+
+        :return: (fence, distance) or (None, inf)
+        """
+        if not self.fences:
+            return None, float('inf')
+
+        ci, cj = _cell(latitude, longitude)
+        # Smallest side of a grid cell in meters, around this latitude
+        min_cell_m = CELL_SIZE * METERS_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01)
+        best, best_distance = None, float('inf')
+        for ring in range(max_rings + 1):
+            for i in range(ci - ring, ci + ring + 1):
+                for j in range(cj - ring, cj + ring + 1):
+                    if max(abs(i - ci), abs(j - cj)) != ring:
+                        continue
+                    for fence in self.centers.get((i, j), ()):
+                        distance = haversine_distance(latitude, longitude, fence['latitude'], fence['longitude'])
+                        if distance < best_distance:
+                            best, best_distance = fence, distance
+            # Cells outside the visited rings are at least ring * min_cell_m away
+            if best is not None and best_distance <= ring * min_cell_m:
+                return best, best_distance
+
+        fences = list(self.fences.values())
+        distances = haversine_distances(
+            [latitude] * len(fences), [longitude] * len(fences),
+            [fence['latitude'] for fence in fences], [fence['longitude'] for fence in fences],
+        )
+        index = min(range(len(fences)), key=distances.__getitem__)
+        return fences[index], distances[index]
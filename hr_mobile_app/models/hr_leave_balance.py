@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api, tools
+import logging
+
+from .hr_leave_mobile import LEAVE_TYPES_VERSION, EMPLOYEE_BALANCE_VERSION
+
+_logger = logging.getLogger(__name__)
+
+# الرصيد الافتراضي لأنواع الإجازات التي لا تتطلب تخصيص
+DEFAULT_ALLOWED_DAYS = 30
+# حالات الطلبات التي لم يتم اعتمادها نهائياً بعد
+PENDING_LEAVE_STATES = ('draft', 'confirm', 'validate1')
+# عدد الموظفين في كل دفعة عند حساب الأرصدة لجميع الموظفين
+BALANCE_BATCH_SIZE = 1000
+
+
+class HrLeaveBalance(models.AbstractModel):
+    """
+    محرك أرصدة الإجازات.
+    يحسب الأيام المخصصة والمستخدمة والمعلقة لجميع أنواع الإجازات لموظف أو
+    عدة موظفين باستعلامين مجمعين فقط (التخصيصات والإجازات).
+    رصيد الموظف الواحد يتم تخزينه مؤقتاً لكل (موظف، سنة) حتى تتغير إجازاته
+    أو تخصيصاته.
+    """
+    _name = 'hr.leave.balance'
+    _description = 'Leave Balance Engine'
+
+    @api.model
+    def compute_balances(self, employee_ids, year=None):
+        """
+        حساب أرصدة الإجازات لعدة موظفين
+
+        :return: {employee_id: {leave_type_id: {'allocated', 'used', 'pending', 'remaining'}}}
+        """
+        year = year or fields.Date.today().year
+        employee_ids = list(employee_ids)
+        leave_types = self._get_leave_types()
+
+        allocated = {}
+        used = {}
+        pending = {}
+        for start in range(0, len(employee_ids), BALANCE_BATCH_SIZE):
+            batch = employee_ids[start:start + BALANCE_BATCH_SIZE]
+
+            for employee, leave_type, days in self.env['hr.leave.allocation'].sudo()._read_group(
+                [('employee_id', 'in', batch), ('state', '=', 'validate')],
+                ['employee_id', 'holiday_status_id'],
+                ['number_of_days:sum'],
+            ):
+                allocated[employee.id, leave_type.id] = days
+
+            for employee, leave_type, state, days in self.env['hr.leave'].sudo()._read_group(
+                [
+                    ('employee_id', 'in', batch),
+                    ('state', 'in', ('validate',) + PENDING_LEAVE_STATES),
+                    ('date_from', '>=', f'{year}-01-01'),
+                    ('date_to', '<=', f'{year}-12-31'),
+                ],
+                ['employee_id', 'holiday_status_id', 'state'],
+                ['number_of_days:sum'],
+            ):
+                target = used if state == 'validate' else pending
+                key = (employee.id, leave_type.id)
+                target[key] = target.get(key, 0) + days
+
+        balances = {}
+        for employee_id in employee_ids:
+            employee_balance = balances[employee_id] = {}
+            for leave_type in leave_types:
+                key = (employee_id, leave_type.id)
+                allocated_days = allocated.get(key, 0)
+                if allocated_days == 0 and leave_type.requires_allocation == 'no':
+                    allocated_days = DEFAULT_ALLOWED_DAYS
+                used_days = used.get(key, 0)
+                employee_balance[leave_type.id] = {
+                    'allocated': allocated_days,
+                    'used': used_days,
+                    'pending': pending.get(key, 0),
+                    'remaining': max(0, allocated_days - used_days),
+                }
+        return balances
+
+    @api.model
+    @tools.ormcache('employee_id', 'year', 'versions')
+    def _get_employee_balance(self, employee_id, year, versions):
+        """
+        رصيد موظف واحد، مخزن مؤقتاً حتى تتغير إجازاته أو تخصيصاته أو أنواع الإجازات
+        (versions جزء من مفتاح التخزين فقط، يجب عدم تعديل النتيجة)
+        """
+        return self.compute_balances([employee_id], year)[employee_id]
+
+    @api.model
+    def get_employee_balance(self, employee_id, year=None):
+        """رصيد الإجازات لموظف واحد لكل نوع إجازة"""
+        year = year or fields.Date.today().year
+        versions = self.env['hr.mobile.cache.version']._get_versions(
+            LEAVE_TYPES_VERSION, EMPLOYEE_BALANCE_VERSION % employee_id)
+        return {
+            type_id: dict(balance)
+            for type_id, balance in self._get_employee_balance(employee_id, year, versions).items()
+        }
+
+    @api.model
+    def _get_leave_types(self):
+        return self.env['hr.leave.type'].sudo().search([('active', '=', True)])
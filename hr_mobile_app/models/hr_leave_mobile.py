@@ -4,6 +4,41 @@ import logging
 
 _logger = logging.getLogger(__name__)
 
+# الحقول التي تؤثر على أرصدة الإجازات المخزنة مؤقتاً (hr.leave.balance)
+LEAVE_BALANCE_FIELDS = {'state', 'employee_id', 'holiday_status_id', 'number_of_days', 'date_from', 'date_to'}
+# مفاتيح إصدارات الذاكرة المؤقتة للأرصدة (hr.mobile.cache.version)
+LEAVE_TYPES_VERSION = 'leave_balance.types'
+EMPLOYEE_BALANCE_VERSION = 'leave_balance.employee:%s'
+
+
+class LeaveBalanceCacheMixin(models.AbstractModel):
+    """تحديث إصدار رصيد الموظفين المعنيين فقط عند تغير إجازاتهم أو تخصيصاتهم"""
+    _name = 'hr.leave.balance.cache.mixin'
+    _description = 'Leave Balance Cache Invalidation'
+
+    def _bump_balance_versions(self):
+        self.env['hr.mobile.cache.version']._bump(
+            EMPLOYEE_BALANCE_VERSION % employee_id for employee_id in self.sudo().employee_id.ids)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records._bump_balance_versions()
+        return records
+
+    def write(self, vals):
+        if not LEAVE_BALANCE_FIELDS.intersection(vals):
+            return super().write(vals)
+        self._bump_balance_versions()
+        res = super().write(vals)
+        if 'employee_id' in vals:
+            self._bump_balance_versions()
+        return res
+
+    def unlink(self):
+        self._bump_balance_versions()
+        return super().unlink()
+
 
 class HrLeaveType(models.Model):
     _inherit = 'hr.leave.type'
@@ -76,6 +111,20 @@ class HrLeaveType(models.Model):
         # استدعاء التهيئة الأساسية
         return super()._auto_init()
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env['hr.mobile.cache.version']._bump([LEAVE_TYPES_VERSION])
+        return super().create(vals_list)
+
+    def write(self, vals):
+        if 'active' in vals or 'requires_allocation' in vals:
+            self.env['hr.mobile.cache.version']._bump([LEAVE_TYPES_VERSION])
+        return super().write(vals)
+
+    def unlink(self):
+        self.env['hr.mobile.cache.version']._bump([LEAVE_TYPES_VERSION])
+        return super().unlink()
+
     @api.model
     def get_mobile_leave_types(self):
         """جلب أنواع الإجازات المتاحة للتطبيق المحمول"""
@@ -99,7 +148,8 @@ class HrLeaveType(models.Model):
         return types_data
 
 class HrLeaveAllocation(models.Model):
-    _inherit = 'hr.leave.allocation'
+    _name = 'hr.leave.allocation'
+    _inherit = ['hr.leave.allocation', 'hr.leave.balance.cache.mixin']
 
     @api.model
     def get_employee_allocations_summary(self, employee_id):
@@ -115,18 +165,23 @@ class HrLeaveAllocation(models.Model):
                 ('state', '=', 'validate'),
             ])
 
+            # جلب الإجازات المعتمدة لجميع أنواع التخصيصات في استعلام واحد
+            # ثم توزيعها على فترة صلاحية كل تخصيص
+            leaves = self.env['hr.leave'].search_read([
+                ('employee_id', '=', employee_id),
+                ('holiday_status_id', 'in', allocations.holiday_status_id.ids),
+                ('state', '=', 'validate'),
+            ], ['holiday_status_id', 'date_from', 'date_to', 'number_of_days'])
+
             allocation_data = []
             for allocation in allocations:
                 # حساب الأيام المستخدمة من هذا التخصيص
-                used_leaves = self.env['hr.leave'].search([
-                    ('employee_id', '=', employee_id),
-                    ('holiday_status_id', '=', allocation.holiday_status_id.id),
-                    ('state', '=', 'validate'),
-                    ('date_from', '>=', allocation.date_from) if allocation.date_from else True,
-                    ('date_to', '<=', allocation.date_to) if allocation.date_to else True,
-                ])
-
-                used_days = sum(used_leaves.mapped('number_of_days'))
+                used_days = sum(
+                    leave['number_of_days'] for leave in leaves
+                    if leave['holiday_status_id'][0] == allocation.holiday_status_id.id
+                    and (not allocation.date_from or leave['date_from'].date() >= allocation.date_from)
+                    and (not allocation.date_to or leave['date_to'].date() <= allocation.date_to)
+                )
                 remaining_days = allocation.number_of_days - used_days
 
                 allocation_data.append({
@@ -153,7 +208,8 @@ class HrLeaveAllocation(models.Model):
 
 
 class HrLeave(models.Model):
-    _inherit = 'hr.leave'
+    _name = 'hr.leave'
+    _inherit = ['hr.leave', 'hr.leave.balance.cache.mixin']
 
     mobile_created = fields.Boolean(
         string="Created from Mobile App",
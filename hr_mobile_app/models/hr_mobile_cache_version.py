@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api
+
+
+class HrMobileCacheVersion(models.Model):
+    """
+    Version counters of the mobile app caches (geofences, leave balances, token revocations).
+    The current version is part of the ormcache key, so bumping a counter only
+    invalidates the entries it covers instead of clearing the whole registry cache.
+    A bump becomes visible to the other workers when its transaction commits.
+    New versions come from a sequence, so a rolled back bump is never reused
+    (the worker that rolled back may have cached data under it).
+    """
+    _name = 'hr.mobile.cache.version'
+    _description = 'Mobile App Cache Version'
+    _log_access = False
+
+    name = fields.Char(string='Key', required=True)
+    version = fields.Integer(string='Version', default=0)
+
+    _sql_constraints = [
+        ('name_uniq', 'unique(name)', 'Cache version keys must be unique.'),
+    ]
+
+    def init(self):
+        self.env.cr.execute("CREATE SEQUENCE IF NOT EXISTS hr_mobile_cache_version_seq")
+
+    @api.model
+    def _get_versions(self, *names):
+        """Current versions of the given keys, in the same order (0 for unknown keys)"""
+        self.env.cr.execute(
+            "SELECT name, version FROM hr_mobile_cache_version WHERE name = ANY(%s)", [list(names)])
+        versions = dict(self.env.cr.fetchall())
+        return tuple(versions.get(name, 0) for name in names)
+
+    @api.model
+    def _bump(self, names):
+        """Give the given keys a new version"""
+        names = sorted(set(names))
+        if not names:
+            return
+        self.env.cr.execute("""
+            INSERT INTO hr_mobile_cache_version (name, version)
+            SELECT name, nextval('hr_mobile_cache_version_seq') FROM unnest(%s::varchar[]) AS name
+            ON CONFLICT (name) DO UPDATE SET version = EXCLUDED.version
+        """, [names])
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api
+from datetime import datetime
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def _format_hours(hours):
+    return f"{int(hours)}:{int((hours - int(hours)) * 60):02d}"
+
+
+class HrMobileHome(models.AbstractModel):
+    """
+    بيانات الشاشة الرئيسية للتطبيق المحمول في طلب واحد.
+    تجمع حالة وملخص الحضور وإحصائيات الإجازات والإعلانات وملخص كشوف
+    المرتبات باستعلامات مجمعة مشتركة بدلاً من طلب منفصل لكل جزء.
+    """
+    _name = 'hr.mobile.home'
+    _description = 'Mobile App Home Dashboard'
+
+    @api.model
+    def get_home_data(self, employee_id, announcement_limit=5):
+        """إرجاع جميع بيانات الشاشة الرئيسية للموظف أو None إذا لم يكن موجوداً"""
+        employee = self.env['hr.employee'].browse(employee_id)
+        if not employee.exists():
+            return None
+
+        attendance_status, attendance_summary = self._get_attendance_data(employee_id)
+        leave_stats, active_leave_count = self._get_leave_data(employee_id)
+
+        # عدد الطلبات النشطة (إجازات + مصروفات) كما في get_employee_attendance_summary
+        expense_count = 0
+        if 'hr.expense' in self.env:
+            expense_count = self.env['hr.expense'].search_count([
+                ('employee_id', '=', employee_id),
+                ('state', 'in', ['draft', 'reported', 'approved']),
+            ])
+        attendance_summary['request_count'] = active_leave_count + expense_count
+
+        return {
+            'employee': {
+                'id': employee.id,
+                'name': employee.name,
+            },
+            'attendance_status': attendance_status,
+            'attendance_summary': attendance_summary,
+            'leave_stats': leave_stats,
+            'announcements': self._get_announcements_data(employee_id, announcement_limit),
+            'payslip_summary': self._get_payslip_summary(employee_id),
+        }
+
+    @api.model
+    def _get_attendance_data(self, employee_id):
+        """حالة الحضور وملخص اليوم من استعلام واحد"""
+        today_start = datetime.combine(fields.Date.today(), datetime.min.time())
+        attendances = self.env['hr.attendance'].search([
+            ('employee_id', '=', employee_id),
+            '|',
+            ('check_in', '>=', today_start),
+            ('check_out', '=', False),
+        ], order='check_in desc')
+
+        open_attendance = attendances.filtered(lambda a: not a.check_out)[:1]
+        if open_attendance:
+            status = {
+                'is_checked_in': True,
+                'check_in': open_attendance.check_in.isoformat() + 'Z',
+                'attendance_id': open_attendance.id,
+            }
+        else:
+            status = {'is_checked_in': False, 'check_in': None, 'attendance_id': None}
+
+        now = fields.Datetime.now()
+        total_worked_hours = 0.0
+        today_open = False
+        for attendance in attendances.filtered(lambda a: a.check_in >= today_start):
+            if attendance.check_out:
+                total_worked_hours += (attendance.check_out - attendance.check_in).total_seconds() / 3600.0
+            elif not today_open:
+                # سجل حضور مفتوح واحد فقط كما في الملخص الأصلي
+                today_open = True
+                total_worked_hours += (now - attendance.check_in).total_seconds() / 3600.0
+
+        return status, {'work_hours': _format_hours(total_worked_hours), 'request_count': 0}
+
+    @api.model
+    def _get_leave_data(self, employee_id):
+        """إحصائيات الإجازات من استعلام مجمع واحد حسب الحالة والنوع"""
+        groups = self.env['hr.leave']._read_group(
+            [('employee_id', '=', employee_id)],
+            ['state', 'holiday_status_id'],
+            ['__count', 'number_of_days:sum'],
+        )
+
+        count_by_state = {}
+        leaves_by_type = {}
+        days_by_type = {}
+        for state, leave_type, count, days in groups:
+            count_by_state[state] = count_by_state.get(state, 0) + count
+            type_name = leave_type.name
+            leaves_by_type[type_name] = leaves_by_type.get(type_name, 0) + count
+            if state == 'validate':
+                days_by_type[type_name] = days_by_type.get(type_name, 0) + days
+
+        total_requests = sum(count_by_state.values())
+        approved = count_by_state.get('validate', 0)
+        total_days_used = sum(days_by_type.values())
+        total_days_allowed = 30
+        active_leave_count = sum(count_by_state.get(state, 0) for state in ('draft', 'confirm', 'validate1'))
+
+        stats = {
+            'total_requests': total_requests,
+            'pending_requests': count_by_state.get('draft', 0) + count_by_state.get('confirm', 0),
+            'approved_requests': approved,
+            'rejected_requests': count_by_state.get('refuse', 0),
+            'cancelled_requests': count_by_state.get('cancel', 0),
+            'total_days_used': total_days_used,
+            'total_days_remaining': max(0, total_days_allowed - total_days_used),
+            'total_days_allowed': total_days_allowed,
+            'leaves_by_type': leaves_by_type,
+            'days_by_type': days_by_type,
+            'approval_rate': (approved / total_requests * 100) if total_requests else 0,
+            'usage_rate': (total_days_used / total_days_allowed * 100) if total_days_allowed > 0 else 0,
+        }
+        return stats, active_leave_count
+
+    @api.model
+    def _get_announcements_data(self, employee_id, limit):
+        """أحدث الإعلانات مع حالة القراءة لجميعها في استعلام واحد"""
+        Announcement = self.env['hr.announcement']
+        domain = Announcement._get_mobile_feed_domain(employee_id)
+        announcements = Announcement.search(domain, limit=limit, order='is_pinned desc, create_date desc')
+        read_ids = Announcement._get_read_announcement_ids(employee_id, announcements.ids)
+
+        return {
+            'unread_count': self.env['hr.announcement.unread'].get_unread_count(employee_id),
+            'items': [{
+                'id': announcement.id,
+                'title': announcement.name,
+                'summary': announcement.summary or '',
+                'type': announcement.announcement_type,
+                'priority': announcement.priority,
+                'is_pinned': announcement.is_pinned,
+                'is_read': announcement.id in read_ids,
+                'created_date': announcement.create_date.isoformat() if announcement.create_date else None,
+            } for announcement in announcements],
+        }
+
+    @api.model
+    def _get_payslip_summary(self, employee_id):
+        """ملخص كشوف المرتبات من الإجماليات المخزنة في استعلام مجمع واحد"""
+        summary = self.env['hr.payslip'].get_mobile_payslip_summary(employee_id)
+        summary.pop('by_year')
+        return summary
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Hash computations running at the same time, per process
+PIN_HASH_WORKERS = 2
+# Hash computations allowed to wait for a worker; beyond this logins are refused
+PIN_HASH_MAX_PENDING = 32
+# Seconds a login waits for its hash before giving up
+PIN_HASH_TIMEOUT = 10.0
+
+
+class PinVerifierBusy(Exception):
+    """Too many PIN verifications are already queued"""
+
+
+class PinHasher:
+    """
+    Bounded pool for the PBKDF2 PIN hashes.
+
+    pbkdf2_hmac releases the GIL, so the hashes run in parallel with the
+    request threads, but never more than PIN_HASH_WORKERS at a time and never
+    with more than PIN_HASH_MAX_PENDING logins waiting.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=PIN_HASH_WORKERS, thread_name_prefix='mobile.pin')
+        self._slots = threading.BoundedSemaphore(PIN_HASH_MAX_PENDING)
+
+    def run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PinVerifierBusy()
+        try:
+            future = self._executor.submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda __: self._slots.release())
+        return future.result(timeout=PIN_HASH_TIMEOUT)
+
+
+pin_hasher = PinHasher()
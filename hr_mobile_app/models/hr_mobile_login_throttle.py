@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import models, fields, api
+
+# Per (username, client address) bucket: 5 attempts, then one more every 30 seconds.
+# Keyed on the address too, so nobody can lock an account out from elsewhere.
+ACCOUNT_BUCKET = (5, 1 / 30)
+# Per client address bucket, only against floods: many employees share one
+# address behind carrier NAT or an office network
+ADDRESS_BUCKET = (300, 5)
+# Buckets untouched for this long are full again and can be dropped
+THROTTLE_KEEP = timedelta(hours=1)
+
+
+class HrMobileLoginThrottle(models.Model):
+    """
+    Token buckets of the mobile login, shared by every worker.
+
+    Every key starts with `capacity` tokens and regains `refill_rate` tokens
+    per second. A login takes its buckets with SELECT FOR UPDATE in its own
+    short READ COMMITTED transaction: concurrent logins on the same key wait
+    for each other instead of failing to serialize, and no lock is held
+    during the PIN hash.
+    """
+    _name = 'hr.mobile.login.throttle'
+    _description = 'Mobile Login Throttle'
+    _log_access = False
+
+    key = fields.Char(string='Key', required=True)
+    tokens = fields.Float(string='Tokens', required=True)
+    updated_at = fields.Datetime(string='Updated At', required=True)
+
+    _sql_constraints = [
+        ('key_uniq', 'unique(key)', 'Throttle keys must be unique.'),
+    ]
+
+    @api.model
+    def _consume(self, username, ip_address=None):
+        """
+        Take one token from the account bucket and the address bucket.
+        Nothing is taken when one of them is empty.
+
+        :return: 0 when allowed, otherwise the seconds to wait for the next token
+        """
+        buckets = {f'account:{username}:{ip_address}': ACCOUNT_BUCKET}
+        if ip_address:
+            buckets[f'address:{ip_address}'] = ADDRESS_BUCKET
+        keys = sorted(buckets)
+
+        with self.env.registry.cursor() as cr:
+            cr.execute("SET TRANSACTION ISOLATION LEVEL READ COMMITTED")
+            cr.execute("""
+                INSERT INTO hr_mobile_login_throttle (key, tokens, updated_at)
+                SELECT key, capacity, clock_timestamp() at time zone 'UTC'
+                  FROM unnest(%s::varchar[], %s::float[]) AS b(key, capacity)
+                    ON CONFLICT (key) DO NOTHING
+            """, [keys, [buckets[key][0] for key in keys]])
+            cr.execute("""
+                SELECT key, tokens, EXTRACT(EPOCH FROM clock_timestamp() at time zone 'UTC' - updated_at)
+                  FROM hr_mobile_login_throttle
+                 WHERE key = ANY(%s)
+                 ORDER BY key
+                   FOR UPDATE
+            """, [keys])
+
+            tokens = {}
+            retry_after = 0
+            for key, bucket_tokens, elapsed in cr.fetchall():
+                capacity, refill_rate = buckets[key]
+                tokens[key] = min(capacity, bucket_tokens + max(elapsed, 0) * refill_rate)
+                if tokens[key] < 1:
+                    retry_after = max(retry_after, (1 - tokens[key]) / refill_rate)
+            if not retry_after:
+                tokens = {key: value - 1 for key, value in tokens.items()}
+
+            cr.execute("""
+                UPDATE hr_mobile_login_throttle t
+                   SET tokens = b.tokens, updated_at = clock_timestamp() at time zone 'UTC'
+                  FROM unnest(%s::varchar[], %s::float[]) AS b(key, tokens)
+                 WHERE t.key = b.key
+            """, [list(tokens), list(tokens.values())])
+        return retry_after
+
+    @api.autovacuum
+    def _gc_throttles(self):
+        """Drop the buckets that are full again"""
+        self.env.cr.execute("DELETE FROM hr_mobile_login_throttle WHERE updated_at < %s",
+                            [fields.Datetime.now() - THROTTLE_KEEP])
+
+
+class HrMobileLoginStat(models.Model):
+    """
+    Successful mobile logins waiting to be added to mobile_last_login and
+    mobile_login_count. A login only appends a row, and the cron applies
+    them in batches with one UPDATE, so logins never write the employee row.
+    """
+    _name = 'hr.mobile.login.stat'
+    _description = 'Mobile Login Statistics Queue'
+    _log_access = False
+
+    employee_id = fields.Many2one('hr.employee', string='Employee', required=True, ondelete='cascade')
+    login_date = fields.Datetime(string='Login Date', required=True)
+
+    @api.model
+    def _record(self, employee):
+        self.env.cr.execute(
+            "INSERT INTO hr_mobile_login_stat (employee_id, login_date) VALUES (%s, %s)",
+            [employee.id, fields.Datetime.now()])
+
+    @api.model
+    def _cron_apply_stats(self):
+        """Add the queued logins to the employees and empty the queue"""
+        self.env.cr.execute("""
+            WITH applied AS (
+                DELETE FROM hr_mobile_login_stat RETURNING employee_id, login_date
+            )
+            UPDATE hr_employee e
+               SET mobile_login_count = COALESCE(e.mobile_login_count, 0) + s.login_count,
+                   mobile_last_login = GREATEST(e.mobile_last_login, s.last_login)
+              FROM (SELECT employee_id, count(*) AS login_count, max(login_date) AS last_login
+                      FROM applied
+                     GROUP BY employee_id) s
+             WHERE e.id = s.employee_id
+        """)
+        self.env['hr.employee'].invalidate_model(['mobile_login_count', 'mobile_last_login'])
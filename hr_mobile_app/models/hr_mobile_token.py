@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api, tools
+from datetime import datetime, timezone
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import secrets
+import time
+
+_logger = logging.getLogger(__name__)
+
+TOKEN_SECRET_PARAM = 'hr_mobile_app.token_secret'
+TOKEN_LIFETIME_PARAM = 'hr_mobile_app.token_lifetime_days'
+DEFAULT_TOKEN_LIFETIME_DAYS = 30
+# المستخدم المشترك الذي تنفذ به طلبات التطبيق المحمول
+MOBILE_SERVICE_LOGIN = 'mobile_app_service'
+# مفتاح إصدار قائمة الرموز الملغاة (hr.mobile.cache.version)
+REVOCATIONS_VERSION = 'mobile_token.revocations'
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def _b64decode(data):
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+def _to_datetime(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
+class HrMobileToken(models.AbstractModel):
+    """
+    رموز دخول موقعة (HMAC-SHA256) للتطبيق المحمول.
+    الرمز يحمل معرف الموظف وتاريخ الانتهاء، ويتم التحقق منه من الذاكرة
+    (المفتاح وقائمة الرموز الملغاة مخزنة مؤقتاً) مع قراءة إصدار القائمة فقط.
+    """
+    _name = 'hr.mobile.token'
+    _description = 'Mobile App Token'
+
+    @api.model
+    def _init_token_secret(self):
+        """
+        إنشاء مفتاح التوقيع مرة واحدة (عند التثبيت) إن لم يكن موجوداً.
+        يحفظ في معاملة مستقلة مع ON CONFLICT DO NOTHING، فكل العمليات تقرأ نفس المفتاح
+        ولا يخزن مؤقتاً مفتاح لم يحفظ بعد.
+
+        :return: the stored secret
+        """
+        with self.env.registry.cursor() as cr:
+            cr.execute("""
+                INSERT INTO ir_config_parameter (key, value, create_uid, create_date, write_uid, write_date)
+                VALUES (%s, %s, %s, now() at time zone 'UTC', %s, now() at time zone 'UTC')
+                    ON CONFLICT (key) DO NOTHING
+            """, [TOKEN_SECRET_PARAM, secrets.token_hex(32), self.env.uid, self.env.uid])
+            cr.execute("SELECT value FROM ir_config_parameter WHERE key = %s", [TOKEN_SECRET_PARAM])
+            return cr.fetchone()[0]
+
+    @api.model
+    @tools.ormcache()
+    def _get_token_secret(self):
+        self.env.cr.execute("SELECT value FROM ir_config_parameter WHERE key = %s", [TOKEN_SECRET_PARAM])
+        row = self.env.cr.fetchone()
+        # المفتاح ينشأ عند التثبيت، وإن حذف يعاد إنشاؤه مرة واحدة لكل العمليات
+        secret = row[0] if row else self._init_token_secret()
+        return secret.encode()
+
+    @api.model
+    @tools.ormcache()
+    def _get_service_uid(self):
+        user = self.env['res.users'].sudo().search([('login', '=', MOBILE_SERVICE_LOGIN)], limit=1)
+        return user.id or None
+
+    @api.model
+    def _get_revocations(self):
+        """
+        الرموز الملغاة والموظفين الذين ألغيت جميع رموزهم حتى تاريخ معين
+        مخزنة مؤقتاً حتى إضافة أو حذف إلغاء (استعلام واحد صغير لقراءة الإصدار)
+
+        :return: (frozenset of token ids, {employee_id: revoked_before timestamp})
+        """
+        return self._get_revocations_cached(
+            *self.env['hr.mobile.cache.version']._get_versions(REVOCATIONS_VERSION))
+
+    @api.model
+    @tools.ormcache('version')
+    def _get_revocations_cached(self, version):
+        revoked_ids = set()
+        revoked_before = {}
+        for revocation in self.env['hr.mobile.token.revocation'].sudo().search_read(
+            [], ['token_id', 'employee_id', 'revoked_before']
+        ):
+            if revocation['token_id']:
+                revoked_ids.add(revocation['token_id'])
+            elif revocation['employee_id']:
+                employee_id = revocation['employee_id'][0]
+                timestamp = revocation['revoked_before'].replace(tzinfo=timezone.utc).timestamp()
+                revoked_before[employee_id] = max(timestamp, revoked_before.get(employee_id, 0))
+        return frozenset(revoked_ids), revoked_before
+
+    def _sign(self, payload):
+        return _b64encode(hmac.new(self._get_token_secret(), payload.encode(), hashlib.sha256).digest())
+
+    @api.model
+    def issue_token(self, employee):
+        """
+        إصدار رمز دخول للموظف
+
+        :return: dict with 'token' and 'expires_at' (ISO format)
+        """
+        lifetime_days = int(self.env['ir.config_parameter'].sudo().get_param(
+            TOKEN_LIFETIME_PARAM, DEFAULT_TOKEN_LIFETIME_DAYS
+        ))
+        issued_at = int(time.time())
+        expires_at = issued_at + lifetime_days * 86400
+        payload = _b64encode(json.dumps({
+            'jti': secrets.token_urlsafe(12),
+            'emp': employee.id,
+            'iat': issued_at,
+            'exp': expires_at,
+        }, separators=(',', ':')).encode())
+        return {
+            'token': f'{payload}.{self._sign(payload)}',
+            'expires_at': _to_datetime(expires_at).isoformat(),
+        }
+
+    @api.model
+    def verify_token(self, token):
+        """
+        التحقق من رمز الدخول (الاستعلام الوحيد هو قراءة إصدار قائمة الإلغاء)
+
+        :return: payload dict ('jti', 'emp', 'iat', 'exp') or None if invalid, expired or revoked
+        """
+        try:
+            payload, signature = token.split('.')
+        except (AttributeError, ValueError):
+            return None
+        # مقارنة bytes حتى لا يسبب توقيع بحروف غير ASCII خطأ TypeError
+        if not hmac.compare_digest(signature.encode(), self._sign(payload).encode()):
+            return None
+        try:
+            claims = json.loads(_b64decode(payload))
+        except ValueError:
+            return None
+
+        if claims['exp'] < time.time():
+            return None
+        revoked_ids, revoked_before = self._get_revocations()
+        if claims['jti'] in revoked_ids or claims['iat'] < revoked_before.get(claims['emp'], 0):
+            return None
+        return claims
+
+    @api.model
+    def revoke_token(self, token):
+        """إلغاء رمز دخول (تسجيل الخروج)"""
+        claims = self.verify_token(token)
+        if not claims:
+            return False
+        self.env['hr.mobile.token.revocation'].sudo().create({
+            'token_id': claims['jti'],
+            'employee_id': claims['emp'],
+            'expires_at': _to_datetime(claims['exp']),
+        })
+        return True
+
+    @api.model
+    def revoke_employee_tokens(self, employees):
+        """إلغاء جميع الرموز الصادرة للموظفين حتى الآن"""
+        if not employees:
+            return
+        lifetime_days = int(self.env['ir.config_parameter'].sudo().get_param(
+            TOKEN_LIFETIME_PARAM, DEFAULT_TOKEN_LIFETIME_DAYS
+        ))
+        now = fields.Datetime.now()
+        self.env['hr.mobile.token.revocation'].sudo().create([{
+            'employee_id': employee.id,
+            'revoked_before': now,
+            'expires_at': fields.Datetime.add(now, days=lifetime_days),
+        } for employee in employees])
+
+
+class HrMobileTokenRevocation(models.Model):
+    """قائمة الرموز الملغاة، يتم حذف السجل بعد انتهاء صلاحية الرموز التي يلغيها"""
+    _name = 'hr.mobile.token.revocation'
+    _description = 'Revoked Mobile App Token'
+    _order = 'id desc'
+
+    token_id = fields.Char(string='Token ID', index=True)
+    employee_id = fields.Many2one('hr.employee', string='Employee', index=True, ondelete='cascade')
+    revoked_before = fields.Datetime(
+        string='Revoked Before',
+        help="All tokens of the employee issued before this date are revoked"
+    )
+    expires_at = fields.Datetime(string='Expires At', required=True)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env['hr.mobile.cache.version']._bump([REVOCATIONS_VERSION])
+        return super().create(vals_list)
+
+    def unlink(self):
+        self.env['hr.mobile.cache.version']._bump([REVOCATIONS_VERSION])
+        return super().unlink()
+
+    @api.autovacuum
+    def _gc_expired_revocations(self):
+        """حذف الإلغاءات التي انتهت صلاحية رموزها"""
+        self.search([('expires_at', '<', fields.Datetime.now())]).unlink()
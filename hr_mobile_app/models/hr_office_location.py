@@ -1,10 +1,19 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import ValidationError
+from .hr_geofence import GeofenceIndex
 import logging
 
 _logger = logging.getLogger(__name__)
 
+# hr.employee fields that change the attendance geofence of an employee
+GEOFENCE_EMPLOYEE_FIELDS = {'office_location_id', 'department_id', 'allow_remote_attendance', 'active'}
+
+# Cache version keys (see hr.mobile.cache.version)
+OFFICE_FENCES_VERSION = 'geofence.offices'
+DEPARTMENT_FENCES_VERSION = 'geofence.departments'
+EMPLOYEE_FENCE_VERSION = 'geofence.employee:%s'
+
 
 class HrOfficeLocation(models.Model):
     _name = 'hr.office.location'
@@ -255,32 +264,83 @@ class HrOfficeLocation(models.Model):
                 'target': 'new',
             }
 
-    @api.model
-    def get_nearest_location(self, latitude, longitude):
-        """Get nearest office location from given coordinates"""
-        locations = self.search([('active', '=', True)])
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env['hr.mobile.cache.version']._bump([OFFICE_FENCES_VERSION])
+        return super().create(vals_list)
 
-        if not locations:
-            return False
+    def write(self, vals):
+        self.env['hr.mobile.cache.version']._bump([OFFICE_FENCES_VERSION])
+        return super().write(vals)
+
+    def unlink(self):
+        self.env['hr.mobile.cache.version']._bump([OFFICE_FENCES_VERSION])
+        return super().unlink()
 
-        nearest_location = None
-        min_distance = float('inf')
+    @api.model
+    def _get_office_fences(self):
+        """
+        Geofence data of every office location (active or not), by id.
+        Cached per process until an office location is modified.
+        """
+        return self._get_office_fences_cached(
+            *self.env['hr.mobile.cache.version']._get_versions(OFFICE_FENCES_VERSION))
 
+    @api.model
+    @tools.ormcache('version')
+    def _get_office_fences_cached(self, version):
+        locations = self.sudo().with_context(active_test=False).search_read([], [
+            'name', 'active', 'latitude', 'longitude',
+            'allowed_radius', 'allow_flexible_radius', 'flexible_radius',
+        ])
+        fences = {}
         for location in locations:
-            # Calculate distance using function from hr.attendance
-            attendance_model = self.env['hr.attendance']
-            distance = attendance_model._calculate_distance(
-                latitude, longitude,
-                location.latitude, location.longitude
-            )
+            flexible_radius = location['flexible_radius'] if location['allow_flexible_radius'] else location['allowed_radius']
+            fences[location['id']] = {
+                'id': location['id'],
+                'name': location['name'],
+                'active': location['active'],
+                'latitude': location['latitude'],
+                'longitude': location['longitude'],
+                'allowed_radius': location['allowed_radius'],
+                'allow_flexible_radius': location['allow_flexible_radius'],
+                'flexible_radius': flexible_radius,
+                # Largest radius the fence can have, used to build the grid
+                'radius': max(location['allowed_radius'], flexible_radius),
+            }
+        return fences
+
+    @api.model
+    def _get_geofence_index(self):
+        """Grid index over the active office locations, cached like _get_office_fences"""
+        return self._get_geofence_index_cached(
+            *self.env['hr.mobile.cache.version']._get_versions(OFFICE_FENCES_VERSION))
+
+    @api.model
+    @tools.ormcache('version')
+    def _get_geofence_index_cached(self, version):
+        fences = self._get_office_fences_cached(version)
+        return GeofenceIndex(fence for fence in fences.values() if fence['active'])
+
+    @api.model
+    def get_locations_containing(self, latitude, longitude):
+        """Get active office locations whose allowed radius contains the given coordinates"""
+        matches = self._get_geofence_index().containing(latitude, longitude, radius_key='allowed_radius')
+        return [
+            {'location': self.browse(fence['id']), 'distance': distance}
+            for fence, distance in matches
+        ]
 
-            if distance < min_distance:
-                min_distance = distance
-                nearest_location = location
+    @api.model
+    def get_nearest_location(self, latitude, longitude):
+        """Get nearest office location from given coordinates"""
+        fence, distance = self._get_geofence_index().nearest(latitude, longitude)
+        if not fence:
+            return False
 
         return {
-            'location': nearest_location,
-            'distance': min_distance
+            'location': self.browse(fence['id']),
+            'distance': distance
         }
 
     def name_get(self):
@@ -315,6 +375,11 @@ class HrDepartment(models.Model):
         help="Geographical location for this department"
     )
 
+    def write(self, vals):
+        if 'office_location_id' in vals:
+            self.env['hr.mobile.cache.version']._bump([DEPARTMENT_FENCES_VERSION])
+        return super().write(vals)
+
 
 class HrEmployee(models.Model):
     _inherit = 'hr.employee'
@@ -340,6 +405,52 @@ class HrEmployee(models.Model):
         help="Temporary locations allowed for employee attendance"
     )
 
+    def write(self, vals):
+        if GEOFENCE_EMPLOYEE_FIELDS.intersection(vals):
+            self.env['hr.mobile.cache.version']._bump(EMPLOYEE_FENCE_VERSION % employee_id for employee_id in self.ids)
+        return super().write(vals)
+
+    def unlink(self):
+        self.env['hr.mobile.cache.version']._bump(EMPLOYEE_FENCE_VERSION % employee_id for employee_id in self.ids)
+        return super().unlink()
+
+    @api.model
+    def _get_mobile_geofence(self, employee_id):
+        """
+        Attendance geofence settings of an employee: remote permission,
+        temporary locations and office location (own or department's).
+        Cached per process until one of them is modified.
+
+        :return: dict, or None if the employee does not exist
+        """
+        versions = self.env['hr.mobile.cache.version']._get_versions(
+            DEPARTMENT_FENCES_VERSION, EMPLOYEE_FENCE_VERSION % employee_id)
+        return self._get_mobile_geofence_cached(employee_id, versions)
+
+    @api.model
+    @tools.ormcache('employee_id', 'versions')
+    def _get_mobile_geofence_cached(self, employee_id, versions):
+        employee = self.sudo().browse(employee_id)
+        if not employee.exists():
+            return None
+
+        office_location = employee.office_location_id or employee.department_id.office_location_id
+        return {
+            'remote_allowed': employee.allow_remote_attendance,
+            'temporary': tuple(
+                {
+                    'date_from': temp.date_from,
+                    'date_to': temp.date_to,
+                    'latitude': temp.latitude,
+                    'longitude': temp.longitude,
+                    'allowed_radius': temp.allowed_radius,
+                    'reason': temp.reason,
+                }
+                for temp in employee.temporary_location_ids.sorted('id')
+            ),
+            'office_location_id': office_location.id,
+        }
+
     @api.onchange('department_id')
     def _onchange_department_id(self):
         """Update office location when department changes"""
@@ -400,6 +511,27 @@ class HrEmployeeTempLocation(models.Model):
         readonly=True
     )
 
+    def _bump_employee_fences(self):
+        self.env['hr.mobile.cache.version']._bump(
+            EMPLOYEE_FENCE_VERSION % employee_id for employee_id in self.employee_id.ids)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records._bump_employee_fences()
+        return records
+
+    def write(self, vals):
+        self._bump_employee_fences()
+        res = super().write(vals)
+        if 'employee_id' in vals:
+            self._bump_employee_fences()
+        return res
+
+    def unlink(self):
+        self._bump_employee_fences()
+        return super().unlink()
+
     @api.constrains('date_from', 'date_to')
     def _check_dates(self):
         for record in self:
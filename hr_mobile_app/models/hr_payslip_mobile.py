@@ -1,9 +1,17 @@
 # -*- coding: utf-8 -*-
 from odoo import models, fields, api, _
+from odoo.tools.sql import create_index
+import hashlib
+import json
 import logging
 
 _logger = logging.getLogger(__name__)
 
+# عدد محاولات توليد ملف PDF في الخلفية قبل التوقف (محاولة كل تشغيل للمهمة المجدولة)
+MOBILE_PDF_MAX_ATTEMPTS = 5
+# الحقول التي تغير محتوى ملف PDF الخاص بالكشف
+MOBILE_PDF_FIELDS = {'state', 'number', 'name', 'employee_id', 'date_from', 'date_to', 'line_ids'}
+
 
 class HrPayslipMobile(models.Model):
     _inherit = 'hr.payslip'
@@ -25,6 +33,171 @@ class HrPayslipMobile(models.Model):
         readonly=True
     )
 
+    # إجماليات مخزنة تحسب مرة واحدة عند حساب/تأكيد الكشف بدلاً من كل طلب
+    mobile_allowance_total = fields.Float(
+        string="إجمالي البدلات",
+        compute='_compute_mobile_totals',
+        store=True
+    )
+
+    mobile_deduction_total = fields.Float(
+        string="إجمالي الخصومات",
+        compute='_compute_mobile_totals',
+        store=True
+    )
+
+    mobile_year = fields.Integer(
+        string="سنة الكشف",
+        compute='_compute_mobile_year',
+        store=True
+    )
+
+    # ملف PDF الجاهز للتحميل من التطبيق، ويعاد توليده فقط عند تغير الكشف
+    mobile_pdf_attachment_id = fields.Many2one(
+        'ir.attachment',
+        string="ملف PDF للتطبيق المحمول",
+        copy=False,
+        readonly=True
+    )
+
+    mobile_pdf_version = fields.Char(
+        string="إصدار ملف PDF",
+        copy=False,
+        readonly=True
+    )
+
+    mobile_pdf_pending = fields.Boolean(
+        string="بانتظار توليد PDF",
+        copy=False,
+        readonly=True,
+        index=True
+    )
+
+    mobile_pdf_attempts = fields.Integer(
+        string="محاولات توليد PDF الفاشلة",
+        copy=False,
+        readonly=True
+    )
+
+    def init(self):
+        super().init()
+        create_index(
+            self._cr, 'hr_payslip_employee_mobile_year_state_index',
+            self._table, ['employee_id', 'mobile_year', 'state']
+        )
+
+    # لا تعتمد على رمز فئة القاعدة حتى لا يعاد حساب كل الكشوف القديمة عند تعديل فئة
+    @api.depends('state', 'line_ids.total')
+    def _compute_mobile_totals(self):
+        for payslip in self:
+            allowance_total = 0
+            deduction_total = 0
+            for line in payslip.line_ids:
+                if line.salary_rule_id.category_id.code == 'ALW':
+                    allowance_total += line.total
+                elif line.salary_rule_id.category_id.code == 'DED':
+                    deduction_total += abs(line.total)
+            payslip.mobile_allowance_total = allowance_total
+            payslip.mobile_deduction_total = deduction_total
+
+    @api.depends('date_from')
+    def _compute_mobile_year(self):
+        for payslip in self:
+            payslip.mobile_year = payslip.date_from.year if payslip.date_from else 0
+
+    def write(self, vals):
+        res = super().write(vals)
+        if MOBILE_PDF_FIELDS.intersection(vals):
+            done_payslips = self.filtered(lambda p: p.state == 'done' and not p.mobile_pdf_pending)
+            if done_payslips:
+                # توليد ملف PDF في الخلفية بدلاً من وقت التحميل
+                super(HrPayslipMobile, done_payslips).write({'mobile_pdf_pending': True, 'mobile_pdf_attempts': 0})
+                self.env.ref('hr_mobile_app.ir_cron_render_payslip_pdfs')._trigger()
+        return res
+
+    def _get_mobile_pdf_version(self):
+        """بصمة محتوى الكشف، تتغير فقط عند تغير البيانات التي تظهر في ملف PDF"""
+        self.ensure_one()
+        content = [
+            self.number, self.name, self.state, self.employee_id.id,
+            str(self.date_from), str(self.date_to),
+            [(line.code, line.name, line.quantity, line.rate, line.amount, line.total) for line in self.line_ids],
+        ]
+        return hashlib.sha1(json.dumps(content, default=str).encode()).hexdigest()
+
+    def _render_mobile_pdf(self, version=None):
+        """توليد ملف PDF للكشف وتخزينه كمرفق مرتبط بإصدار الكشف"""
+        self.ensure_one()
+        version = version or self._get_mobile_pdf_version()
+        pdf = self.env['ir.actions.report'].sudo()._render_qweb_pdf(
+            'hr_payroll.action_report_payslip', self.ids
+        )[0]
+
+        old_attachment = self.mobile_pdf_attachment_id
+        attachment = self.env['ir.attachment'].sudo().create({
+            'name': f'payslip_{self.number or self.id}.pdf',
+            'type': 'binary',
+            'raw': pdf,
+            'mimetype': 'application/pdf',
+            'res_model': self._name,
+            'res_id': self.id,
+        })
+        super(HrPayslipMobile, self.sudo()).write({
+            'mobile_pdf_attachment_id': attachment.id,
+            'mobile_pdf_version': version,
+            'mobile_pdf_pending': False,
+            'mobile_pdf_attempts': 0,
+        })
+        old_attachment.sudo().unlink()
+        return attachment
+
+    def get_mobile_pdf(self):
+        """
+        ملف PDF الجاهز للكشف، ويتم توليده فقط إذا لم يكن موجوداً أو تغير الكشف منذ توليده
+
+        :return: ir.attachment
+        """
+        self.ensure_one()
+        version = self._get_mobile_pdf_version()
+        if self.mobile_pdf_attachment_id and self.mobile_pdf_version == version:
+            return self.mobile_pdf_attachment_id.sudo()
+        return self._render_mobile_pdf(version)
+
+    @api.model
+    def _cron_render_mobile_pdfs(self, batch_size=20):
+        """
+        توليد ملفات PDF للكشوف المدفوعة في الخلفية
+        الكشف الذي يفشل توليده يبقى بانتظار التوليد ويعاد في التشغيل التالي للمهمة،
+        حتى MOBILE_PDF_MAX_ATTEMPTS محاولة، وتقدم عليه الكشوف التي لم تفشل
+        """
+        payslips = self.sudo().search([
+            ('mobile_pdf_pending', '=', True),
+            ('state', '=', 'done'),
+        ], order='mobile_pdf_attempts, id', limit=batch_size)
+
+        failed = False
+        for payslip in payslips:
+            try:
+                with self.env.cr.savepoint():
+                    payslip.get_mobile_pdf()
+            except Exception as e:
+                failed = True
+                attempts = payslip.mobile_pdf_attempts + 1
+                if attempts >= MOBILE_PDF_MAX_ATTEMPTS:
+                    _logger.error("فشل توليد PDF لكشف المرتب %s بعد %s محاولات، سيتم توليده عند التحميل: %s",
+                                  payslip.id, attempts, str(e))
+                else:
+                    _logger.warning("خطأ أثناء توليد PDF لكشف المرتب %s (محاولة %s): %s",
+                                    payslip.id, attempts, str(e))
+                super(HrPayslipMobile, payslip).write({
+                    'mobile_pdf_attempts': attempts,
+                    'mobile_pdf_pending': attempts < MOBILE_PDF_MAX_ATTEMPTS,
+                })
+
+        # عند وجود فشل ننتظر التشغيل المجدول التالي بدلاً من إعادة المحاولة فوراً
+        if len(payslips) == batch_size and not failed:
+            self.env.ref('hr_mobile_app.ir_cron_render_payslip_pdfs')._trigger()
+
     def mark_as_viewed_on_mobile(self):
         """تسجيل أن الكشف تمت مشاهدته عبر التطبيق المحمول"""
         self.write({
@@ -36,29 +209,73 @@ class HrPayslipMobile(models.Model):
     @api.model
     def get_payslip_summary_for_employee(self, employee_id):
         """حساب ملخص كشوف المرتبات للموظف"""
-        payslips = self.search([
-            ('employee_id', '=', employee_id),
-            ('state', '=', 'done')
-        ])
-
-        if not payslips:
-            return {
-                'total_net': 0,
-                'average_net': 0,
-                'count': 0,
-                'last_payment': None
-            }
-
-        total_net = sum(payslips.mapped('net_wage'))
-        count = len(payslips)
+        summary = self.get_mobile_payslip_summary(employee_id)
+        return {
+            'total_net': summary['total_net'],
+            'average_net': summary['average_net'],
+            'count': summary['paid_count'],
+            'last_payment': summary['last_payment'],
+        }
 
+    @api.model
+    def get_mobile_payslip_summary(self, employee_id):
+        """
+        ملخص كشوف المرتبات للموظف من استعلام مجمع واحد حسب الحالة والسنة
+        لا يعتمد على عدد الكشوف، مناسب لسجل الموظفين القدامى
+        """
+        groups = self.sudo()._read_group(
+            [('employee_id', '=', employee_id)],
+            ['state', 'mobile_year'],
+            ['__count', 'net_wage:sum', 'mobile_allowance_total:sum', 'mobile_deduction_total:sum', 'date_from:max'],
+        )
+
+        current_year = fields.Date.today().year
+        by_state = {'draft': 0, 'verify': 0, 'done': 0, 'cancel': 0}
+        by_year = {}
+        total_count = 0
+        paid_count = 0
+        total_net = 0.0
+        last_payment = None
+        for state, year, count, net_total, allowance_total, deduction_total, last_date_from in groups:
+            total_count += count
+            if state in by_state:
+                by_state[state] += count
+            if state != 'done':
+                continue
+            paid_count += count
+            total_net += net_total
+            year_data = by_year.setdefault(year, {
+                'year': year, 'count': 0, 'net_total': 0.0, 'allowance_total': 0.0, 'deduction_total': 0.0,
+            })
+            year_data['count'] += count
+            year_data['net_total'] += net_total
+            year_data['allowance_total'] += allowance_total
+            year_data['deduction_total'] += deduction_total
+            if last_date_from and (not last_payment or last_date_from > last_payment):
+                last_payment = last_date_from
+
+        current_year_data = by_year.get(current_year, {})
         return {
             'total_net': total_net,
-            'average_net': total_net / count if count > 0 else 0,
-            'count': count,
-            'last_payment': payslips[0].date_from if payslips else None
+            'average_net': total_net / paid_count if paid_count else 0,
+            'last_payment': last_payment.isoformat() if last_payment else None,
+            'total_count': total_count,
+            'paid_count': paid_count,
+            'current_year_total': current_year_data.get('net_total', 0.0),
+            'current_year_count': current_year_data.get('count', 0),
+            'by_state': by_state,
+            'by_year': sorted(by_year.values(), key=lambda data: data['year'], reverse=True),
         }
 
+    @api.model
+    def get_mobile_payslip_years(self, employee_id):
+        """السنوات المتاحة لكشوف الموظف (ترتيب تنازلي)"""
+        groups = self.sudo()._read_group(
+            [('employee_id', '=', employee_id), ('mobile_year', '!=', 0)],
+            ['mobile_year'],
+        )
+        return sorted((year for year, in groups), reverse=True)
+
 
 class HrPayslipLine(models.Model):
     _inherit = 'hr.payslip.line'
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+from odoo.exceptions import AccessDenied
+from odoo.http import request
+
+
+class IrHttp(models.AbstractModel):
+    _inherit = 'ir.http'
+
+    @classmethod
+    def _auth_method_mobile_token(cls):
+        """
+        مصادقة طلبات التطبيق المحمول برمز الدخول (Authorization: Bearer <token>)
+        بدون تسجيل دخول المستخدم المشترك في كل طلب.
+        الطلبات بدون رمز تستخدم جلسة المستخدم كما في auth='user'.
+        """
+        authorization = request.httprequest.headers.get('Authorization', '')
+        if not authorization.startswith('Bearer '):
+            return cls._auth_method_user()
+
+        Token = request.env['hr.mobile.token'].sudo()
+        claims = Token.verify_token(authorization[7:].strip())
+        service_uid = Token._get_service_uid()
+        if not claims or not service_uid:
+            raise AccessDenied("Invalid or expired mobile token")
+
+        request.update_env(user=service_uid)
+        request.update_context(mobile_employee_id=claims['emp'])
@@ -11,6 +11,7 @@
         * Flexible journal entries with multi-account support
         * Calculate net profit per invoice
         * Profitability dashboard and reports
+        * Invoice cost of goods fixed at posting, with batched revaluation by period
         * Support for multiple expense types (commission, shipping, storage, etc.)
         * Amazon, Noon platform integration
         
@@ -30,6 +31,8 @@
         'views/invoice_expense_views.xml',
         'views/account_move_views.xml',
         'views/dashboard_views.xml',
+        'views/invoice_cost_revaluation_views.xml',
+        'data/invoice_cost_revaluation_cron.xml',
         #'reports/invoice_profitability_report.xml',
         #'reports/report_templates.xml',
     ],
@@ -5,3 +5,4 @@ from . import invoice_expense_line
 from . import account_move
 from . import invoice_profitability_wizard
 from . import invoice_profitability_dashboard
+from . import invoice_cost_revaluation
@@ -31,7 +31,8 @@ class AccountMove(models.Model):
         compute='_compute_invoice_cost',
         store=True,
         currency_field='currency_id',
-        help='Total cost of products in invoice lines'
+        help='Total cost of products in invoice lines, taken from the product cost when the '
+             'invoice is edited or posted. Use "Revalue Invoice Costs" to refresh it for a period.'
     )
     
     net_profit = fields.Monetary(
@@ -60,15 +61,19 @@ class AccountMove(models.Model):
             move.expense_count = len(distributions)
             move.total_expenses = sum(distributions.mapped('amount'))
 
-    @api.depends('invoice_line_ids', 'invoice_line_ids.product_id', 
-                 'invoice_line_ids.quantity', 'invoice_line_ids.product_id.standard_price')
+    @api.depends('invoice_line_ids', 'invoice_line_ids.product_id',
+                 'invoice_line_ids.quantity', 'state')
     def _compute_invoice_cost(self):
-        """Compute total cost of products in invoice"""
+        """Compute total cost of products in invoice.
+        Not triggered by product cost changes, historic invoices keep the cost of their posting
+        until they are revalued (see invoice.cost.revaluation).
+        """
         for move in self:
             if move.move_type == 'out_invoice':
                 cost = 0.0
                 for line in move.invoice_line_ids.filtered(lambda l: l.product_id):
-                    product_cost = line.product_id.standard_price
+                    # standard_price is company dependent, read it in the invoice company
+                    product_cost = line.product_id.with_company(move.company_id).standard_price
                     cost += product_cost * line.quantity
                 move.invoice_cost = cost
             else:
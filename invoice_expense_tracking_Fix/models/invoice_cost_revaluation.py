@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+
+_logger = logging.getLogger(__name__)
+
+# Stored invoice fields recomputed by a revaluation, in dependency order
+REVALUED_FIELDS = ['invoice_cost', 'net_profit', 'profit_margin']
+
+
+class InvoiceCostRevaluation(models.Model):
+    _name = 'invoice.cost.revaluation'
+    _description = 'Invoice Cost Revaluation'
+    _order = 'id desc'
+
+    name = fields.Char(
+        string='Reference',
+        compute='_compute_name',
+        store=True
+    )
+
+    date_from = fields.Date(
+        string='From Date',
+        required=True
+    )
+
+    date_to = fields.Date(
+        string='To Date',
+        required=True
+    )
+
+    batch_size = fields.Integer(
+        string='Batch Size',
+        default=500,
+        required=True,
+        help='Number of invoices recomputed per cron run'
+    )
+
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('cancelled', 'Cancelled')
+    ], string='Status', default='draft', required=True, readonly=True, copy=False)
+
+    last_invoice_id = fields.Integer(
+        string='Last Processed Invoice',
+        readonly=True,
+        copy=False,
+        help='Invoices are processed by increasing ID; the job resumes after this one'
+    )
+
+    invoice_count = fields.Integer(
+        string='Invoices',
+        readonly=True,
+        copy=False
+    )
+
+    processed_count = fields.Integer(
+        string='Processed',
+        readonly=True,
+        copy=False
+    )
+
+    @api.depends('date_from', 'date_to')
+    def _compute_name(self):
+        for record in self:
+            record.name = _('Cost revaluation %(date_from)s - %(date_to)s',
+                            date_from=record.date_from or '', date_to=record.date_to or '')
+
+    @api.constrains('date_from', 'date_to', 'batch_size')
+    def _check_dates(self):
+        for record in self:
+            if record.date_from and record.date_to and record.date_from > record.date_to:
+                raise ValidationError(_('The start date must be before the end date.'))
+            if record.batch_size <= 0:
+                raise ValidationError(_('The batch size must be positive.'))
+
+    def _get_invoices_domain(self):
+        self.ensure_one()
+        return [
+            ('move_type', '=', 'out_invoice'),
+            ('state', '=', 'posted'),
+            ('invoice_date', '>=', self.date_from),
+            ('invoice_date', '<=', self.date_to),
+        ]
+
+    def action_start(self):
+        """Start (or restart) the revaluation from the first invoice of the period"""
+        for record in self:
+            record.write({
+                'state': 'running',
+                'last_invoice_id': 0,
+                'processed_count': 0,
+                'invoice_count': self.env['account.move'].search_count(record._get_invoices_domain()),
+            })
+        self.env.ref('invoice_expense_tracking_Fix.ir_cron_invoice_cost_revaluation')._trigger()
+
+    def action_resume(self):
+        """Continue a cancelled revaluation after the last processed invoice"""
+        self.write({'state': 'running'})
+        self.env.ref('invoice_expense_tracking_Fix.ir_cron_invoice_cost_revaluation')._trigger()
+
+    def action_cancel(self):
+        self.write({'state': 'cancelled'})
+
+    def _process_batch(self):
+        """Recompute the cost of the next batch of invoices"""
+        self.ensure_one()
+        invoices = self.env['account.move'].search(
+            self._get_invoices_domain() + [('id', '>', self.last_invoice_id)],
+            order='id', limit=self.batch_size)
+
+        if invoices:
+            # The profit fields depend on invoice_cost but are not marked when it is recomputed
+            for fname in REVALUED_FIELDS:
+                self.env.add_to_compute(invoices._fields[fname], invoices)
+            invoices._recompute_recordset(REVALUED_FIELDS)
+            invoices.flush_recordset()
+
+        self.write({
+            'last_invoice_id': invoices[-1:].id or self.last_invoice_id,
+            'processed_count': self.processed_count + len(invoices),
+            'state': 'running' if len(invoices) == self.batch_size else 'done',
+        })
+
+    @api.model
+    def _cron_process_revaluations(self):
+        """Process one batch per running revaluation; retrigger until all are done"""
+        revaluations = self.search([('state', '=', 'running')], order='id')
+
+        for revaluation in revaluations:
+            try:
+                with self.env.cr.savepoint():
+                    revaluation._process_batch()
+            except Exception as e:
+                _logger.error("Error while revaluing invoice costs %s: %s", revaluation.id, str(e))
+                revaluation.write({'state': 'cancelled'})
+
+        if revaluations.filtered(lambda r: r.state == 'running'):
+            self.env.ref('invoice_expense_tracking_Fix.ir_cron_invoice_cost_revaluation')._trigger()
@@ -10,10 +10,12 @@
         Features:
         - Detailed ledger for customers and suppliers
         - Shows product line items for each invoice
-        - Opening and closing balances
+        - Opening and closing balances (one grouped query, cached monthly balances)
         - Includes payments and invoices
-        - Export to Excel
+        - Export to Excel (streamed, large ledgers are exported in the background)
         - Date range filtering
+        - Cached report runs, shown one page of partners at a time
+        - Indexed product search (name, internal reference, line description)
         - Partner filtering
     """,
     'author': 'Your Company',
@@ -23,6 +25,8 @@
     },
     'data': [
         'security/ir.model.access.csv',
+        'security/partner_ledger_security.xml',
+        'data/export_cron.xml',
         'views/partner_ledger_views.xml',
     ],
     'assets': {
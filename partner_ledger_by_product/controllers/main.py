@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+import tempfile
+from werkzeug.wsgi import wrap_file
+from odoo import http
+from odoo.http import request, content_disposition
+
+from ..models.partner_ledger_wizard import XLSX_MIMETYPE
+
+
+class PartnerLedgerController(http.Controller):
+
+    @http.route('/partner_ledger/export_excel/<int:wizard_id>', type='http', auth='user', methods=['GET'])
+    def export_excel(self, wizard_id, **kwargs):
+        """Stream the partner ledger Excel file, written partner by partner to a temporary file"""
+        wizard = request.env['partner.ledger.wizard'].browse(wizard_id).exists()
+        if not wizard:
+            return request.not_found()
+
+        output = tempfile.TemporaryFile()
+        try:
+            wizard._write_excel(output)
+        except Exception:
+            output.close()
+            raise
+        size = output.tell()
+        output.seek(0)
+
+        return request.make_response(
+            wrap_file(request.httprequest.environ, output),
+            headers=[
+                ('Content-Type', XLSX_MIMETYPE),
+                ('Content-Disposition', content_disposition(wizard._get_export_filename())),
+                ('Content-Length', size),
+            ]
+        )
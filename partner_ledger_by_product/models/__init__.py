@@ -1 +1,7 @@
-from . import partner_ledger_wizard
\ No newline at end of file
+from . import partner_ledger_wizard
+from . import partner_ledger_export_job
+from . import partner_ledger_change
+from . import partner_balance_snapshot
+from . import account_move
+from . import partner_ledger_run
+from . import product
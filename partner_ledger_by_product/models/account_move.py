@@ -0,0 +1,36 @@
+from odoo import models, fields
+
+
+class AccountMove(models.Model):
+    _inherit = 'account.move'
+
+    def _get_ledger_snapshot_dates(self):
+        """أقدم تاريخ متأثر لكل شركة (تاريخ القيد أو تاريخ الفاتورة)"""
+        dates_by_company = {}
+        for move in self:
+            dates = [d for d in (move.date, move.invoice_date) if d]
+            if not dates:
+                continue
+            first_date = min(dates)
+            company_id = move.company_id.id
+            if company_id not in dates_by_company or first_date < dates_by_company[company_id]:
+                dates_by_company[company_id] = first_date
+        return dates_by_company
+
+    def write(self, vals):
+        if 'state' not in vals:
+            return super().write(vals)
+        dates_by_company = self._get_ledger_snapshot_dates()
+        res = super().write(vals)
+        for company_id, first_date in self._get_ledger_snapshot_dates().items():
+            if company_id not in dates_by_company or first_date < dates_by_company[company_id]:
+                dates_by_company[company_id] = first_date
+        self.env['partner.ledger.change']._record(dates_by_company)
+        return res
+
+
+class AccountMoveLine(models.Model):
+    _inherit = 'account.move.line'
+
+    # فهرس trigram لبحث كشف الحساب في وصف السطور (ilike)
+    name = fields.Char(index='trigram')
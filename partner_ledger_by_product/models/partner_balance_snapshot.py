@@ -0,0 +1,153 @@
+from odoo import models, fields, api
+from odoo.osv import expression
+from datetime import timedelta
+import logging
+
+_logger = logging.getLogger(__name__)
+
+RECEIVABLE_PAYABLE_TYPES = ['asset_receivable', 'liability_payable']
+
+
+class PartnerLedgerBalanceSnapshot(models.Model):
+    """
+    رصيد كل شريك في نهاية كل شهر (لكل شركة).
+    الرصيد الافتتاحي = رصيد آخر شهر محفوظ + حركات الأيام بعده فقط،
+    فالفترات القديمة لا يعاد حسابها في كل تقرير.
+    يتم حذف الشهور المتأثرة بترحيل أو إلغاء ترحيل أي قيد بتاريخ قديم (partner.ledger.change)
+    قبل استخدام الأرصدة، بدون أي قفل في معاملة الترحيل.
+    """
+    _name = 'partner.ledger.balance.snapshot'
+    _description = 'Partner Ledger Monthly Balance Snapshot'
+    _order = 'period_end desc, company_id, partner_id'
+    _log_access = False
+
+    company_id = fields.Many2one('res.company', string='Company', required=True, readonly=True,
+                                 ondelete='cascade', index=True)
+    period_end = fields.Date(string='Period End', required=True, readonly=True, index=True)
+    partner_id = fields.Many2one('res.partner', string='Partner', required=True, readonly=True,
+                                 ondelete='cascade')
+    balance = fields.Monetary(string='Balance', readonly=True, currency_field='currency_id')
+    currency_id = fields.Many2one(related='company_id.currency_id')
+    # snapshot قاعدة البيانات الذي حسب منه الرصيد (txid_current_snapshot)
+    data_snapshot = fields.Char(string='Data Snapshot', readonly=True)
+
+    _sql_constraints = [
+        ('period_partner_uniq', 'unique(company_id, period_end, partner_id)',
+         'Only one balance snapshot per partner and period is allowed.'),
+    ]
+
+    @api.model
+    def _ledger_date_domain(self, operator, value):
+        """تاريخ الحركة في كشف الحساب: تاريخ الفاتورة للفواتير وتاريخ القيد لغيرها"""
+        return [
+            '|',
+            '&', ('move_id.invoice_date', '!=', False), ('move_id.invoice_date', operator, value),
+            '&', ('move_id.invoice_date', '=', False), ('date', operator, value),
+        ]
+
+    @api.model
+    def _get_balance_domain(self, companies, partner_ids=None):
+        domain = [
+            ('parent_state', '=', 'posted'),
+            ('partner_id', '!=', False),
+            ('account_id.account_type', 'in', RECEIVABLE_PAYABLE_TYPES),
+            ('company_id', 'in', companies.ids),
+        ]
+        if partner_ids is not None:
+            domain.append(('partner_id.commercial_partner_id', 'in', list(partner_ids)))
+        return domain
+
+    @api.model
+    def _sum_balances(self, domain, balances):
+        """
+        جمع رصيد سطور الذمم (مدين - دائن) في استعلام مجمع واحد، لكل شريك تجاري
+        (الشركة الأم لجهات الاتصال) مثل تجميع الحركات في كشف الحساب
+        """
+        for partner, balance in self.env['account.move.line']._read_group(
+                domain, ['partner_id'], ['balance:sum']):
+            commercial_partner_id = partner.commercial_partner_id.id
+            balances[commercial_partner_id] = balances.get(commercial_partner_id, 0.0) + balance
+        return balances
+
+    @api.model
+    def _get_opening_balances(self, date_from, partner_ids, use_snapshots=True):
+        """
+        الأرصدة الافتتاحية لمجموعة شركاء قبل date_from: {partner_id: balance}.
+        بدون الجدول: استعلام مجمع واحد على account.move.line لكل الفترة السابقة.
+        مع الجدول: رصيد نهاية الشهر السابق + حركات الأيام من بداية الشهر فقط.
+        """
+        if not partner_ids:
+            return {}
+        companies = self.env.companies
+        date_from = fields.Date.to_date(date_from)
+        balances = {}
+
+        domain = self._get_balance_domain(companies, partner_ids)
+        if use_snapshots:
+            period_end = date_from.replace(day=1) - timedelta(days=1)
+            for snapshot in self.sudo()._ensure_period(period_end, companies).filtered(
+                    lambda s: s.partner_id.id in partner_ids):
+                balances[snapshot.partner_id.id] = balances.get(snapshot.partner_id.id, 0.0) + snapshot.balance
+            domain = expression.AND([domain, self._ledger_date_domain('>', period_end)])
+
+        domain = expression.AND([domain, self._ledger_date_domain('<', date_from)])
+        return self._sum_balances(domain, balances)
+
+    @api.model
+    def _delete_stale(self, company_ids=None):
+        """حذف الشهور التي تغيرت حركاتها (حتى نهاية الشهر) بعد حساب أرصدتها"""
+        query = """
+            DELETE FROM partner_ledger_balance_snapshot s
+             USING partner_ledger_change c
+             WHERE c.company_id = s.company_id
+               AND c.date <= s.period_end
+               AND (s.data_snapshot IS NULL
+                    OR NOT txid_visible_in_snapshot(c.transaction_id::bigint, s.data_snapshot::txid_snapshot))
+        """
+        params = []
+        if company_ids is not None:
+            query += " AND s.company_id = ANY(%s)"
+            params.append(list(company_ids))
+        self.env.cr.execute(query, params)
+        if self.env.cr.rowcount:
+            self.invalidate_model()
+
+    def _ensure_period(self, period_end, companies):
+        """
+        أرصدة نهاية الشهر period_end لكل الشركاء، تبنى عند أول طلب
+        من آخر شهر محفوظ قبلها + حركات الشهور بينهما.
+        """
+        snapshots = self.browse()
+        self._delete_stale(companies.ids)
+        for company in companies:
+            existing = self.search([('company_id', '=', company.id), ('period_end', '=', period_end)])
+            if existing:
+                snapshots |= existing
+                continue
+
+            previous = self.search([
+                ('company_id', '=', company.id),
+                ('period_end', '<', period_end),
+            ], order='period_end desc', limit=1)
+            balances = {}
+            domain = self._get_balance_domain(company)
+            if previous:
+                for snapshot in self.search([('company_id', '=', company.id),
+                                             ('period_end', '=', previous.period_end)]):
+                    balances[snapshot.partner_id.id] = snapshot.balance
+                domain = expression.AND([domain, self._ledger_date_domain('>', previous.period_end)])
+            domain = expression.AND([domain, self._ledger_date_domain('<=', period_end)])
+            self.with_company(company)._sum_balances(domain, balances)
+
+            # نفس الشهر قد يكون بني في معاملة أخرى في نفس الوقت
+            self.env.cr.execute("""
+                INSERT INTO partner_ledger_balance_snapshot
+                       (company_id, period_end, partner_id, balance, data_snapshot)
+                SELECT %s, %s, s.partner_id, s.balance, txid_current_snapshot()::text
+                  FROM unnest(%s::int[], %s::numeric[]) AS s(partner_id, balance)
+                    ON CONFLICT (company_id, period_end, partner_id) DO NOTHING
+            """, [company.id, period_end, list(balances), list(balances.values())])
+            snapshots |= self.search([('company_id', '=', company.id), ('period_end', '=', period_end)])
+            _logger.info("Partner balance snapshot built for %s at %s (%s partners)",
+                         company.name, period_end, len(balances))
+        return snapshots
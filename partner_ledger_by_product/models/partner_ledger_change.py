@@ -0,0 +1,63 @@
+from odoo import models, fields, api
+from datetime import timedelta
+
+# عدد الأيام التي يبقى فيها سجل التغيير (أطول من مدة حفظ نتائج التقارير)
+CHANGE_KEEP_DAYS = 2
+
+
+class PartnerLedgerChange(models.Model):
+    """
+    سجل التواريخ التي تغيرت حركاتها (ترحيل أو إلغاء ترحيل قيد) لكل شركة.
+    الترحيل يضيف سطراً فقط بدون قفل أو تعديل سطر مشترك، ويحفظ رقم معاملته (txid).
+    الأرصدة المحفوظة ونتائج التقارير تحفظ snapshot قاعدة البيانات وقت حسابها،
+    وتعتبر قديمة إذا وجد تغيير بتاريخ داخل فترتها لم يكن ظاهراً لها
+    (حتى لو تم الترحيل في نفس وقت الحساب ولم يحفظ إلا بعده).
+    """
+    _name = 'partner.ledger.change'
+    _description = 'Partner Ledger Change'
+    _order = 'id desc'
+    _log_access = False
+
+    company_id = fields.Many2one('res.company', string='Company', required=True, readonly=True,
+                                 ondelete='cascade', index=True)
+    date = fields.Date(string='First Affected Date', required=True, readonly=True)
+    transaction_id = fields.Char(string='Transaction', required=True, readonly=True)
+    recorded_at = fields.Datetime(string='Recorded At', required=True, readonly=True)
+
+    @api.model
+    def _record(self, dates_by_company):
+        """تسجيل أقدم تاريخ متأثر لكل شركة في معاملة الترحيل الحالية"""
+        if not dates_by_company:
+            return
+        self.env.cr.execute("""
+            INSERT INTO partner_ledger_change (company_id, date, transaction_id, recorded_at)
+            SELECT c.company_id, c.date, txid_current()::text, now() at time zone 'UTC'
+              FROM unnest(%s::int[], %s::date[]) AS c(company_id, date)
+        """, [list(dates_by_company), list(dates_by_company.values())])
+
+    @api.model
+    def _get_data_snapshot(self):
+        """snapshot المعاملة الحالية، يحفظ مع الأرصدة أو النتيجة المحسوبة منها"""
+        self.env.cr.execute("SELECT txid_current_snapshot()::text")
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _has_unseen_changes(self, company_ids, date_to, data_snapshot):
+        """هل تغيرت حركات حتى date_to بعد حساب نتيجة محفوظة بهذا الـ snapshot؟"""
+        self.env.cr.execute("""
+            SELECT 1
+              FROM partner_ledger_change
+             WHERE company_id = ANY(%s)
+               AND date <= %s
+               AND NOT txid_visible_in_snapshot(transaction_id::bigint, %s::txid_snapshot)
+             LIMIT 1
+        """, [list(company_ids), date_to, data_snapshot])
+        return bool(self.env.cr.fetchone())
+
+    @api.autovacuum
+    def _gc_changes(self):
+        """حذف الأرصدة التي أصبحت قديمة ثم التغييرات التي لم تعد تؤثر على أي نتيجة محفوظة"""
+        self.env['partner.ledger.balance.snapshot']._delete_stale()
+        self.env.cr.execute(
+            "DELETE FROM partner_ledger_change WHERE recorded_at < %s",
+            [fields.Datetime.now() - timedelta(days=CHANGE_KEEP_DAYS)])
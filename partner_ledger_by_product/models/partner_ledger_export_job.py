@@ -0,0 +1,98 @@
+from odoo import models, fields, api
+from datetime import timedelta
+import logging
+import tempfile
+
+from .partner_ledger_wizard import XLSX_MIMETYPE
+
+_logger = logging.getLogger(__name__)
+
+# عدد الأيام التي تبقى فيها ملفات التصدير قبل حذفها
+EXPORT_JOB_RETENTION_DAYS = 2
+
+
+class PartnerLedgerExportJob(models.Model):
+    """
+    تصدير كشف الحساب إلى Excel في الخلفية للكشوف الكبيرة.
+    الطلب يحفظ فلاتر التقرير، فلا يتأثر بحذف المعالج (TransientModel) أثناء التصدير أو بعده.
+    """
+    _name = 'partner.ledger.export.job'
+    _description = 'Partner Ledger Excel Export Job'
+    _order = 'id desc'
+
+    date_from = fields.Date(string='From Date', required=True)
+    date_to = fields.Date(string='To Date', required=True)
+    partner_type = fields.Selection([
+        ('customer', 'Customers Only'),
+        ('supplier', 'Suppliers Only'),
+        ('all', 'All Partners'),
+    ], string='Partner Type', default='all', required=True)
+    partner_ids = fields.Many2many('res.partner', string='Partners')
+    product_ids = fields.Many2many('product.product', string='Products')
+    search_text = fields.Char(string='Search')
+    company_ids = fields.Many2many('res.company', string='Companies')
+    state = fields.Selection([
+        ('pending', 'Exporting'),
+        ('done', 'Ready'),
+        ('failed', 'Failed'),
+    ], string='Status', default='pending', required=True, index=True)
+    attachment_id = fields.Many2one('ir.attachment', string='Excel File', readonly=True, ondelete='set null')
+    error_message = fields.Text(string='Error', readonly=True)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        jobs = super().create(vals_list)
+        self.env.ref('partner_ledger_by_product.ir_cron_partner_ledger_export')._trigger()
+        return jobs
+
+    def unlink(self):
+        self.sudo().attachment_id.unlink()
+        return super().unlink()
+
+    def _process(self):
+        """إنشاء ملف Excel بصلاحيات وشركات المستخدم الذي طلب التصدير"""
+        self.ensure_one()
+        wizard = self.env['partner.ledger.wizard'].with_user(self.create_uid).with_context(
+            allowed_company_ids=self.company_ids.ids,
+        ).create({
+            'date_from': self.date_from,
+            'date_to': self.date_to,
+            'partner_type': self.partner_type,
+            'partner_ids': [(6, 0, self.partner_ids.ids)],
+            'product_ids': [(6, 0, self.product_ids.ids)],
+            'search_text': self.search_text,
+        })
+        with tempfile.TemporaryFile() as output:
+            wizard._write_excel(output)
+            output.seek(0)
+            attachment = self.env['ir.attachment'].create({
+                'name': wizard._get_export_filename(),
+                'type': 'binary',
+                'raw': output.read(),
+                'mimetype': XLSX_MIMETYPE,
+                'res_model': self._name,
+                'res_id': self.id,
+            })
+        self.write({'state': 'done', 'attachment_id': attachment.id})
+
+    @api.model
+    def _cron_process_jobs(self, batch_size=2):
+        """تنفيذ طلبات تصدير كشوف الحساب الكبيرة المعلقة"""
+        jobs = self.search([('state', '=', 'pending')], order='id', limit=batch_size)
+
+        for job in jobs:
+            try:
+                with self.env.cr.savepoint():
+                    job._process()
+            except Exception as e:
+                _logger.error("Error while exporting partner ledger job %s: %s", job.id, str(e))
+                job.write({'state': 'failed', 'error_message': str(e)})
+
+        if len(jobs) == batch_size:
+            self.env.ref('partner_ledger_by_product.ir_cron_partner_ledger_export')._trigger()
+
+    @api.autovacuum
+    def _gc_export_jobs(self):
+        """حذف طلبات التصدير القديمة وملفاتها"""
+        limit_date = fields.Datetime.now() - timedelta(days=EXPORT_JOB_RETENTION_DAYS)
+        self.search([('create_date', '<', limit_date)]).unlink()
@@ -0,0 +1,72 @@
+from odoo import models, fields, api
+from datetime import timedelta
+import hashlib
+import json
+
+# عدد الساعات التي تبقى فيها نتائج التقرير محفوظة
+RUN_CACHE_HOURS = 24
+
+
+class PartnerLedgerRun(models.Model):
+    """
+    نتيجة تشغيل كشف الحساب لمجموعة فلاتر محددة.
+    يتم حفظ HTML كل شريك في قسم منفصل وتعرض الأقسام صفحة بصفحة،
+    وتشغيل نفس الفلاتر مرة أخرى يستخدم النتيجة المحفوظة مباشرة.
+    """
+    _name = 'partner.ledger.run'
+    _description = 'Partner Ledger Run'
+    _order = 'id desc'
+
+    cache_key = fields.Char(string='Cache Key', required=True, index=True, readonly=True)
+    date_from = fields.Date(string='From Date', readonly=True)
+    date_to = fields.Date(string='To Date', readonly=True)
+    partner_count = fields.Integer(string='Partners', readonly=True)
+    transaction_count = fields.Integer(string='Transactions', readonly=True)
+    total_debit = fields.Float(string='Total Debit', readonly=True)
+    total_credit = fields.Float(string='Total Credit', readonly=True)
+    company_ids = fields.Many2many('res.company', string='Companies', readonly=True)
+    # snapshot قاعدة البيانات الذي حسبت منه النتيجة (partner.ledger.change)
+    data_snapshot = fields.Char(string='Data Snapshot', readonly=True)
+    section_ids = fields.One2many('partner.ledger.run.section', 'run_id', string='Partner Sections', readonly=True)
+
+    @api.model
+    def _get_cache_key(self, filters):
+        """مفتاح ثابت لمجموعة الفلاتر (التواريخ، الشركاء، المنتجات، البحث، الشركات)"""
+        payload = json.dumps(filters, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @api.model
+    def _find_cached(self, cache_key):
+        """
+        آخر نتيجة لنفس الفلاتر لم تتغير حركات شركاتها حتى نهاية فترتها منذ حسابها.
+        الترحيل لا يحذف النتائج، النتائج القديمة تحذف في التنظيف الدوري.
+        """
+        limit_date = fields.Datetime.now() - timedelta(hours=RUN_CACHE_HOURS)
+        Change = self.env['partner.ledger.change']
+        for run in self.search([
+            ('cache_key', '=', cache_key),
+            ('create_uid', '=', self.env.uid),
+            ('create_date', '>=', limit_date),
+        ]):
+            if run.data_snapshot and not Change._has_unseen_changes(
+                    run.company_ids.ids, run.date_to, run.data_snapshot):
+                return run
+        return self.browse()
+
+    @api.autovacuum
+    def _gc_runs(self):
+        """حذف نتائج التقارير القديمة"""
+        limit_date = fields.Datetime.now() - timedelta(hours=RUN_CACHE_HOURS)
+        self.search([('create_date', '<', limit_date)]).unlink()
+
+
+class PartnerLedgerRunSection(models.Model):
+    _name = 'partner.ledger.run.section'
+    _description = 'Partner Ledger Run Section'
+    _order = 'run_id, sequence'
+
+    run_id = fields.Many2one('partner.ledger.run', string='Run', required=True, ondelete='cascade', index=True)
+    sequence = fields.Integer(string='Sequence')
+    partner_id = fields.Many2one('res.partner', string='Partner', readonly=True)
+    # لا يتم تحميل HTML إلا للأقسام المعروضة في الصفحة الحالية
+    html = fields.Html(string='HTML', sanitize=False, prefetch=False, readonly=True)
@@ -1,10 +1,18 @@
 from odoo import models, fields, api
+from odoo.osv import expression
 from datetime import datetime, timedelta
-from collections import defaultdict
 import logging
 
 _logger = logging.getLogger(__name__)
 
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+# عدد الحركات الذي يتم بعده تصدير Excel في الخلفية
+DEFAULT_EXPORT_BACKGROUND_THRESHOLD = 50000
+# عدد الشركاء في كل صفحة من التقرير
+PARTNERS_PER_PAGE = 20
+# عدد أقسام الشركاء التي يتم حفظها مرة واحدة أثناء التشغيل
+RUN_SECTION_BATCH = 100
+
 
 class PartnerLedgerWizard(models.TransientModel):
     _name = 'partner.ledger.wizard'
@@ -21,67 +29,116 @@ class PartnerLedgerWizard(models.TransientModel):
     product_ids = fields.Many2many('product.product', string='Products', domain=[('sale_ok', '=', True)])
     search_text = fields.Char('Search')
     report_html = fields.Html('Report Results', compute='_compute_report_html')
-
-    @api.depends('date_from', 'date_to', 'partner_ids', 'partner_type', 'product_ids', 'search_text')
+    run_id = fields.Many2one('partner.ledger.run', string='Report Run', readonly=True, copy=False)
+    page = fields.Integer('Page', default=1)
+    page_count = fields.Integer('Pages', compute='_compute_page_count')
+    export_job_id = fields.Many2one('partner.ledger.export.job', string='Excel Export Job', readonly=True,
+                                    copy=False, ondelete='set null')
+    export_state = fields.Selection(related='export_job_id.state', string='Excel Export')
+
+    @api.depends('run_id', 'page')
     def _compute_report_html(self):
+        # التقرير يحسب فقط عند الضغط على Run Report، وهنا يتم عرض صفحة واحدة من النتيجة المحفوظة
         for wizard in self:
-            data = wizard._get_report_data()
-            wizard.report_html = wizard._generate_html_report(data)
-
-    def _get_opening_balance(self, partner_id):
-        domain = [
-            ('partner_id', '=', partner_id),
-            ('state', '=', 'posted'),
-        ]
+            if not wizard.run_id:
+                wizard.report_html = ('<div style="text-align:center; padding:50px; color:#999;">'
+                                      'Choose the filters and press <strong>Run Report</strong></div>')
+                continue
+            sections = self.env['partner.ledger.run.section'].search(
+                [('run_id', '=', wizard.run_id.id)],
+                offset=(wizard.page - 1) * PARTNERS_PER_PAGE,
+                limit=PARTNERS_PER_PAGE,
+            )
+            wizard.report_html = wizard._generate_html_report(wizard.run_id, ''.join(sections.mapped('html')))
+
+    @api.depends('run_id')
+    def _compute_page_count(self):
+        for wizard in self:
+            wizard.page_count = max(1, -(-wizard.run_id.partner_count // PARTNERS_PER_PAGE))
 
-        invoices = self.env['account.move'].search(
-            domain + [
-                ('move_type', 'in', ['out_invoice', 'in_invoice', 'out_refund', 'in_refund']),
-                ('invoice_date', '<', self.date_from)
-            ])
-
-        invoice_balance = 0
-        for inv in invoices:
-            if inv.move_type in ['out_invoice', 'in_refund']:
-                invoice_balance += inv.amount_total
-            else:
-                invoice_balance -= inv.amount_total
-
-        payments = self.env['account.payment'].search(
-            domain + [('date', '<', self.date_from)])
-
-        payment_balance = 0
-        for pay in payments:
-            if pay.payment_type == 'inbound':
-                payment_balance -= pay.amount
-            elif pay.payment_type == 'outbound':
-                payment_balance += pay.amount
+    @api.onchange('date_from', 'date_to', 'partner_ids', 'partner_type', 'product_ids', 'search_text')
+    def _onchange_filters(self):
+        self.run_id = False
+        self.page = 1
 
-        # جمع IDs الـ moves بتاعة الـ payments عشان نستثنيها
-        payment_move_ids = payments.mapped('move_id').ids
-
-        # إضافة Journal Entries الأخرى للـ opening balance
-        journal_entry_domain = [
-            ('partner_id', '=', partner_id),
-            ('move_id.state', '=', 'posted'),
-            ('date', '<', self.date_from),
-            ('account_id.account_type', 'in', ['asset_receivable', 'liability_payable']),
-            ('move_id.move_type', '=', 'entry'),
-        ]
+    def action_run_report(self):
+        """تشغيل التقرير، أو استخدام النتيجة المحفوظة لنفس الفلاتر"""
+        self.ensure_one()
+        Run = self.env['partner.ledger.run']
+        cache_key = Run._get_cache_key(self._get_run_filters())
+        run = Run._find_cached(cache_key) or self._execute_run(cache_key)
+        self.write({'run_id': run.id, 'page': 1})
 
-        # استثناء الـ moves بتاعة الـ payments
-        if payment_move_ids:
-            journal_entry_domain.append(('move_id', 'not in', payment_move_ids))
+    def action_next_page(self):
+        self.ensure_one()
+        self.page = min(self.page + 1, self.page_count)
 
-        journal_entries = self.env['account.move.line'].search(journal_entry_domain)
+    def action_previous_page(self):
+        self.ensure_one()
+        self.page = max(self.page - 1, 1)
 
-        journal_balance = 0
-        for je in journal_entries:
-            journal_balance += je.debit - je.credit
+    def _get_run_filters(self):
+        self.ensure_one()
+        return {
+            'date_from': self.date_from,
+            'date_to': self.date_to,
+            'partner_type': self.partner_type,
+            'partner_ids': sorted(self.partner_ids.ids),
+            'product_ids': sorted(self.product_ids.ids),
+            'search_text': ' '.join((self.search_text or '').lower().split()),
+            'company_ids': sorted(self.env.companies.ids),
+        }
 
-        return invoice_balance + payment_balance + journal_balance
+    def _execute_run(self, cache_key):
+        """حساب كشف الحساب مرة واحدة وحفظ HTML كل شريك في قسم منفصل"""
+        self.ensure_one()
+        # أي ترحيل لا يظهر في snapshot هذه المعاملة يجعل النتيجة قديمة
+        run = self.env['partner.ledger.run'].create({
+            'cache_key': cache_key,
+            'date_from': self.date_from,
+            'date_to': self.date_to,
+            'company_ids': [(6, 0, self.env.companies.ids)],
+            'data_snapshot': self.env['partner.ledger.change']._get_data_snapshot(),
+        })
+        totals = {'partner_count': 0, 'transaction_count': 0, 'total_debit': 0.0, 'total_credit': 0.0}
+        section_vals = []
+
+        invoices, payments, journal_entries = self._get_ledger_records()
+        for partner_ledger in self._iter_partner_ledgers(invoices, payments, journal_entries):
+            totals['partner_count'] += 1
+            for trans in partner_ledger['transactions']:
+                totals['transaction_count'] += 1
+                totals['total_debit'] += trans['current_dr']
+                totals['total_credit'] += trans['current_cr']
+            section_vals.append({
+                'run_id': run.id,
+                'sequence': totals['partner_count'],
+                'partner_id': partner_ledger['partner_id'],
+                'html': self._generate_html_rows(self._format_partner_rows(partner_ledger)),
+            })
+            if len(section_vals) >= RUN_SECTION_BATCH:
+                self.env['partner.ledger.run.section'].create(section_vals)
+                section_vals = []
+                self.env.invalidate_all()
+
+        self.env['partner.ledger.run.section'].create(section_vals)
+        run.write(totals)
+        return run
+
+    def _get_opening_balances(self, partner_ids):
+        """
+        الأرصدة الافتتاحية لكل الشركاء في استعلام مجمع واحد على سطور الذمم (مدين - دائن).
+        جدول أرصدة نهاية الشهور يستخدم افتراضياً ويمكن إيقافه من المعامل
+        partner_ledger_by_product.use_balance_snapshots = 0
+        """
+        self.ensure_one()
+        use_snapshots = self.env['ir.config_parameter'].sudo().get_param(
+            'partner_ledger_by_product.use_balance_snapshots', '1') not in ('0', 'False', 'false')
+        return self.env['partner.ledger.balance.snapshot']._get_opening_balances(
+            self.date_from, set(partner_ids), use_snapshots=use_snapshots)
 
-    def _get_report_data(self):
+    def _get_ledger_records(self):
+        """الفواتير والدفعات والقيود خلال الفترة (المعرفات فقط، بدون تحميل البيانات)"""
         self.ensure_one()
 
         invoice_domain = [
@@ -92,7 +149,7 @@ class PartnerLedgerWizard(models.TransientModel):
         ]
 
         if self.partner_ids:
-            invoice_domain.append(('partner_id', 'in', self.partner_ids.ids))
+            invoice_domain.append(('commercial_partner_id', 'in', self.partner_ids.commercial_partner_id.ids))
         elif self.partner_type == 'customer':
             invoice_domain.append(('partner_id.customer_rank', '>', 0))
             invoice_domain.append(('move_type', 'in', ['out_invoice', 'out_refund']))
@@ -100,6 +157,10 @@ class PartnerLedgerWizard(models.TransientModel):
             invoice_domain.append(('partner_id.supplier_rank', '>', 0))
             invoice_domain.append(('move_type', 'in', ['in_invoice', 'in_refund']))
 
+        # فلتر المنتجات والبحث يتم في قاعدة البيانات: الفواتير التي فيها سطر مطابق فقط
+        if self.product_ids or self.search_text:
+            invoice_domain.append(('invoice_line_ids', 'any', self._get_invoice_line_domain()))
+
         invoices = self.env['account.move'].search(invoice_domain, order='invoice_date, name')
 
         # تصحيح الحالة - في Odoo 18 الحالة هي 'paid' مش 'posted'
@@ -111,7 +172,8 @@ class PartnerLedgerWizard(models.TransientModel):
         ]
 
         if self.partner_ids:
-            payment_domain.append(('partner_id', 'in', self.partner_ids.ids))
+            payment_domain.append(
+                ('partner_id.commercial_partner_id', 'in', self.partner_ids.commercial_partner_id.ids))
         elif self.partner_type == 'customer':
             payment_domain.append(('partner_id.customer_rank', '>', 0))
             payment_domain.append(('partner_type', '=', 'customer'))
@@ -139,7 +201,8 @@ class PartnerLedgerWizard(models.TransientModel):
             journal_entry_domain.append(('move_id', 'not in', payment_move_ids))
 
         if self.partner_ids:
-            journal_entry_domain.append(('partner_id', 'in', self.partner_ids.ids))
+            journal_entry_domain.append(
+                ('partner_id.commercial_partner_id', 'in', self.partner_ids.commercial_partner_id.ids))
         elif self.partner_type == 'customer':
             journal_entry_domain.append(('partner_id.customer_rank', '>', 0))
             journal_entry_domain.append(('account_id.account_type', '=', 'asset_receivable'))
@@ -152,52 +215,75 @@ class PartnerLedgerWizard(models.TransientModel):
         _logger.info(
             f"Found {len(invoices)} invoices, {len(payments)} payments, and {len(journal_entries)} journal entries")
 
-        if payments:
-            _logger.info(f"Payment details: {[(p.name, p.partner_id.name, p.amount, p.state) for p in payments[:5]]}")
-        else:
+        if not payments:
             _logger.warning(f"No payments found with domain: {payment_domain}")
 
-        if not invoices and not payments and not journal_entries:
-            return {'summary': {}, 'rows': []}
-
-        partner_data = self._process_partner_transactions(invoices, payments, journal_entries)
-        return partner_data
-
-    def _process_partner_transactions(self, invoices, payments, journal_entries):
-        partner_dict = defaultdict(lambda: {
-            'partner_name': '',
-            'partner_id': 0,
-            'opening_balance': 0,
-            'transactions': [],
-            'closing_balance': 0,
-        })
-
-        all_partners = set()
-        for inv in invoices:
-            all_partners.add(inv.partner_id.id)
-        for pay in payments:
-            all_partners.add(pay.partner_id.id)
-        for je in journal_entries:
-            all_partners.add(je.partner_id.id)
+        return invoices, payments, journal_entries
 
-        for partner_id in all_partners:
+    def _get_invoice_line_domain(self):
+        """
+        سطور المنتجات المطابقة للفلاتر. كل كلمة في البحث يجب أن توجد في اسم المنتج
+        أو الكود أو وصف السطر أو اسم الشريك (ilike يستخدم فهارس trigram).
+        """
+        self.ensure_one()
+        domain = [('display_type', '=', 'product'), ('product_id', '!=', False)]
+        if self.product_ids:
+            domain.append(('product_id', 'in', self.product_ids.ids))
+        for term in (self.search_text or '').split():
+            domain = expression.AND([domain, expression.OR([
+                [('product_id.name', 'ilike', term)],
+                [('product_id.default_code', 'ilike', term)],
+                [('name', 'ilike', term)],
+                [('move_id.partner_id.name', 'ilike', term)],
+            ])])
+        return domain
+
+    def _get_invoice_lines(self, invoices):
+        """السطور المطابقة لمجموعة فواتير في استعلام واحد: {فاتورة: سطور}"""
+        if not invoices:
+            return {}
+        lines = self.env['account.move.line'].search(
+            expression.AND([self._get_invoice_line_domain(), [('move_id', 'in', invoices.ids)]]),
+            order='move_id, sequence, id',
+        )
+        return lines.grouped('move_id')
+
+    def _iter_partner_ledgers(self, invoices, payments, journal_entries):
+        """
+        كشف حساب كل شريك على حدة بترتيب أسماء الشركاء.
+        سجلات كل شريك تحمل بمفردها (بدون prefetch لباقي الفترة) حتى يمكن
+        تفريغ الذاكرة المؤقتة بين الشركاء عند التصدير.
+        الحركات تجمع على الشريك التجاري (جهات الاتصال مع شركتها) مثل الأرصدة الافتتاحية.
+        """
+        invoices_by_partner = invoices.grouped('commercial_partner_id')
+        payments_by_partner = payments.grouped(lambda payment: payment.partner_id.commercial_partner_id)
+        journal_entries_by_partner = journal_entries.grouped(lambda line: line.partner_id.commercial_partner_id)
+
+        partner_ids = {p.id for p in invoices_by_partner} | {p.id for p in payments_by_partner}
+        partner_ids |= {p.id for p in journal_entries_by_partner}
+        partner_ids.discard(False)
+        partners = self.env['res.partner'].browse(partner_ids)
+        partner_names = sorted(((partner.name or '', partner.id) for partner in partners))
+        opening_balances = self._get_opening_balances(partner_ids)
+
+        for partner_name, partner_id in partner_names:
             partner = self.env['res.partner'].browse(partner_id)
-            partner_dict[partner_id]['partner_name'] = partner.name
-            partner_dict[partner_id]['partner_id'] = partner_id
-            opening_balance = self._get_opening_balance(partner_id)
-            partner_dict[partner_id]['opening_balance'] = opening_balance
+            opening_balance = opening_balances.get(partner_id, 0.0)
 
             transactions = []
 
-            partner_invoices = invoices.filtered(lambda i: i.partner_id.id == partner_id)
+            partner_invoices = invoices_by_partner.get(partner, invoices.browse()).with_prefetch()
+            lines_by_invoice = self._get_invoice_lines(partner_invoices)
             for invoice in partner_invoices:
-                transactions.extend(self._process_invoice(invoice))
+                transactions.extend(self._process_invoice(
+                    invoice, lines_by_invoice.get(invoice, self.env['account.move.line'])))
 
-            partner_payments = payments.filtered(lambda p: p.partner_id.id == partner_id)
+            partner_payments = payments_by_partner.get(partner, payments.browse()).with_prefetch()
             for payment in partner_payments:
                 transactions.append(self._process_payment(payment))
 
-            partner_journal_entries = journal_entries.filtered(lambda j: j.partner_id.id == partner_id)
+            partner_journal_entries = journal_entries_by_partner.get(
+                partner, journal_entries.browse()).with_prefetch()
             for journal_entry in partner_journal_entries:
                 transactions.append(self._process_journal_entry(journal_entry))
 
@@ -208,31 +294,17 @@ class PartnerLedgerWizard(models.TransientModel):
                 running_balance += trans['current_dr'] - trans['current_cr']
                 trans['balance'] = running_balance
 
-            partner_dict[partner_id]['transactions'] = transactions
-            partner_dict[partner_id]['closing_balance'] = running_balance
-
-        return self._format_report_data(partner_dict)
+            yield {
+                'partner_name': partner_name,
+                'partner_id': partner_id,
+                'opening_balance': opening_balance,
+                'transactions': transactions,
+                'closing_balance': running_balance,
+            }
 
-    def _process_invoice(self, invoice):
+    def _process_invoice(self, invoice, invoice_lines):
+        """invoice_lines: سطور الفاتورة المطابقة للفلاتر (من _get_invoice_lines)"""
         transactions = []
-        invoice_lines = invoice.invoice_line_ids.filtered(lambda l: l.product_id)
-
-        if self.product_ids:
-            invoice_lines = invoice_lines.filtered(lambda l: l.product_id.id in self.product_ids.ids)
-
-        if self.search_text:
-            search_terms = self.search_text.lower().split()
-
-            def matches_search(line):
-                searchable = ' '.join([
-                    line.product_id.name or '',
-                    line.product_id.default_code or '',
-                    invoice.partner_id.name or '',
-                ]).lower()
-                return all(term in searchable for term in search_terms)
-
-            invoice_lines = invoice_lines.filtered(matches_search)
-
         if not invoice_lines:
             return transactions
 
@@ -350,82 +422,66 @@ class PartnerLedgerWizard(models.TransientModel):
 
         return transaction
 
-    def _format_report_data(self, partner_dict):
+    def _format_partner_rows(self, data):
+        """سطور التقرير لشريك واحد (العنوان، الرصيد الافتتاحي، الحركات، الرصيد الختامي)"""
         rows = []
-        total_debit = 0
-        total_credit = 0
-
-        for partner_id, data in sorted(partner_dict.items(), key=lambda x: x[1]['partner_name']):
-            # إضافة partner header
-            rows.append({
-                'is_partner_header': True,
-                'partner_name': data['partner_name'],
-            })
-
-            if data['opening_balance'] != 0:
-                rows.append({
-                    'is_opening': True,
-                    'doc_date': self.date_from.strftime('%d %B %Y'),
-                    'doc_number': 'OPENING BALANCE',
-                    'supplier_customer': data['partner_name'],
-                    'current_dr': data['opening_balance'] if data['opening_balance'] > 0 else 0,
-                    'current_cr': abs(data['opening_balance']) if data['opening_balance'] < 0 else 0,
-                    'balance_dr': data['opening_balance'] if data['opening_balance'] > 0 else 0,
-                    'balance_cr': abs(data['opening_balance']) if data['opening_balance'] < 0 else 0,
-                })
-
-            for trans in data['transactions']:
-                balance = trans['balance']
-                row = {
-                    'is_header': True,
-                    'is_payment': trans.get('is_payment', False),
-                    'doc_date': trans['date'].strftime('%d %B %Y'),
-                    'doc_number': trans['doc_number'],
-                    'doc_type': trans.get('doc_type', ''),
-                    'supplier_customer': trans['supplier_customer'],
-                    'current_dr': trans['current_dr'],
-                    'current_cr': trans['current_cr'],
-                    'balance_dr': balance if balance >= 0 else 0,
-                    'balance_cr': abs(balance) if balance < 0 else 0,
-                }
-                rows.append(row)
-
-                total_debit += trans['current_dr']
-                total_credit += trans['current_cr']
-
-                for line in trans.get('lines', []):
-                    rows.append(line)
+        # إضافة partner header
+        rows.append({
+            'is_partner_header': True,
+            'partner_name': data['partner_name'],
+        })
 
-            closing_balance = data['closing_balance']
+        if data['opening_balance'] != 0:
             rows.append({
-                'is_closing': True,
-                'doc_date': self.date_to.strftime('%d %B %Y'),
-                'doc_number': 'CLOSING BALANCE',
+                'is_opening': True,
+                'doc_date': self.date_from.strftime('%d %B %Y'),
+                'doc_number': 'OPENING BALANCE',
                 'supplier_customer': data['partner_name'],
-                'current_dr': closing_balance if closing_balance > 0 else 0,
-                'current_cr': abs(closing_balance) if closing_balance < 0 else 0,
-                'balance_dr': closing_balance if closing_balance > 0 else 0,
-                'balance_cr': abs(closing_balance) if closing_balance < 0 else 0,
+                'current_dr': data['opening_balance'] if data['opening_balance'] > 0 else 0,
+                'current_cr': abs(data['opening_balance']) if data['opening_balance'] < 0 else 0,
+                'balance_dr': data['opening_balance'] if data['opening_balance'] > 0 else 0,
+                'balance_cr': abs(data['opening_balance']) if data['opening_balance'] < 0 else 0,
             })
 
-            rows.append({'is_separator': True})
-
-        summary = {
-            'partners': len(partner_dict),
-            'transactions': len([r for r in rows if r.get('is_header')]),
-            'total_debit': total_debit,
-            'total_credit': total_credit,
-        }
+        for trans in data['transactions']:
+            balance = trans['balance']
+            row = {
+                'is_header': True,
+                'is_payment': trans.get('is_payment', False),
+                'doc_date': trans['date'].strftime('%d %B %Y'),
+                'doc_number': trans['doc_number'],
+                'doc_type': trans.get('doc_type', ''),
+                'supplier_customer': trans['supplier_customer'],
+                'current_dr': trans['current_dr'],
+                'current_cr': trans['current_cr'],
+                'balance_dr': balance if balance >= 0 else 0,
+                'balance_cr': abs(balance) if balance < 0 else 0,
+            }
+            rows.append(row)
+
+            for line in trans.get('lines', []):
+                rows.append(line)
+
+        closing_balance = data['closing_balance']
+        rows.append({
+            'is_closing': True,
+            'doc_date': self.date_to.strftime('%d %B %Y'),
+            'doc_number': 'CLOSING BALANCE',
+            'supplier_customer': data['partner_name'],
+            'current_dr': closing_balance if closing_balance > 0 else 0,
+            'current_cr': abs(closing_balance) if closing_balance < 0 else 0,
+            'balance_dr': closing_balance if closing_balance > 0 else 0,
+            'balance_cr': abs(closing_balance) if closing_balance < 0 else 0,
+        })
 
-        return {'summary': summary, 'rows': rows}
+        rows.append({'is_separator': True})
+        return rows
 
-    def _generate_html_report(self, data):
-        if not data or not data.get('rows'):
+    def _generate_html_report(self, run, sections_html):
+        """صفحة التقرير: الملخص من نتيجة التشغيل + أقسام الشركاء في الصفحة الحالية"""
+        if not run.partner_count:
             return '<div style="text-align:center; padding:50px; color:#999;">No transactions found</div>'
 
-        summary = data.get('summary', {})
-        rows = data.get('rows', [])
-
         html = f'''
         <style>
             .ledger-table {{ width: 100%; border-collapse: collapse; font-size: 11px; }}
@@ -449,19 +505,19 @@ class PartnerLedgerWizard(models.TransientModel):
         <div style="margin-bottom: 20px;">
             <div style="display: grid; grid-template-columns: repeat(4, 1fr); gap: 15px;">
                 <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 20px; border-radius: 10px;">
-                    <div style="font-size: 28px; font-weight: bold;">{summary.get('partners', 0)}</div>
+                    <div style="font-size: 28px; font-weight: bold;">{run.partner_count}</div>
                     <div style="font-size: 13px; opacity: 0.9;">Partners</div>
                 </div>
                 <div style="background: linear-gradient(135deg, #11998e 0%, #38ef7d 100%); color: white; padding: 20px; border-radius: 10px;">
-                    <div style="font-size: 28px; font-weight: bold;">{summary.get('transactions', 0)}</div>
+                    <div style="font-size: 28px; font-weight: bold;">{run.transaction_count}</div>
                     <div style="font-size: 13px; opacity: 0.9;">Transactions</div>
                 </div>
                 <div style="background: linear-gradient(135deg, #667eea 0%, #4e54c8 100%); color: white; padding: 20px; border-radius: 10px;">
-                    <div style="font-size: 28px; font-weight: bold;">{summary.get('total_debit', 0):,.2f}</div>
+                    <div style="font-size: 28px; font-weight: bold;">{run.total_debit:,.2f}</div>
                     <div style="font-size: 13px; opacity: 0.9;">Total Debit</div>
                 </div>
                 <div style="background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%); color: white; padding: 20px; border-radius: 10px;">
-                    <div style="font-size: 28px; font-weight: bold;">{summary.get('total_credit', 0):,.2f}</div>
+                    <div style="font-size: 28px; font-weight: bold;">{run.total_credit:,.2f}</div>
                     <div style="font-size: 13px; opacity: 0.9;">Total Credit</div>
                 </div>
             </div>
@@ -492,6 +548,25 @@ class PartnerLedgerWizard(models.TransientModel):
             <tbody>
         '''
 
+        html += sections_html
+
+        html += f'''
+            </tbody>
+        </table>
+        </div>
+        <div style="margin-top: 20px; padding: 15px; background: #ecf0f1; border-radius: 8px;">
+            <p style="margin: 0; color: #7f8c8d; font-size: 12px;">
+                Report Period: <strong>{self.date_from.strftime('%d/%m/%Y')} to {self.date_to.strftime('%d/%m/%Y')}</strong> | 
+                Generated: <strong>{fields.Datetime.context_timestamp(self, run.create_date).strftime('%d/%m/%Y %H:%M')}</strong>
+            </p>
+        </div>
+        '''
+
+        return html
+
+    def _generate_html_rows(self, rows):
+        """سطور HTML لقسم شريك واحد"""
+        html = ''
         for row in rows:
             if row.get('is_partner_header'):
                 html += f'''
@@ -580,35 +655,74 @@ class PartnerLedgerWizard(models.TransientModel):
                 </tr>
                 '''
 
-        html += f'''
-            </tbody>
-        </table>
-        </div>
-        <div style="margin-top: 20px; padding: 15px; background: #ecf0f1; border-radius: 8px;">
-            <p style="margin: 0; color: #7f8c8d; font-size: 12px;">
-                Report Period: <strong>{self.date_from.strftime('%d/%m/%Y')} to {self.date_to.strftime('%d/%m/%Y')}</strong> | 
-                Generated: <strong>{fields.Datetime.now().strftime('%d/%m/%Y %H:%M')}</strong>
-            </p>
-        </div>
-        '''
-
         return html
 
     def action_export_excel(self):
-        import xlsxwriter
-        import io
-        import base64
+        self.ensure_one()
 
-        data = self._get_report_data()
-        if not data or not data.get('rows'):
+        records = self._get_ledger_records()
+        if not any(records):
             return {
                 'type': 'ir.actions.client',
                 'tag': 'display_notification',
                 'params': {'message': 'No data to export', 'type': 'warning'}
             }
 
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output)
+        # كشوف الحساب الكبيرة يتم تصديرها في الخلفية ويظهر زر التحميل عند الانتهاء
+        threshold = int(self.env['ir.config_parameter'].sudo().get_param(
+            'partner_ledger_by_product.export_background_threshold', DEFAULT_EXPORT_BACKGROUND_THRESHOLD
+        ))
+        if sum(len(r) for r in records) > threshold:
+            job = self.env['partner.ledger.export.job'].create({
+                'date_from': self.date_from,
+                'date_to': self.date_to,
+                'partner_type': self.partner_type,
+                'partner_ids': [(6, 0, self.partner_ids.ids)],
+                'product_ids': [(6, 0, self.product_ids.ids)],
+                'search_text': self.search_text,
+                'company_ids': [(6, 0, self.env.companies.ids)],
+            })
+            self.write({'export_job_id': job.id})
+            return {
+                'type': 'ir.actions.client',
+                'tag': 'display_notification',
+                'params': {
+                    'message': 'The ledger is large and is being exported in the background. '
+                               'A "Download Excel" button appears on this report when the file is ready.',
+                    'type': 'info',
+                    'sticky': True,
+                    'next': {'type': 'ir.actions.client', 'tag': 'soft_reload'},
+                }
+            }
+
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/partner_ledger/export_excel/{self.id}',
+            'target': 'new',
+        }
+
+    def action_download_export(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/web/content/{self.export_job_id.attachment_id.id}?download=true',
+            'target': 'new',
+        }
+
+    def _get_export_filename(self):
+        return f'partner_ledger_{fields.Date.today()}.xlsx'
+
+    def _write_excel(self, output):
+        """
+        كتابة ملف Excel في output بوضع constant_memory، شريك بشريك.
+        بيانات كل شريك تكتب ثم تحذف من الذاكرة المؤقتة قبل الشريك التالي.
+        """
+        import xlsxwriter
+
+        self.ensure_one()
+        invoices, payments, journal_entries = self._get_ledger_records()
+
+        workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
         worksheet = workbook.add_worksheet('Partner Ledger')
 
         header_format = workbook.add_format(
@@ -630,72 +744,61 @@ class PartnerLedgerWizard(models.TransientModel):
             worksheet.write(row, col, header, header_format)
 
         row = 1
-        rows = data.get('rows', [])
 
-        for data_row in rows:
-            if data_row.get('is_partner_header'):
-                worksheet.merge_range(row, 0, row, 11, f"Partner: {data_row.get('partner_name', '')}",
-                                      partner_header_format)
-                row += 1
-                continue
-
-            if data_row.get('is_separator'):
-                row += 1
-                continue
-
-            if data_row.get('is_opening') or data_row.get('is_closing'):
-                fmt = opening_format if data_row.get('is_opening') else closing_format
-                balance_dr = data_row.get('balance_dr', 0)
-                balance_cr = data_row.get('balance_cr', 0)
-                balance_dr_text = f"{balance_dr:,.2f} Dr" if balance_dr > 0 else ""
-                balance_cr_text = f"{balance_cr:,.2f} Cr" if balance_cr > 0 else ""
-                worksheet.write(row, 0, data_row.get('doc_date', ''), fmt)
-                worksheet.write(row, 1, data_row.get('doc_number', ''), fmt)
-                worksheet.write(row, 2, data_row.get('supplier_customer', ''), fmt)
-                worksheet.write(row, 3, data_row.get('current_dr', 0), money_format)
-                worksheet.write(row, 4, data_row.get('current_cr', 0), money_format)
-                worksheet.write(row, 5, balance_dr_text, fmt)
-                worksheet.write(row, 6, balance_cr_text, fmt)
-                row += 1
-            elif data_row.get('is_header'):
-                if data_row.get('is_payment'):
-                    fmt = payment_format
-                elif data_row.get('is_journal_entry'):
-                    fmt = journal_entry_format
-                else:
-                    fmt = money_format
-                balance_dr = data_row.get('balance_dr', 0)
-                balance_cr = data_row.get('balance_cr', 0)
-                balance_dr_text = f"{balance_dr:,.2f} Dr" if balance_dr > 0 else ""
-                balance_cr_text = f"{balance_cr:,.2f} Cr" if balance_cr > 0 else ""
-                worksheet.write(row, 0, data_row.get('doc_date', ''))
-                worksheet.write(row, 1, data_row.get('doc_number', ''))
-                worksheet.write(row, 2, data_row.get('supplier_customer', ''))
-                worksheet.write(row, 3, data_row.get('current_dr', 0), fmt)
-                worksheet.write(row, 4, data_row.get('current_cr', 0), fmt)
-                worksheet.write(row, 5, balance_dr_text, fmt)
-                worksheet.write(row, 6, balance_cr_text, fmt)
-                row += 1
-            elif data_row.get('is_detail'):
-                worksheet.write(row, 7, f"{data_row.get('product_code', '')} {data_row.get('product_name', '')}")
-                worksheet.write(row, 8, data_row.get('quantity', 0), money_format)
-                worksheet.write(row, 9, data_row.get('rate', 0), money_format)
-                worksheet.write(row, 10, data_row.get('foreign_amount', 0), money_format)
-                worksheet.write(row, 11, data_row.get('ledger_account', ''))
-                row += 1
+        for partner_ledger in self._iter_partner_ledgers(invoices, payments, journal_entries):
+            for data_row in self._format_partner_rows(partner_ledger):
+                if data_row.get('is_partner_header'):
+                    worksheet.merge_range(row, 0, row, 11, f"Partner: {data_row.get('partner_name', '')}",
+                                          partner_header_format)
+                    row += 1
+                    continue
+
+                if data_row.get('is_separator'):
+                    row += 1
+                    continue
+
+                if data_row.get('is_opening') or data_row.get('is_closing'):
+                    fmt = opening_format if data_row.get('is_opening') else closing_format
+                    balance_dr = data_row.get('balance_dr', 0)
+                    balance_cr = data_row.get('balance_cr', 0)
+                    balance_dr_text = f"{balance_dr:,.2f} Dr" if balance_dr > 0 else ""
+                    balance_cr_text = f"{balance_cr:,.2f} Cr" if balance_cr > 0 else ""
+                    worksheet.write(row, 0, data_row.get('doc_date', ''), fmt)
+                    worksheet.write(row, 1, data_row.get('doc_number', ''), fmt)
+                    worksheet.write(row, 2, data_row.get('supplier_customer', ''), fmt)
+                    worksheet.write(row, 3, data_row.get('current_dr', 0), money_format)
+                    worksheet.write(row, 4, data_row.get('current_cr', 0), money_format)
+                    worksheet.write(row, 5, balance_dr_text, fmt)
+                    worksheet.write(row, 6, balance_cr_text, fmt)
+                    row += 1
+                elif data_row.get('is_header'):
+                    if data_row.get('is_payment'):
+                        fmt = payment_format
+                    elif data_row.get('is_journal_entry'):
+                        fmt = journal_entry_format
+                    else:
+                        fmt = money_format
+                    balance_dr = data_row.get('balance_dr', 0)
+                    balance_cr = data_row.get('balance_cr', 0)
+                    balance_dr_text = f"{balance_dr:,.2f} Dr" if balance_dr > 0 else ""
+                    balance_cr_text = f"{balance_cr:,.2f} Cr" if balance_cr > 0 else ""
+                    worksheet.write(row, 0, data_row.get('doc_date', ''))
+                    worksheet.write(row, 1, data_row.get('doc_number', ''))
+                    worksheet.write(row, 2, data_row.get('supplier_customer', ''))
+                    worksheet.write(row, 3, data_row.get('current_dr', 0), fmt)
+                    worksheet.write(row, 4, data_row.get('current_cr', 0), fmt)
+                    worksheet.write(row, 5, balance_dr_text, fmt)
+                    worksheet.write(row, 6, balance_cr_text, fmt)
+                    row += 1
+                elif data_row.get('is_detail'):
+                    worksheet.write(row, 7, f"{data_row.get('product_code', '')} {data_row.get('product_name', '')}")
+                    worksheet.write(row, 8, data_row.get('quantity', 0), money_format)
+                    worksheet.write(row, 9, data_row.get('rate', 0), money_format)
+                    worksheet.write(row, 10, data_row.get('foreign_amount', 0), money_format)
+                    worksheet.write(row, 11, data_row.get('ledger_account', ''))
+                    row += 1
+
+            # تفريغ سجلات الشريك من الذاكرة المؤقتة قبل الشريك التالي
+            self.env.invalidate_all()
 
         workbook.close()
-        output.seek(0)
-
-        attachment = self.env['ir.attachment'].create({
-            'name': f'partner_ledger_{fields.Date.today()}.xlsx',
-            'type': 'binary',
-            'datas': base64.b64encode(output.read()),
-            'mimetype': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        })
-
-        return {
-            'type': 'ir.actions.act_url',
-            'url': f'/web/content/{attachment.id}?download=true',
-            'target': 'new',
-        }
\ No newline at end of file
@@ -0,0 +1,14 @@
+from odoo import models, fields
+
+
+class ProductProduct(models.Model):
+    _inherit = 'product.product'
+
+    # فهرس trigram لبحث كشف الحساب بالكود (ilike)
+    default_code = fields.Char(index='trigram')
+
+
+class ProductTemplate(models.Model):
+    _inherit = 'product.template'
+
+    name = fields.Char(index='trigram')
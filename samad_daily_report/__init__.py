@@ -1,3 +1,8 @@
 from . import models
 from . import controllers
 from . import wizard
+
+
+def post_init_hook(env):
+    # بناء ملخص التدفقات اليومية للقيود الموجودة قبل التثبيت
+    env['daily.invoices.summary'].action_rebuild()
@@ -29,11 +29,13 @@ Features:
 * Configure payment accounts for categorization
 * Multiple payment methods per invoice
 * Export to Excel (XLSX with colors)
+* Streaming Excel export, large ranges are exported in the background
 * Export to PDF (Professional report)
 * Professional UI design with OWL Dashboard
 * Direct links to invoices and partners
 * Real-time calculation of totals and taxes
 * Net Cash & Bank calculations
+* Daily cash/bank summary table, dashboard totals load instantly and lines load on demand
     """,
     'author': 'Your Company',
     'website': 'https://www.yourcompany.com',
@@ -45,6 +47,8 @@ Features:
     ],
     'data': [
         'security/ir.model.access.csv',
+        'security/export_job_security.xml',
+        'data/export_job_cron.xml',
         'wizard/report_wizard_views.xml',
         'report/daily_invoices_report.xml',
         'views/daily_invoices_views.xml',
@@ -58,6 +62,7 @@ Features:
         ],
     },
     'images': ['static/description/icon.png'],
+    'post_init_hook': 'post_init_hook',
     'installable': True,
     'application': True,
     'auto_install': False,
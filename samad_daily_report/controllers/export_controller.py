@@ -1,9 +1,13 @@
 # -*- coding: utf-8 -*-
-import io
 import json
+import tempfile
 from datetime import datetime
+from werkzeug.wsgi import wrap_file
 from odoo import http
 from odoo.http import request, content_disposition
+from odoo.tools import html_escape
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
 
 
 class DailyInvoicesExportController(http.Controller):
@@ -13,51 +17,118 @@ class DailyInvoicesExportController(http.Controller):
         """Export daily invoices report to Excel with professional formatting"""
         
         try:
-            import xlsxwriter
+            import xlsxwriter  # noqa: F401
         except ImportError:
             return request.make_response(
                 json.dumps({'error': 'xlsxwriter library not installed'}),
                 headers=[('Content-Type', 'application/json')]
             )
         
-        # Get report data
         dashboard = request.env['daily.invoices.dashboard']
-        data = dashboard.get_report_data(date_from, date_to)
-        
-        # Create Excel file in memory
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-        
-        # Define styles
-        styles = self._create_styles(workbook)
-        
-        # Create Summary Sheet
-        self._create_summary_sheet(workbook, styles, data, date_from, date_to)
         
-        # Create Purchases Sheet
-        self._create_purchases_sheet(workbook, styles, data)
-        
-        # Create Sales Sheet
-        self._create_sales_sheet(workbook, styles, data)
+        # Very large ranges are exported by a background job, the user gets a download link
+        if dashboard.count_report_invoices(date_from, date_to) > dashboard._get_export_background_threshold():
+            job = request.env['daily.invoices.export.job'].create({
+                'date_from': date_from,
+                'date_to': date_to,
+            })
+            return request.redirect(f'/daily_invoices/export_job/{job.id}')
         
-        # Create Other Payments Sheet
-        if data.get('sales', {}).get('other_payments'):
-            self._create_other_payments_sheet(workbook, styles, data)
-        
-        workbook.close()
+        # Stream the workbook from a temporary file instead of building it in memory
+        output = tempfile.TemporaryFile()
+        try:
+            self._write_workbook(dashboard, output, date_from, date_to)
+        except Exception:
+            output.close()
+            raise
+        size = output.tell()
         output.seek(0)
         
         # Generate filename
         filename = f"Daily_Report_{date_from}_to_{date_to}.xlsx"
         
         return request.make_response(
-            output.read(),
+            wrap_file(request.httprequest.environ, output),
             headers=[
-                ('Content-Type', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+                ('Content-Type', XLSX_MIMETYPE),
                 ('Content-Disposition', content_disposition(filename)),
+                ('Content-Length', size),
             ]
         )
     
+    @http.route('/daily_invoices/export_job/<int:job_id>', type='http', auth='user', methods=['GET'])
+    def export_job_status(self, job_id, **kwargs):
+        """Download link of a background export, shows the job status until the file is ready"""
+        job = request.env['daily.invoices.export.job'].browse(job_id).exists()
+        if not job:
+            return request.not_found()
+        
+        if job.state == 'done' and job.attachment_id:
+            return request.redirect(f'/web/content/{job.attachment_id.id}?download=true')
+        
+        headers = [('Content-Type', 'text/html; charset=utf-8')]
+        if job.state == 'failed':
+            message = f'The export failed: {html_escape(job.error_message or "")}'
+        else:
+            message = ('The report is being prepared in the background, '
+                       'the download starts automatically when it is ready.')
+            headers.append(('Refresh', '5'))
+        html = f"""<html><body style="font-family: sans-serif; text-align: center; padding-top: 60px;">
+            <h3>Daily Report {job.date_from} - {job.date_to}</h3>
+            <p>{message}</p>
+            <p><a href="/daily_invoices/export_job/{job.id}">/daily_invoices/export_job/{job.id}</a></p>
+        </body></html>"""
+        return request.make_response(html, headers=headers)
+    
+    def _write_workbook(self, dashboard, output, date_from, date_to):
+        """
+        Write the report workbook to output with xlsxwriter's constant_memory mode.
+        Invoices are pulled from the dashboard in chunks, every sheet is written
+        row by row and the totals are accumulated on the way.
+        """
+        import xlsxwriter
+        
+        workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+        
+        # Define styles
+        styles = self._create_styles(workbook)
+        
+        # The summary is the first sheet but it is written last, once all totals are known
+        summary_sheet = workbook.add_worksheet('📊 Summary')
+        
+        # Create Purchases Sheet
+        purchases = self._create_purchases_sheet(workbook, styles, dashboard, date_from, date_to)
+        
+        # Create Sales Sheet
+        sales, other_payments = self._create_sales_sheet(workbook, styles, dashboard, date_from, date_to)
+        
+        # Create Other Payments Sheet (sales payments first, then the other expense lines)
+        seen_other = {(op['invoice_id'], op['account_id'], op['partner_id']) for op in other_payments}
+        other_chunks = [other_payments]
+        other_chunks.append(dashboard.iter_other_expense_chunks(date_from, date_to, seen_other))
+        sales['total_other'] = self._create_other_payments_sheet(workbook, styles, other_chunks)
+        
+        data = self._get_summary_data(dashboard, purchases, sales, date_from, date_to)
+        self._create_summary_sheet(workbook, summary_sheet, styles, data, date_from, date_to)
+        
+        workbook.close()
+    
+    def _get_summary_data(self, dashboard, purchases, sales, date_from, date_to):
+        """Build the summary section from the streamed totals and the pre-aggregated daily cash flows"""
+        paid_count = purchases['paid_count'] + sales['paid_count']
+        total_count = paid_count + purchases['unpaid_count'] + sales['unpaid_count']
+        return {
+            'purchases': purchases,
+            'sales': sales,
+            'payment_summary': dashboard.get_payment_summary(date_from, date_to),
+            'totals': {
+                'total_invoices': total_count,
+                'purchases_total': purchases['grand_total'],
+                'sales_total': sales['grand_total'],
+                'paid_percentage': (paid_count / total_count * 100) if total_count > 0 else 0,
+            },
+        }
+    
     def _create_styles(self, workbook):
         """Create all styles for the workbook"""
         styles = {}
@@ -297,9 +368,8 @@ class DailyInvoicesExportController(http.Controller):
         
         return styles
     
-    def _create_summary_sheet(self, workbook, styles, data, date_from, date_to):
-        """Create the summary sheet"""
-        sheet = workbook.add_worksheet('📊 Summary')
+    def _create_summary_sheet(self, workbook, sheet, styles, data, date_from, date_to):
+        """Create the summary sheet (rows are written top to bottom for constant_memory mode)"""
         sheet.set_column('A:A', 5)
         sheet.set_column('B:G', 20)
         sheet.set_row(0, 40)
@@ -324,14 +394,10 @@ class DailyInvoicesExportController(http.Controller):
             ('Payment Rate\nنسبة السداد', f"{totals.get('paid_percentage', 0):.1f}%"),
         ]
         
-        col = 1
-        for label, value in cards:
+        for col, (label, value) in enumerate(cards, start=1):
             sheet.write(row, col, label, styles['summary_card_header'])
-            if isinstance(value, str):
-                sheet.write(row + 1, col, value, styles['summary_card_value'])
-            else:
-                sheet.write(row + 1, col, value, styles['summary_card_value'])
-            col += 1
+        for col, (label, value) in enumerate(cards, start=1):
+            sheet.write(row + 1, col, value, styles['summary_card_value'])
         
         row += 4
         
@@ -341,19 +407,6 @@ class DailyInvoicesExportController(http.Controller):
         
         payment = data.get('payment_summary', {})
         
-        # Net Cash Card
-        sheet.write(row, 1, 'Net Cash\nصافي الكاش', styles['section_cash'])
-        sheet.write(row + 1, 1, payment.get('net_cash', 0), styles['summary_card_value'])
-        sheet.write(row + 2, 1, f"▲ In: {payment.get('cash_in', 0):,.2f}", styles['cash_in'])
-        sheet.write(row + 3, 1, f"▼ Out: {payment.get('cash_out', 0):,.2f}", styles['cash_out'])
-        
-        # Net Bank Card
-        sheet.write(row, 2, 'Net Bank\nصافي البنك', styles['section_bank'])
-        sheet.write(row + 1, 2, payment.get('net_bank', 0), styles['summary_card_value'])
-        sheet.write(row + 2, 2, f"▲ In: {payment.get('bank_in', 0):,.2f}", styles['cash_in'])
-        sheet.write(row + 3, 2, f"▼ Out: {payment.get('bank_out', 0):,.2f}", styles['cash_out'])
-        
-        # Commission Card
         commission_style = workbook.add_format({
             'bold': True,
             'font_size': 14,
@@ -363,10 +416,6 @@ class DailyInvoicesExportController(http.Controller):
             'valign': 'vcenter',
             'border': 1,
         })
-        sheet.write(row, 3, 'Commission\nالعمولة', commission_style)
-        sheet.write(row + 1, 3, payment.get('total_commission', 0), styles['summary_card_value'])
-        
-        # Commission Tax Card
         comm_tax_style = workbook.add_format({
             'bold': True,
             'font_size': 14,
@@ -376,10 +425,6 @@ class DailyInvoicesExportController(http.Controller):
             'valign': 'vcenter',
             'border': 1,
         })
-        sheet.write(row, 4, 'Comm. Tax\nضريبة العمولة', comm_tax_style)
-        sheet.write(row + 1, 4, payment.get('total_commission_tax_account', 0), styles['summary_card_value'])
-        
-        # Other Card
         other_style = workbook.add_format({
             'bold': True,
             'font_size': 14,
@@ -389,8 +434,25 @@ class DailyInvoicesExportController(http.Controller):
             'valign': 'vcenter',
             'border': 1,
         })
-        sheet.write(row, 5, 'Other\nأخرى', other_style)
-        sheet.write(row + 1, 5, payment.get('total_other', 0), styles['summary_card_value'])
+        
+        # Net Cash, Net Bank, Commission, Commission Tax and Other Cards
+        payment_cards = [
+            ('Net Cash\nصافي الكاش', styles['section_cash'], payment.get('net_cash', 0)),
+            ('Net Bank\nصافي البنك', styles['section_bank'], payment.get('net_bank', 0)),
+            ('Commission\nالعمولة', commission_style, payment.get('total_commission', 0)),
+            ('Comm. Tax\nضريبة العمولة', comm_tax_style, payment.get('total_commission_tax_account', 0)),
+            ('Other\nأخرى', other_style, payment.get('total_other', 0)),
+        ]
+        for col, (label, style, value) in enumerate(payment_cards, start=1):
+            sheet.write(row, col, label, style)
+        for col, (label, style, value) in enumerate(payment_cards, start=1):
+            sheet.write(row + 1, col, value, styles['summary_card_value'])
+        
+        # Cash and Bank in/out
+        sheet.write(row + 2, 1, f"▲ In: {payment.get('cash_in', 0):,.2f}", styles['cash_in'])
+        sheet.write(row + 2, 2, f"▲ In: {payment.get('bank_in', 0):,.2f}", styles['cash_in'])
+        sheet.write(row + 3, 1, f"▼ Out: {payment.get('cash_out', 0):,.2f}", styles['cash_out'])
+        sheet.write(row + 3, 2, f"▼ Out: {payment.get('bank_out', 0):,.2f}", styles['cash_out'])
         
         row += 6
         
@@ -400,19 +462,19 @@ class DailyInvoicesExportController(http.Controller):
         row += 2
         
         sheet.write(row, 1, 'Paid Invoices\nفواتير مدفوعة', styles['summary_card_header'])
-        sheet.write(row, 2, len(purchases.get('paid', [])), styles['summary_card_value'])
+        sheet.write(row, 2, purchases.get('paid_count', 0), styles['summary_card_value'])
         sheet.write(row, 3, 'Amount\nالمبلغ', styles['summary_card_header'])
         sheet.write(row, 4, purchases.get('total_paid', 0), styles['summary_card_value'])
         row += 1
         
         sheet.write(row, 1, 'Unpaid Invoices\nفواتير غير مدفوعة', styles['summary_card_header'])
-        sheet.write(row, 2, len(purchases.get('unpaid', [])), styles['summary_card_value'])
+        sheet.write(row, 2, purchases.get('unpaid_count', 0), styles['summary_card_value'])
         sheet.write(row, 3, 'Amount\nالمبلغ', styles['summary_card_header'])
         sheet.write(row, 4, purchases.get('total_unpaid', 0), styles['summary_card_value'])
         row += 1
         
         sheet.write(row, 1, 'Grand Total\nالإجمالي الكلي', styles['total_purchases'])
-        sheet.write(row, 2, len(purchases.get('paid', [])) + len(purchases.get('unpaid', [])), styles['total_purchases'])
+        sheet.write(row, 2, purchases.get('paid_count', 0) + purchases.get('unpaid_count', 0), styles['total_purchases'])
         sheet.write(row, 3, '', styles['total_purchases'])
         sheet.write(row, 4, purchases.get('grand_total', 0), styles['total_purchases'])
         
@@ -424,19 +486,19 @@ class DailyInvoicesExportController(http.Controller):
         row += 2
         
         sheet.write(row, 1, 'Paid Invoices\nفواتير مدفوعة', styles['summary_card_header'])
-        sheet.write(row, 2, len(sales.get('paid', [])), styles['summary_card_value'])
+        sheet.write(row, 2, sales.get('paid_count', 0), styles['summary_card_value'])
         sheet.write(row, 3, 'Amount\nالمبلغ', styles['summary_card_header'])
         sheet.write(row, 4, sales.get('total_paid', 0), styles['summary_card_value'])
         row += 1
         
         sheet.write(row, 1, 'Unpaid Invoices\nفواتير غير مدفوعة', styles['summary_card_header'])
-        sheet.write(row, 2, len(sales.get('unpaid', [])), styles['summary_card_value'])
+        sheet.write(row, 2, sales.get('unpaid_count', 0), styles['summary_card_value'])
         sheet.write(row, 3, 'Amount\nالمبلغ', styles['summary_card_header'])
         sheet.write(row, 4, sales.get('total_unpaid', 0), styles['summary_card_value'])
         row += 1
         
         sheet.write(row, 1, 'Grand Total\nالإجمالي الكلي', styles['total_sales'])
-        sheet.write(row, 2, len(sales.get('paid', [])) + len(sales.get('unpaid', [])), styles['total_sales'])
+        sheet.write(row, 2, sales.get('paid_count', 0) + sales.get('unpaid_count', 0), styles['total_sales'])
         sheet.write(row, 3, '', styles['total_sales'])
         sheet.write(row, 4, sales.get('grand_total', 0), styles['total_sales'])
         
@@ -449,8 +511,12 @@ class DailyInvoicesExportController(http.Controller):
         })
         sheet.merge_range(row, 1, row, 6, f"Generated at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", footer_style)
     
-    def _create_purchases_sheet(self, workbook, styles, data):
-        """Create purchases details sheet"""
+    def _create_purchases_sheet(self, workbook, styles, dashboard, date_from, date_to):
+        """
+        Create purchases details sheet, streaming paid then unpaid invoices
+        
+        :return: purchases totals, same keys as get_report_data()['purchases'] without the invoice lists
+        """
         sheet = workbook.add_worksheet('🛒 Purchases')
         
         # Set column widths
@@ -486,41 +552,42 @@ class DailyInvoicesExportController(http.Controller):
             sheet.write(row, col, header, styles['header'])
         row += 1
         
-        purchases = data.get('purchases', {})
-        
-        # Paid purchases
-        for i, inv in enumerate(purchases.get('paid', [])):
-            is_alt = i % 2 == 1
-            cell_style = styles['cell_alt'] if is_alt else styles['cell']
-            cell_left = styles['cell_left_alt'] if is_alt else styles['cell_left']
-            number_style = styles['number_alt'] if is_alt else styles['number']
-            
-            sheet.write(row, 0, inv.get('name', ''), cell_style)
-            sheet.write(row, 1, inv.get('partner', ''), cell_left)
-            sheet.write(row, 2, inv.get('date', ''), cell_style)
-            sheet.write(row, 3, inv.get('payment_type_label', '-'), cell_style)
-            sheet.write(row, 4, 'Paid ✓', styles['paid'])
-            sheet.write(row, 5, inv.get('amount_untaxed', 0), number_style)
-            sheet.write(row, 6, inv.get('amount_tax', 0), number_style)
-            sheet.write(row, 7, inv.get('amount_total', 0), number_style)
-            row += 1
-        
-        # Unpaid purchases
-        for i, inv in enumerate(purchases.get('unpaid', [])):
-            is_alt = (len(purchases.get('paid', [])) + i) % 2 == 1
-            cell_style = styles['cell_alt'] if is_alt else styles['cell']
-            cell_left = styles['cell_left_alt'] if is_alt else styles['cell_left']
-            number_style = styles['number_alt'] if is_alt else styles['number']
-            
-            sheet.write(row, 0, inv.get('name', ''), cell_style)
-            sheet.write(row, 1, inv.get('partner', ''), cell_left)
-            sheet.write(row, 2, inv.get('date', ''), cell_style)
-            sheet.write(row, 3, inv.get('payment_type_label', '-'), cell_style)
-            sheet.write(row, 4, 'Unpaid ✗', styles['unpaid'])
-            sheet.write(row, 5, inv.get('amount_untaxed', 0), number_style)
-            sheet.write(row, 6, inv.get('amount_tax', 0), number_style)
-            sheet.write(row, 7, inv.get('amount_total', 0), number_style)
-            row += 1
+        purchases = {
+            'paid_count': 0, 'unpaid_count': 0,
+            'total_paid': 0, 'total_paid_tax': 0, 'total_unpaid': 0, 'total_unpaid_tax': 0,
+            'total_cash_out': 0, 'total_bank_out': 0,
+        }
+        index = 0
+        
+        # Paid purchases, then unpaid purchases
+        for paid, status, status_style, prefix in ((True, 'Paid ✓', styles['paid'], 'paid'),
+                                                   (False, 'Unpaid ✗', styles['unpaid'], 'unpaid')):
+            for rows, __ in dashboard.iter_report_chunks('in_invoice', date_from, date_to, paid):
+                for inv in rows:
+                    is_alt = index % 2 == 1
+                    cell_style = styles['cell_alt'] if is_alt else styles['cell']
+                    cell_left = styles['cell_left_alt'] if is_alt else styles['cell_left']
+                    number_style = styles['number_alt'] if is_alt else styles['number']
+        
+                    sheet.write(row, 0, inv.get('name', ''), cell_style)
+                    sheet.write(row, 1, inv.get('partner', ''), cell_left)
+                    sheet.write(row, 2, inv.get('date', ''), cell_style)
+                    sheet.write(row, 3, inv.get('payment_type_label', '-'), cell_style)
+                    sheet.write(row, 4, status, status_style)
+                    sheet.write(row, 5, inv.get('amount_untaxed', 0), number_style)
+                    sheet.write(row, 6, inv.get('amount_tax', 0), number_style)
+                    sheet.write(row, 7, inv.get('amount_total', 0), number_style)
+                    row += 1
+                    index += 1
+        
+                    purchases[f'{prefix}_count'] += 1
+                    purchases[f'total_{prefix}'] += inv['amount_total']
+                    purchases[f'total_{prefix}_tax'] += inv['amount_tax']
+                    purchases['total_cash_out'] += inv['cash_paid']
+                    purchases['total_bank_out'] += inv['bank_paid']
+        
+        purchases['grand_total'] = purchases['total_paid'] + purchases['total_unpaid']
+        purchases['grand_total_tax'] = purchases['total_paid_tax'] + purchases['total_unpaid_tax']
         
         # Totals
         row += 1
@@ -529,12 +596,17 @@ class DailyInvoicesExportController(http.Controller):
         sheet.write(row, 2, '', styles['total_purchases'])
         sheet.write(row, 3, '', styles['total_purchases'])
         sheet.write(row, 4, '', styles['total_purchases'])
-        sheet.write(row, 5, purchases.get('grand_total', 0) - purchases.get('grand_total_tax', 0), styles['total_purchases'])
-        sheet.write(row, 6, purchases.get('grand_total_tax', 0), styles['total_purchases'])
-        sheet.write(row, 7, purchases.get('grand_total', 0), styles['total_purchases'])
+        sheet.write(row, 5, purchases['grand_total'] - purchases['grand_total_tax'], styles['total_purchases'])
+        sheet.write(row, 6, purchases['grand_total_tax'], styles['total_purchases'])
+        sheet.write(row, 7, purchases['grand_total'], styles['total_purchases'])
+        return purchases
     
-    def _create_sales_sheet(self, workbook, styles, data):
-        """Create sales details sheet"""
+    def _create_sales_sheet(self, workbook, styles, dashboard, date_from, date_to):
+        """
+        Create sales details sheet, streaming paid then unpaid invoices
+        
+        :return: (sales totals, other payments of the sales invoices)
+        """
         sheet = workbook.add_worksheet('💰 Sales')
         
         # Set column widths
@@ -574,45 +646,52 @@ class DailyInvoicesExportController(http.Controller):
             sheet.write(row, col, header, styles['header'])
         row += 1
         
-        sales = data.get('sales', {})
-        
-        # Paid sales
-        for i, inv in enumerate(sales.get('paid', [])):
-            is_alt = i % 2 == 1
-            cell_style = styles['cell_alt'] if is_alt else styles['cell']
-            cell_left = styles['cell_left_alt'] if is_alt else styles['cell_left']
-            number_style = styles['number_alt'] if is_alt else styles['number']
-            
-            sheet.write(row, 0, inv.get('name', ''), cell_style)
-            sheet.write(row, 1, inv.get('partner', ''), cell_left)
-            sheet.write(row, 2, inv.get('date', ''), cell_style)
-            sheet.write(row, 3, 'Paid ✓', styles['paid'])
-            sheet.write(row, 4, inv.get('cash_amount', 0), number_style)
-            sheet.write(row, 5, inv.get('bank_amount', 0), number_style)
-            sheet.write(row, 6, inv.get('commission_amount', 0), number_style)
-            sheet.write(row, 7, inv.get('commission_tax_account_amount', 0), number_style)
-            sheet.write(row, 8, inv.get('amount_tax', 0), number_style)
-            sheet.write(row, 9, inv.get('amount_total', 0), number_style)
-            row += 1
-        
-        # Unpaid sales
-        for i, inv in enumerate(sales.get('unpaid', [])):
-            is_alt = (len(sales.get('paid', [])) + i) % 2 == 1
-            cell_style = styles['cell_alt'] if is_alt else styles['cell']
-            cell_left = styles['cell_left_alt'] if is_alt else styles['cell_left']
-            number_style = styles['number_alt'] if is_alt else styles['number']
-            
-            sheet.write(row, 0, inv.get('name', ''), cell_style)
-            sheet.write(row, 1, inv.get('partner', ''), cell_left)
-            sheet.write(row, 2, inv.get('date', ''), cell_style)
-            sheet.write(row, 3, 'Unpaid ✗', styles['unpaid'])
-            sheet.write(row, 4, inv.get('cash_amount', 0), number_style)
-            sheet.write(row, 5, inv.get('bank_amount', 0), number_style)
-            sheet.write(row, 6, inv.get('commission_amount', 0), number_style)
-            sheet.write(row, 7, inv.get('commission_tax_account_amount', 0), number_style)
-            sheet.write(row, 8, inv.get('amount_tax', 0), number_style)
-            sheet.write(row, 9, inv.get('amount_total', 0), number_style)
-            row += 1
+        sales = {
+            'paid_count': 0, 'unpaid_count': 0,
+            'total_paid': 0, 'total_paid_tax': 0, 'total_unpaid': 0, 'total_unpaid_tax': 0,
+            'total_cash_in': 0, 'total_bank_in': 0,
+            'total_commission': 0, 'total_commission_tax': 0,
+            'total_commission_tax_account': 0, 'total_commission_tax_account_tax': 0,
+        }
+        other_payments = []
+        index = 0
+        
+        # Paid sales, then unpaid sales
+        for paid, status, status_style, prefix in ((True, 'Paid ✓', styles['paid'], 'paid'),
+                                                   (False, 'Unpaid ✗', styles['unpaid'], 'unpaid')):
+            for rows, chunk_other_payments in dashboard.iter_report_chunks('out_invoice', date_from, date_to, paid):
+                other_payments.extend(chunk_other_payments)
+                for inv in rows:
+                    is_alt = index % 2 == 1
+                    cell_style = styles['cell_alt'] if is_alt else styles['cell']
+                    cell_left = styles['cell_left_alt'] if is_alt else styles['cell_left']
+                    number_style = styles['number_alt'] if is_alt else styles['number']
+        
+                    sheet.write(row, 0, inv.get('name', ''), cell_style)
+                    sheet.write(row, 1, inv.get('partner', ''), cell_left)
+                    sheet.write(row, 2, inv.get('date', ''), cell_style)
+                    sheet.write(row, 3, status, status_style)
+                    sheet.write(row, 4, inv.get('cash_amount', 0), number_style)
+                    sheet.write(row, 5, inv.get('bank_amount', 0), number_style)
+                    sheet.write(row, 6, inv.get('commission_amount', 0), number_style)
+                    sheet.write(row, 7, inv.get('commission_tax_account_amount', 0), number_style)
+                    sheet.write(row, 8, inv.get('amount_tax', 0), number_style)
+                    sheet.write(row, 9, inv.get('amount_total', 0), number_style)
+                    row += 1
+                    index += 1
+        
+                    sales[f'{prefix}_count'] += 1
+                    sales[f'total_{prefix}'] += inv['amount_total']
+                    sales[f'total_{prefix}_tax'] += inv['amount_tax']
+                    sales['total_cash_in'] += inv['cash_amount']
+                    sales['total_bank_in'] += inv['bank_amount']
+                    sales['total_commission'] += inv['commission_amount']
+                    sales['total_commission_tax'] += inv['commission_tax']
+                    sales['total_commission_tax_account'] += inv['commission_tax_account_amount']
+                    sales['total_commission_tax_account_tax'] += inv['commission_tax_account_tax']
+        
+        sales['grand_total'] = sales['total_paid'] + sales['total_unpaid']
+        sales['grand_total_tax'] = sales['total_paid_tax'] + sales['total_unpaid_tax']
         
         # Totals
         row += 1
@@ -620,15 +699,69 @@ class DailyInvoicesExportController(http.Controller):
         sheet.write(row, 1, '', styles['total_sales'])
         sheet.write(row, 2, '', styles['total_sales'])
         sheet.write(row, 3, '', styles['total_sales'])
-        sheet.write(row, 4, sales.get('total_cash_in', 0), styles['total_sales'])
-        sheet.write(row, 5, sales.get('total_bank_in', 0), styles['total_sales'])
-        sheet.write(row, 6, sales.get('total_commission', 0), styles['total_sales'])
-        sheet.write(row, 7, sales.get('total_commission_tax_account', 0), styles['total_sales'])
-        sheet.write(row, 8, sales.get('grand_total_tax', 0), styles['total_sales'])
-        sheet.write(row, 9, sales.get('grand_total', 0), styles['total_sales'])
+        sheet.write(row, 4, sales['total_cash_in'], styles['total_sales'])
+        sheet.write(row, 5, sales['total_bank_in'], styles['total_sales'])
+        sheet.write(row, 6, sales['total_commission'], styles['total_sales'])
+        sheet.write(row, 7, sales['total_commission_tax_account'], styles['total_sales'])
+        sheet.write(row, 8, sales['grand_total_tax'], styles['total_sales'])
+        sheet.write(row, 9, sales['grand_total'], styles['total_sales'])
+        return sales, other_payments
     
-    def _create_other_payments_sheet(self, workbook, styles, data):
-        """Create other payments sheet"""
+    def _create_other_payments_sheet(self, workbook, styles, payment_chunks):
+        """
+        Create other payments sheet, only when there is at least one payment
+        
+        :param payment_chunks: iterable of other payment lists
+        :return: total amount of the other payments
+        """
+        sheet = None
+        row = 0
+        index = 0
+        total = 0
+        
+        for other_payments in payment_chunks:
+            for pay in other_payments:
+                if sheet is None:
+                    sheet, row = self._start_other_payments_sheet(workbook, styles)
+        
+                is_alt = index % 2 == 1
+                cell_style = styles['cell_alt'] if is_alt else styles['cell']
+                cell_left = styles['cell_left_alt'] if is_alt else styles['cell_left']
+                number_style = styles['number_alt'] if is_alt else styles['number']
+        
+                sheet.write(row, 0, pay.get('invoice_name', ''), cell_style)
+                sheet.write(row, 1, pay.get('partner', ''), cell_left)
+                sheet.write(row, 2, pay.get('account', ''), cell_left)
+                sheet.write(row, 3, pay.get('date', ''), cell_style)
+                sheet.write(row, 4, pay.get('amount', 0), number_style)
+                total += pay.get('amount', 0)
+                row += 1
+                index += 1
+        
+        if sheet is None:
+            return total
+        
+        # Total
+        row += 1
+        total_style = workbook.add_format({
+            'bold': True,
+            'font_size': 11,
+            'font_color': '#FFFFFF',
+            'bg_color': '#636E72',
+            'align': 'center',
+            'valign': 'vcenter',
+            'border': 2,
+            'num_format': '#,##0.00',
+        })
+        sheet.write(row, 0, 'TOTAL', total_style)
+        sheet.write(row, 1, '', total_style)
+        sheet.write(row, 2, '', total_style)
+        sheet.write(row, 3, '', total_style)
+        sheet.write(row, 4, total, total_style)
+        return total
+    
+    def _start_other_payments_sheet(self, workbook, styles):
+        """Add the other payments sheet with its title and headers, return (sheet, first data row)"""
         sheet = workbook.add_worksheet('👥 Other Payments')
         
         # Set column widths
@@ -666,38 +799,4 @@ class DailyInvoicesExportController(http.Controller):
         for col, header in enumerate(headers):
             sheet.write(row, col, header, styles['header'])
         row += 1
-        
-        other_payments = data.get('sales', {}).get('other_payments', [])
-        total = 0
-        
-        for i, pay in enumerate(other_payments):
-            is_alt = i % 2 == 1
-            cell_style = styles['cell_alt'] if is_alt else styles['cell']
-            cell_left = styles['cell_left_alt'] if is_alt else styles['cell_left']
-            number_style = styles['number_alt'] if is_alt else styles['number']
-            
-            sheet.write(row, 0, pay.get('invoice_name', ''), cell_style)
-            sheet.write(row, 1, pay.get('partner', ''), cell_left)
-            sheet.write(row, 2, pay.get('account', ''), cell_left)
-            sheet.write(row, 3, pay.get('date', ''), cell_style)
-            sheet.write(row, 4, pay.get('amount', 0), number_style)
-            total += pay.get('amount', 0)
-            row += 1
-        
-        # Total
-        row += 1
-        total_style = workbook.add_format({
-            'bold': True,
-            'font_size': 11,
-            'font_color': '#FFFFFF',
-            'bg_color': '#636E72',
-            'align': 'center',
-            'valign': 'vcenter',
-            'border': 2,
-            'num_format': '#,##0.00',
-        })
-        sheet.write(row, 0, 'TOTAL', total_style)
-        sheet.write(row, 1, '', total_style)
-        sheet.write(row, 2, '', total_style)
-        sheet.write(row, 3, '', total_style)
-        sheet.write(row, 4, total, total_style)
+        return sheet, row
@@ -1,2 +1,5 @@
 from . import daily_invoices_dashboard
 from . import res_config_settings
+from . import daily_invoices_export_job
+from . import daily_invoices_summary
+from . import account_move
@@ -0,0 +1,42 @@
+# models/account_move.py
+from odoo import models, api
+
+
+class AccountMove(models.Model):
+    _inherit = 'account.move'
+
+    def _get_daily_summary_dates(self):
+        """الأيام التي تتأثر بها صفوف الملخص اليومي: تاريخ الفاتورة وتاريخ القيد"""
+        dates = set(self.mapped('date'))
+        dates.update(self.filtered(lambda m: m.move_type in ('out_invoice', 'in_invoice')).mapped('invoice_date'))
+        return dates
+
+    def write(self, vals):
+        if 'state' not in vals:
+            return super().write(vals)
+        dates = self._get_daily_summary_dates()
+        res = super().write(vals)
+        dates |= self._get_daily_summary_dates()
+        self.env['daily.invoices.summary']._mark_dates(dates)
+        return res
+
+
+class AccountPartialReconcile(models.Model):
+    _inherit = 'account.partial.reconcile'
+
+    def _get_daily_summary_dates(self):
+        """تواريخ الفواتير المسواة (تُجمع الدفعات في الملخص حسب تاريخ الفاتورة)"""
+        moves = (self.debit_move_id | self.credit_move_id).move_id
+        return set(moves.filtered(lambda m: m.move_type in ('out_invoice', 'in_invoice')).mapped('invoice_date'))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        partials = super().create(vals_list)
+        self.env['daily.invoices.summary']._mark_dates(partials._get_daily_summary_dates())
+        return partials
+
+    def unlink(self):
+        dates = self._get_daily_summary_dates()
+        res = super().unlink()
+        self.env['daily.invoices.summary']._mark_dates(dates)
+        return res
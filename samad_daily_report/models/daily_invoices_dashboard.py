@@ -5,6 +5,38 @@ import logging
 
 _logger = logging.getLogger(__name__)
 
+# الدفعات المسواة مع سطور الـ Receivable/Payable للفواتير: (invoice_id, move_id) لكل دفعة مرة واحدة
+PAYMENT_MOVES_CTE = """
+    WITH invoice_lines AS (
+        SELECT l.id, l.move_id AS invoice_id, l.debit > 0 AS is_debit
+          FROM account_move_line l
+          JOIN account_account a ON a.id = l.account_id
+         WHERE l.move_id = ANY(%(invoice_ids)s)
+           AND a.account_type = ANY(%(account_types)s)
+           AND (NOT %(payable_credit_only)s OR l.credit > 0)
+    ),
+    payment_moves AS (
+        -- سطور مدينة: الدفعات الدائنة المسواة معها
+        SELECT il.invoice_id, counterpart.move_id
+          FROM invoice_lines il
+          JOIN account_partial_reconcile p ON p.debit_move_id = il.id
+          JOIN account_move_line counterpart ON counterpart.id = p.credit_move_id
+         WHERE il.is_debit
+        UNION
+        -- سطور دائنة: الدفعات المدينة المسواة معها
+        SELECT il.invoice_id, counterpart.move_id
+          FROM invoice_lines il
+          JOIN account_partial_reconcile p ON p.credit_move_id = il.id
+          JOIN account_move_line counterpart ON counterpart.id = p.debit_move_id
+         WHERE NOT il.is_debit
+    )
+"""
+
+# عدد الفواتير في كل دفعة عند التصدير بذاكرة ثابتة
+EXPORT_CHUNK_SIZE = 500
+# عدد الفواتير الذي يتم بعده التصدير في الخلفية بدلاً من الطلب المباشر
+DEFAULT_EXPORT_BACKGROUND_THRESHOLD = 20000
+
 
 class DailyInvoicesDashboard(models.AbstractModel):
     _name = 'daily.invoices.dashboard'
@@ -13,29 +45,22 @@ class DailyInvoicesDashboard(models.AbstractModel):
     @api.model
     def get_report_data(self, date_from, date_to):
         """جلب بيانات فواتير المشتريات والمبيعات"""
-        
+
         # جلب الحسابات من الإعدادات
-        ICP = self.env['ir.config_parameter'].sudo()
-        cash_account_id = int(ICP.get_param('daily_invoices.sales_cash_account_id', 0))
-        bank_account_id = int(ICP.get_param('daily_invoices.sales_bank_account_id', 0))
-        commission_account_id = int(ICP.get_param('daily_invoices.sales_commission_account_id', 0))
-        commission_tax_account_id = int(ICP.get_param('daily_invoices.sales_commission_tax_account_id', 0))
+        accounts = self._get_report_accounts()
+        labels = self._get_report_labels()
 
         # متغيرات لتجميع المدفوعات والاستلامات
         total_cash_in = 0  # استلامات من المبيعات
         total_cash_out = 0  # مدفوعات للمشتريات
         total_bank_in = 0
         total_bank_out = 0
-        
-        # ======= PURCHASES - فواتير المشتريات =======
-        purchase_domain = [
-            ('state', '=', 'posted'),
-            ('move_type', '=', 'in_invoice'),
-            ('invoice_date', '>=', date_from),
-            ('invoice_date', '<=', date_to),
-        ]
 
-        purchase_invoices = self.env['account.move'].search(purchase_domain, order='invoice_date desc')
+        # ======= PURCHASES - فواتير المشتريات =======
+        purchase_invoices = self.env['account.move'].search(
+            self._get_invoice_domain('in_invoice', date_from, date_to), order='invoice_date desc'
+        )
+        purchase_rows = self._prepare_purchase_rows(purchase_invoices, accounts, labels)
 
         # تقسيم المشتريات حسب حالة الدفع
         paid_purchases = []
@@ -46,37 +71,10 @@ class DailyInvoicesDashboard(models.AbstractModel):
         total_unpaid_amount = 0
         total_unpaid_tax = 0
 
-        for invoice in purchase_invoices:
-            # جلب قيمة payment_type
-            payment_type_label = ''
-            if hasattr(invoice, 'payment_type') and invoice.payment_type:
-                payment_type_selection = dict(invoice._fields['payment_type'].selection)
-                payment_type_label = payment_type_selection.get(invoice.payment_type, '')
-            
+        for invoice, invoice_data in zip(purchase_invoices, purchase_rows):
             # حساب المدفوعات من المشتريات (خصم من الكاش/البنك)
-            purchase_distributions = self._get_purchase_distributions(invoice, cash_account_id, bank_account_id)
-            cash_paid = purchase_distributions.get('cash', 0)
-            bank_paid = purchase_distributions.get('bank', 0)
-            
-            total_cash_out += cash_paid
-            total_bank_out += bank_paid
-            
-            invoice_data = {
-                'id': invoice.id,
-                'name': invoice.name,
-                'partner': invoice.partner_id.name,
-                'partner_id': invoice.partner_id.id,
-                'date': invoice.invoice_date.strftime('%d/%m/%Y') if invoice.invoice_date else '',
-                'create_date': invoice.create_date.strftime('%d/%m/%Y %H:%M') if invoice.create_date else '',
-                'amount_untaxed': invoice.amount_untaxed,
-                'amount_tax': invoice.amount_tax,
-                'amount_total': invoice.amount_total,
-                'payment_state': dict(invoice._fields['payment_state'].selection).get(invoice.payment_state),
-                'payment_type': invoice.payment_type if hasattr(invoice, 'payment_type') else '',
-                'payment_type_label': payment_type_label,
-                'cash_paid': cash_paid,
-                'bank_paid': bank_paid,
-            }
+            total_cash_out += invoice_data['cash_paid']
+            total_bank_out += invoice_data['bank_paid']
 
             if invoice.payment_state == 'paid':
                 paid_purchases.append(invoice_data)
@@ -88,19 +86,14 @@ class DailyInvoicesDashboard(models.AbstractModel):
                 total_unpaid_tax += invoice.amount_tax
 
         # ======= SALES - فواتير المبيعات =======
-        sales_domain = [
-            ('state', '=', 'posted'),
-            ('move_type', '=', 'out_invoice'),
-            ('invoice_date', '>=', date_from),
-            ('invoice_date', '<=', date_to),
-        ]
-
-        sales_invoices = self.env['account.move'].search(sales_domain, order='invoice_date desc')
+        sales_invoices = self.env['account.move'].search(
+            self._get_invoice_domain('out_invoice', date_from, date_to), order='invoice_date desc'
+        )
+        sales_rows, other_payments = self._prepare_sale_rows(sales_invoices, accounts, labels)
 
         # تقسيم المبيعات حسب حالة الدفع
         paid_sales = []
         unpaid_sales = []
-        other_payments = []
 
         total_paid_sales_amount = 0
         total_paid_sales_tax = 0
@@ -111,68 +104,8 @@ class DailyInvoicesDashboard(models.AbstractModel):
         total_commission_tax = 0
         total_commission_tax_account = 0
         total_commission_tax_account_tax = 0
-        total_other = 0
-
-        for invoice in sales_invoices:
-            # البحث في سطور الدفع
-            distributions = self._get_account_distributions(invoice, cash_account_id, bank_account_id,
-                                                            commission_account_id, commission_tax_account_id)
-
-            # تجميع المبالغ الأساسية
-            cash_amount = sum(d[1] for d in distributions['cash']) if distributions['cash'] else 0
-            cash_tax = sum(d[2] for d in distributions['cash']) if distributions['cash'] else 0
-            bank_amount = sum(d[1] for d in distributions['bank']) if distributions['bank'] else 0
-            bank_tax = sum(d[2] for d in distributions['bank']) if distributions['bank'] else 0
-            commission_amount = sum(d[1] for d in distributions['commission']) if distributions['commission'] else 0
-            commission_tax_val = sum(d[2] for d in distributions['commission']) if distributions['commission'] else 0
-            commission_tax_account_amount = sum(d[1] for d in distributions['commission_tax']) if distributions['commission_tax'] else 0
-            commission_tax_account_tax = sum(d[2] for d in distributions['commission_tax']) if distributions['commission_tax'] else 0
-
-            # إضافة Other payments
-            for other_item in distributions['other']:
-                other_payments.append({
-                    'invoice_id': invoice.id,
-                    'invoice_name': invoice.name,
-                    'invoice_date': invoice.invoice_date.strftime('%d/%m/%Y') if invoice.invoice_date else '',
-                    'partner': other_item['partner'],
-                    'partner_id': other_item['partner_id'],
-                    'account': other_item['account'],
-                    'account_id': other_item['account_id'],
-                    'amount': other_item['amount'],
-                    'date': other_item['date'],
-                })
-                total_other += other_item['amount']
-
-            # جلب قيمة payment_type
-            payment_type_label = ''
-            if hasattr(invoice, 'payment_type') and invoice.payment_type:
-                payment_type_selection = dict(invoice._fields['payment_type'].selection)
-                payment_type_label = payment_type_selection.get(invoice.payment_type, '')
-
-            # إنشاء بيانات الفاتورة
-            invoice_data = {
-                'id': invoice.id,
-                'name': invoice.name,
-                'partner': invoice.partner_id.name,
-                'partner_id': invoice.partner_id.id,
-                'date': invoice.invoice_date.strftime('%d/%m/%Y') if invoice.invoice_date else '',
-                'create_date': invoice.create_date.strftime('%d/%m/%Y %H:%M') if invoice.create_date else '',
-                'amount_untaxed': invoice.amount_untaxed,
-                'amount_tax': invoice.amount_tax,
-                'amount_total': invoice.amount_total,
-                'cash_amount': cash_amount,
-                'cash_tax': cash_tax,
-                'bank_amount': bank_amount,
-                'bank_tax': bank_tax,
-                'commission_amount': commission_amount,
-                'commission_tax': commission_tax_val,
-                'commission_tax_account_amount': commission_tax_account_amount,
-                'commission_tax_account_tax': commission_tax_account_tax,
-                'payment_state': dict(invoice._fields['payment_state'].selection).get(invoice.payment_state),
-                'payment_type': invoice.payment_type if hasattr(invoice, 'payment_type') else '',
-                'payment_type_label': payment_type_label,
-            }
 
+        for invoice, invoice_data in zip(sales_invoices, sales_rows):
             # تقسيم حسب حالة الدفع
             if invoice.payment_state == 'paid':
                 paid_sales.append(invoice_data)
@@ -184,62 +117,26 @@ class DailyInvoicesDashboard(models.AbstractModel):
                 total_unpaid_sales_tax += invoice.amount_tax
 
             # تجميع الاستلامات من المبيعات
-            total_cash_in += cash_amount
-            total_bank_in += bank_amount
-            total_commission += commission_amount
-            total_commission_tax += commission_tax_val
-            total_commission_tax_account += commission_tax_account_amount
-            total_commission_tax_account_tax += commission_tax_account_tax
-
-        # حساب صافي الكاش والبنك
-        net_cash = total_cash_in - total_cash_out
-        net_bank = total_bank_in - total_bank_out
+            total_cash_in += invoice_data['cash_amount']
+            total_bank_in += invoice_data['bank_amount']
+            total_commission += invoice_data['commission_amount']
+            total_commission_tax += invoice_data['commission_tax']
+            total_commission_tax_account += invoice_data['commission_tax_account_amount']
+            total_commission_tax_account_tax += invoice_data['commission_tax_account_tax']
 
         # ======= OTHER PAYMENTS =======
-        all_moves_domain = [
-            ('state', '=', 'posted'),
-            ('date', '>=', date_from),
-            ('date', '<=', date_to),
-        ]
-
-        all_moves = self.env['account.move'].search(all_moves_domain)
-
-        for move in all_moves:
-            expense_lines = move.line_ids.filtered(
-                lambda l: l.partner_id
-                          and l.account_id.account_type == 'expense'
-                          and l.debit > 0
-            )
-
-            for line in expense_lines:
-                if line.account_id.id not in [cash_account_id, bank_account_id, commission_account_id,
-                                              commission_tax_account_id]:
-                    existing = False
-                    for op in other_payments:
-                        if (op['invoice_id'] == move.id and
-                                op['account_id'] == line.account_id.id and
-                                op['partner_id'] == line.partner_id.id):
-                            existing = True
-                            break
-
-                    if not existing:
-                        other_payments.append({
-                            'invoice_id': move.id,
-                            'invoice_name': move.name,
-                            'invoice_date': move.date.strftime('%d/%m/%Y') if move.date else '',
-                            'partner': line.partner_id.name,
-                            'partner_id': line.partner_id.id,
-                            'account': f"{line.account_id.code} - {line.account_id.name}",
-                            'account_id': line.account_id.id,
-                            'amount': line.debit,
-                            'date': move.date.strftime('%d/%m/%Y') if move.date else '',
-                        })
-                        total_other += line.debit
+        # مفاتيح (القيد، الحساب، الشريك) الموجودة لتجنب التكرار
+        seen_other = {(op['invoice_id'], op['account_id'], op['partner_id']) for op in other_payments}
+        expense_lines = self._get_other_expense_lines(date_from, date_to, list(accounts.values()))
+        other_payments.extend(self._prepare_other_expense_payments(expense_lines, seen_other))
+        total_other = sum(op['amount'] for op in other_payments)
 
         return {
             'purchases': {
                 'paid': paid_purchases,
                 'unpaid': unpaid_purchases,
+                'paid_count': len(paid_purchases),
+                'unpaid_count': len(unpaid_purchases),
                 'total_paid': total_paid_amount,
                 'total_paid_tax': total_paid_tax,
                 'total_unpaid': total_unpaid_amount,
@@ -252,11 +149,14 @@ class DailyInvoicesDashboard(models.AbstractModel):
             'sales': {
                 'paid': paid_sales,
                 'unpaid': unpaid_sales,
+                'paid_count': len(paid_sales),
+                'unpaid_count': len(unpaid_sales),
                 'total_paid': total_paid_sales_amount,
                 'total_paid_tax': total_paid_sales_tax,
                 'total_unpaid': total_unpaid_sales_amount,
                 'total_unpaid_tax': total_unpaid_sales_tax,
                 'other_payments': other_payments,
+                'other_count': len(other_payments),
                 'total_cash_in': total_cash_in,
                 'total_bank_in': total_bank_in,
                 'total_commission': total_commission,
@@ -267,17 +167,8 @@ class DailyInvoicesDashboard(models.AbstractModel):
                 'grand_total': total_paid_sales_amount + total_unpaid_sales_amount,
                 'grand_total_tax': total_paid_sales_tax + total_unpaid_sales_tax,
             },
-            'payment_summary': {
-                'cash_in': total_cash_in,
-                'cash_out': total_cash_out,
-                'net_cash': net_cash,
-                'bank_in': total_bank_in,
-                'bank_out': total_bank_out,
-                'net_bank': net_bank,
-                'total_commission': total_commission,
-                'total_commission_tax_account': total_commission_tax_account,
-                'total_other': total_other,
-            },
+            # ملخص الكاش والبنك من جدول الملخص اليومي
+            'payment_summary': self.get_payment_summary(date_from, date_to),
             'totals': {
                 'total_invoices': len(paid_purchases) + len(unpaid_purchases) + len(paid_sales) + len(unpaid_sales),
                 'purchases_total': total_paid_amount + total_unpaid_amount,
@@ -286,129 +177,441 @@ class DailyInvoicesDashboard(models.AbstractModel):
             }
         }
 
-    def _get_account_distributions(self, invoice, cash_account_id, bank_account_id,
-                                   commission_account_id, commission_tax_account_id):
-        """حساب توزيع المبالغ على الحسابات المختلفة"""
-        result = {
-            'cash': [],
-            'bank': [],
-            'commission': [],
-            'commission_tax': [],
-            'other': []
+    @api.model
+    def get_payment_summary(self, date_from, date_to):
+        """
+        ملخص الكاش والبنك والعمولات والمدفوعات الأخرى للفترة من جدول الملخص اليومي.
+        التكلفة لا تعتمد على عدد الفواتير، فعرض سنة مثل عرض يوم.
+        """
+        accounts = self._get_report_accounts()
+        bucket_by_account = {}
+        for bucket in ('cash', 'bank', 'commission', 'commission_tax'):
+            if accounts[bucket]:
+                bucket_by_account.setdefault(accounts[bucket], bucket)
+
+        sales = {'cash': 0.0, 'bank': 0.0, 'commission': 0.0, 'commission_tax': 0.0}
+        purchases = {'cash': 0.0, 'bank': 0.0}
+        total_other = 0.0
+        other_count = 0
+        for flow_type, account, amount, line_count in self.env['daily.invoices.summary']._read_group(
+            [
+                ('date', '>=', date_from),
+                ('date', '<=', date_to),
+                ('company_id', 'in', self.env.companies.ids),
+            ],
+            ['flow_type', 'account_id'],
+            ['amount:sum', 'line_count:sum'],
+        ):
+            bucket = bucket_by_account.get(account.id)
+            if flow_type == 'sale' and bucket:
+                sales[bucket] += amount
+            elif flow_type == 'purchase' and bucket in purchases:
+                purchases[bucket] += amount
+            elif flow_type in ('sale_other', 'expense') and not bucket:
+                total_other += amount
+                other_count += line_count
+
+        return {
+            'cash_in': sales['cash'],
+            'cash_out': purchases['cash'],
+            'net_cash': sales['cash'] - purchases['cash'],
+            'bank_in': sales['bank'],
+            'bank_out': purchases['bank'],
+            'net_bank': sales['bank'] - purchases['bank'],
+            'total_commission': sales['commission'],
+            'total_commission_tax_account': sales['commission_tax'],
+            'total_other': total_other,
+            'other_count': other_count,
         }
 
-        # البحث عن سطور الـ Receivable/Payable في الفاتورة
-        invoice_arap_lines = invoice.line_ids.filtered(
-            lambda l: l.account_id.account_type in ('asset_receivable', 'liability_payable')
-        )
+    @api.model
+    def get_dashboard_summary(self, date_from, date_to):
+        """
+        بطاقات لوحة التحكم بدون قوائم الفواتير: إجماليات الفواتير من استعلام مجمع واحد
+        والمدفوعات من جدول الملخص اليومي (نفس شكل get_report_data بدون القوائم)
+        """
+        payment_summary = self.get_payment_summary(date_from, date_to)
+        sections = {}
+        for move_type in ('in_invoice', 'out_invoice'):
+            sections[move_type] = {
+                'paid_count': 0, 'unpaid_count': 0,
+                'total_paid': 0.0, 'total_paid_tax': 0.0, 'total_unpaid': 0.0, 'total_unpaid_tax': 0.0,
+            }
+
+        for move_type, payment_state, count, amount_total, amount_tax in self.env['account.move']._read_group(
+            [
+                ('state', '=', 'posted'),
+                ('move_type', 'in', ('in_invoice', 'out_invoice')),
+                ('invoice_date', '>=', date_from),
+                ('invoice_date', '<=', date_to),
+            ],
+            ['move_type', 'payment_state'],
+            ['__count', 'amount_total:sum', 'amount_tax:sum'],
+        ):
+            section = sections[move_type]
+            prefix = 'paid' if payment_state == 'paid' else 'unpaid'
+            section[f'{prefix}_count'] += count
+            section[f'total_{prefix}'] += amount_total
+            section[f'total_{prefix}_tax'] += amount_tax
+
+        for section in sections.values():
+            section['grand_total'] = section['total_paid'] + section['total_unpaid']
+            section['grand_total_tax'] = section['total_paid_tax'] + section['total_unpaid_tax']
+
+        purchases = sections['in_invoice']
+        purchases.update({
+            'total_cash_out': payment_summary['cash_out'],
+            'total_bank_out': payment_summary['bank_out'],
+        })
+        sales = sections['out_invoice']
+        sales.update({
+            'total_cash_in': payment_summary['cash_in'],
+            'total_bank_in': payment_summary['bank_in'],
+            'total_commission': payment_summary['total_commission'],
+            'total_commission_tax_account': payment_summary['total_commission_tax_account'],
+            'total_other': payment_summary['total_other'],
+            'other_count': payment_summary['other_count'],
+        })
+
+        paid_count = purchases['paid_count'] + sales['paid_count']
+        total_count = paid_count + purchases['unpaid_count'] + sales['unpaid_count']
+        return {
+            'purchases': purchases,
+            'sales': sales,
+            'payment_summary': payment_summary,
+            'totals': {
+                'total_invoices': total_count,
+                'purchases_total': purchases['grand_total'],
+                'sales_total': sales['grand_total'],
+                'paid_percentage': (paid_count / total_count * 100) if total_count > 0 else 0,
+            },
+        }
 
-        if not invoice_arap_lines:
-            return result
+    @api.model
+    def iter_report_chunks(self, move_type, date_from, date_to, paid, chunk_size=EXPORT_CHUNK_SIZE):
+        """
+        فواتير التقرير على دفعات للتصدير بذاكرة ثابتة بدلاً من تحميل الفترة كاملة.
+        يتم تفريغ الذاكرة المؤقتة للسجلات بعد كل دفعة.
+
+        :param move_type: 'in_invoice' (المشتريات) أو 'out_invoice' (المبيعات)
+        :param paid: الفواتير المدفوعة فقط أو غير المدفوعة فقط
+        :return: generator of (rows, other_payments) per chunk, same row format as get_report_data
+        """
+        accounts = self._get_report_accounts()
+        labels = self._get_report_labels()
+        domain = self._get_invoice_domain(move_type, date_from, date_to)
+        domain.append(('payment_state', '=' if paid else '!=', 'paid'))
+        invoice_ids = self.env['account.move'].search(domain, order='invoice_date desc').ids
+
+        for start in range(0, len(invoice_ids), chunk_size):
+            invoices = self.env['account.move'].browse(invoice_ids[start:start + chunk_size])
+            if move_type == 'in_invoice':
+                yield self._prepare_purchase_rows(invoices, accounts, labels), []
+            else:
+                yield self._prepare_sale_rows(invoices, accounts, labels)
+            self.env.invalidate_all()
 
-        payment_moves = self.env['account.move']
+    @api.model
+    def iter_other_expense_chunks(self, date_from, date_to, seen_other, chunk_size=EXPORT_CHUNK_SIZE):
+        """
+        سطور المصروفات الأخرى على دفعات للتصدير
+
+        :param seen_other: مفاتيح (القيد، الحساب، الشريك) المكتوبة مسبقاً، يتم تحديثها
+        :return: generator of other payment lists
+        """
+        expense_lines = self._get_other_expense_lines(date_from, date_to, list(self._get_report_accounts().values()))
+        for start in range(0, len(expense_lines), chunk_size):
+            yield self._prepare_other_expense_payments(expense_lines[start:start + chunk_size], seen_other)
+            self.env.invalidate_all()
 
-        # البحث عن الدفعات المرتبطة بالفاتورة
-        for arap_line in invoice_arap_lines:
-            matched_lines = self.env['account.move.line']
+    @api.model
+    def count_report_invoices(self, date_from, date_to):
+        """عدد فواتير المشتريات والمبيعات في الفترة"""
+        Move = self.env['account.move']
+        return (Move.search_count(self._get_invoice_domain('in_invoice', date_from, date_to))
+                + Move.search_count(self._get_invoice_domain('out_invoice', date_from, date_to)))
 
-            # للفواتير اللي فيها Debit (فواتير المبيعات - Receivable)
-            if arap_line.debit > 0:
-                for partial in arap_line.matched_credit_ids:
-                    matched_lines |= partial.credit_move_id
-            # للفواتير اللي فيها Credit (فواتير المشتريات - Payable)
-            else:
-                for partial in arap_line.matched_debit_ids:
-                    matched_lines |= partial.debit_move_id
-
-            for line in matched_lines:
-                if line.move_id and line.move_id.id != invoice.id:
-                    payment_moves |= line.move_id
-
-        total_invoice_amount = invoice.amount_total
-        total_invoice_tax = invoice.amount_tax
-
-        for payment_move in payment_moves:
-            # في كل الدفعات: Cash/Bank بيكون Debit لما بنستلم فلوس (Receipt)
-            # وبيكون Credit لما بندفع فلوس (Payment)
-            # لكن الحسابات اللي بندور عليها (Cash, Bank) بتكون Debit في حالة الاستلام
-            
-            # ابحث عن السطور اللي فيها الحسابات المطلوبة
-            for line in payment_move.line_ids:
-                account_id = line.account_id.id
-                # نجيب المبلغ سواء Debit أو Credit
-                amount = line.debit if line.debit > 0 else line.credit
-                
-                if amount <= 0:
-                    continue
-                    
-                # تجاهل سطور الـ Receivable/Payable
-                if line.account_id.account_type in ('asset_receivable', 'liability_payable'):
-                    continue
-
-                if account_id == cash_account_id:
-                    result['cash'].append(('cash', amount))
-                elif account_id == bank_account_id:
-                    result['bank'].append(('bank', amount))
-                elif account_id == commission_account_id:
-                    result['commission'].append(('commission', amount))
-                elif account_id == commission_tax_account_id:
-                    result['commission_tax'].append(('commission_tax', amount))
-                else:
-                    if line.partner_id and line.account_id.account_type == 'expense' and line.debit > 0:
-                        result['other'].append({
-                            'partner': line.partner_id.name,
-                            'partner_id': line.partner_id.id,
-                            'account': f"{line.account_id.code} - {line.account_id.name}",
-                            'account_id': line.account_id.id,
-                            'amount': amount,
-                            'date': payment_move.date.strftime('%d/%m/%Y') if payment_move.date else '',
-                        })
-
-        # حساب الضريبة النسبية
-        for category in ['cash', 'bank', 'commission', 'commission_tax']:
-            updated = []
-            for item_type, amount in result[category]:
-                if total_invoice_amount > 0:
-                    proportional_tax = (amount / total_invoice_amount) * total_invoice_tax
-                else:
-                    proportional_tax = 0.0
-                updated.append((item_type, amount, proportional_tax))
-            result[category] = updated
+    @api.model
+    def _get_export_background_threshold(self):
+        return int(self.env['ir.config_parameter'].sudo().get_param(
+            'daily_invoices.export_background_threshold', DEFAULT_EXPORT_BACKGROUND_THRESHOLD
+        ))
 
-        return result
+    def _get_report_accounts(self):
+        """الحسابات الأربعة لتصنيف المدفوعات من الإعدادات"""
+        ICP = self.env['ir.config_parameter'].sudo()
+        return {
+            'cash': int(ICP.get_param('daily_invoices.sales_cash_account_id', 0)),
+            'bank': int(ICP.get_param('daily_invoices.sales_bank_account_id', 0)),
+            'commission': int(ICP.get_param('daily_invoices.sales_commission_account_id', 0)),
+            'commission_tax': int(ICP.get_param('daily_invoices.sales_commission_tax_account_id', 0)),
+        }
 
-    def _get_purchase_distributions(self, invoice, cash_account_id, bank_account_id):
-        """حساب المدفوعات من المشتريات (الفلوس اللي خرجت)"""
-        result = {
-            'cash': 0,
-            'bank': 0,
+    def _get_report_labels(self):
+        """أسماء قيم حالة الدفع ونوع الدفع (تحسب مرة واحدة لكل تقرير)"""
+        Move = self.env['account.move']
+        has_payment_type = 'payment_type' in Move._fields
+        return {
+            'payment_state': dict(Move._fields['payment_state'].selection),
+            'payment_type': dict(
+                Move._fields['payment_type']._description_selection(self.env)
+            ) if has_payment_type else None,
         }
 
-        # البحث عن سطور الـ Payable في الفاتورة
-        invoice_payable_lines = invoice.line_ids.filtered(
-            lambda l: l.account_id.account_type == 'liability_payable'
+    def _get_invoice_domain(self, move_type, date_from, date_to):
+        return [
+            ('state', '=', 'posted'),
+            ('move_type', '=', move_type),
+            ('invoice_date', '>=', date_from),
+            ('invoice_date', '<=', date_to),
+        ]
+
+    def _get_invoice_row(self, invoice, labels):
+        """البيانات المشتركة لسطر الفاتورة في التقرير"""
+        # جلب قيمة payment_type
+        payment_type_labels = labels['payment_type']
+        payment_type = invoice.payment_type if payment_type_labels is not None else ''
+        return {
+            'id': invoice.id,
+            'name': invoice.name,
+            'partner': invoice.partner_id.name,
+            'partner_id': invoice.partner_id.id,
+            'date': invoice.invoice_date.strftime('%d/%m/%Y') if invoice.invoice_date else '',
+            'create_date': invoice.create_date.strftime('%d/%m/%Y %H:%M') if invoice.create_date else '',
+            'amount_untaxed': invoice.amount_untaxed,
+            'amount_tax': invoice.amount_tax,
+            'amount_total': invoice.amount_total,
+            'payment_state': labels['payment_state'].get(invoice.payment_state),
+            'payment_type': payment_type,
+            'payment_type_label': payment_type_labels.get(payment_type, '') if payment_type else '',
+        }
+
+    def _prepare_purchase_rows(self, invoices, accounts, labels):
+        """سطور فواتير المشتريات بنفس ترتيب الفواتير"""
+        purchase_distributions_by_invoice = self._get_purchase_distributions(
+            invoices, accounts['cash'], accounts['bank']
+        )
+        rows = []
+        for invoice in invoices:
+            purchase_distributions = purchase_distributions_by_invoice[invoice.id]
+            invoice_data = self._get_invoice_row(invoice, labels)
+            invoice_data.update({
+                'cash_paid': purchase_distributions.get('cash', 0),
+                'bank_paid': purchase_distributions.get('bank', 0),
+            })
+            rows.append(invoice_data)
+        return rows
+
+    def _prepare_sale_rows(self, invoices, accounts, labels):
+        """
+        سطور فواتير المبيعات بنفس ترتيب الفواتير
+
+        :return: (rows, other_payments)
+        """
+        distributions_by_invoice = self._get_account_distributions(
+            invoices, accounts['cash'], accounts['bank'], accounts['commission'], accounts['commission_tax']
         )
+        rows = []
+        other_payments = []
+        for invoice in invoices:
+            # توزيع الدفعات المحسوب مسبقاً لجميع الفواتير
+            distributions = distributions_by_invoice[invoice.id]
+            cash_amount, cash_tax = distributions['cash']
+            bank_amount, bank_tax = distributions['bank']
+            commission_amount, commission_tax_val = distributions['commission']
+            commission_tax_account_amount, commission_tax_account_tax = distributions['commission_tax']
+
+            # إضافة Other payments
+            for other_item in distributions['other']:
+                other_payments.append({
+                    'invoice_id': invoice.id,
+                    'invoice_name': invoice.name,
+                    'invoice_date': invoice.invoice_date.strftime('%d/%m/%Y') if invoice.invoice_date else '',
+                    'partner': other_item['partner'],
+                    'partner_id': other_item['partner_id'],
+                    'account': other_item['account'],
+                    'account_id': other_item['account_id'],
+                    'amount': other_item['amount'],
+                    'date': other_item['date'],
+                })
 
-        if not invoice_payable_lines:
-            return result
+            # إنشاء بيانات الفاتورة
+            invoice_data = self._get_invoice_row(invoice, labels)
+            invoice_data.update({
+                'cash_amount': cash_amount,
+                'cash_tax': cash_tax,
+                'bank_amount': bank_amount,
+                'bank_tax': bank_tax,
+                'commission_amount': commission_amount,
+                'commission_tax': commission_tax_val,
+                'commission_tax_account_amount': commission_tax_account_amount,
+                'commission_tax_account_tax': commission_tax_account_tax,
+            })
+            rows.append(invoice_data)
+        return rows, other_payments
+
+    def _prepare_other_expense_payments(self, expense_lines, seen_other):
+        """
+        تحويل سطور المصروفات الأخرى إلى سطور التقرير مع تجاهل المكرر
+
+        :param seen_other: مفاتيح (القيد، الحساب، الشريك) الموجودة، يتم تحديثها
+        """
+        partner_names = {
+            partner.id: partner.name
+            for partner in self.env['res.partner'].browse({line[3] for line in expense_lines})
+        }
+        account_labels = {
+            account.id: f"{account.code} - {account.name}"
+            for account in self.env['account.account'].browse({line[4] for line in expense_lines})
+        }
 
-        payment_moves = self.env['account.move']
+        other_payments = []
+        for move_id, move_name, move_date, partner_id, account_id, debit in expense_lines:
+            key = (move_id, account_id, partner_id)
+            if key in seen_other:
+                continue
+            seen_other.add(key)
+            other_payments.append({
+                'invoice_id': move_id,
+                'invoice_name': move_name,
+                'invoice_date': move_date.strftime('%d/%m/%Y') if move_date else '',
+                'partner': partner_names[partner_id],
+                'partner_id': partner_id,
+                'account': account_labels[account_id],
+                'account_id': account_id,
+                'amount': debit,
+                'date': move_date.strftime('%d/%m/%Y') if move_date else '',
+            })
+        return other_payments
+
+    def _get_payment_lines(self, invoice_ids, account_types, payable_credit_only=False):
+        """
+        سطور الدفعات المسواة مع الفواتير (بدون سطور الـ Receivable/Payable) في استعلام واحد.
+        كل دفعة تحسب مرة واحدة فقط لكل فاتورة حتى لو كانت مسواة مع أكثر من سطر.
+
+        :return: list of (invoice_id, payment_move_id, payment_date, account_id, account_type, partner_id, debit, credit)
+        """
+        if not invoice_ids:
+            return []
+        self.env['account.move.line'].flush_model()
+        self.env['account.partial.reconcile'].flush_model()
+        self.env.cr.execute(PAYMENT_MOVES_CTE + """
+            SELECT pm.invoice_id, pm.move_id, m.date, pl.account_id, a.account_type,
+                   pl.partner_id, pl.debit, pl.credit
+              FROM payment_moves pm
+              JOIN account_move m ON m.id = pm.move_id
+              JOIN account_move_line pl ON pl.move_id = pm.move_id
+              JOIN account_account a ON a.id = pl.account_id
+             WHERE pm.move_id != pm.invoice_id
+               AND a.account_type NOT IN ('asset_receivable', 'liability_payable')
+               AND (pl.debit > 0 OR pl.credit > 0)
+             ORDER BY pm.invoice_id, pm.move_id, pl.id
+        """, {
+            'invoice_ids': list(invoice_ids),
+            'account_types': list(account_types),
+            'payable_credit_only': payable_credit_only,
+        })
+        return self.env.cr.fetchall()
+
+    def _get_account_distributions(self, invoices, cash_account_id, bank_account_id,
+                                   commission_account_id, commission_tax_account_id):
+        """
+        حساب توزيع المبالغ على الحسابات المختلفة لجميع فواتير المبيعات مرة واحدة
+
+        :return: {invoice_id: {'cash', 'bank', 'commission', 'commission_tax': (amount, proportional tax),
+                               'other': [dict]}}
+        """
+        bucket_by_account = {}
+        for account_id, bucket in ((cash_account_id, 'cash'), (bank_account_id, 'bank'),
+                                   (commission_account_id, 'commission'),
+                                   (commission_tax_account_id, 'commission_tax')):
+            if account_id:
+                bucket_by_account.setdefault(account_id, bucket)
+
+        amounts = {}
+        others = {}
+        other_lines = []
+        for invoice_id, __, payment_date, account_id, account_type, partner_id, debit, credit in self._get_payment_lines(
+                invoices.ids, ('asset_receivable', 'liability_payable')):
+            # نجيب المبلغ سواء Debit أو Credit
+            amount = debit if debit > 0 else credit
+            bucket = bucket_by_account.get(account_id)
+            if bucket:
+                invoice_amounts = amounts.setdefault(invoice_id, {})
+                invoice_amounts[bucket] = invoice_amounts.get(bucket, 0) + amount
+            elif partner_id and account_type == 'expense' and debit > 0:
+                other_lines.append((invoice_id, partner_id, account_id, amount, payment_date))
+
+        partners = self.env['res.partner'].browse({line[1] for line in other_lines})
+        accounts = self.env['account.account'].browse({line[2] for line in other_lines})
+        partner_names = {partner.id: partner.name for partner in partners}
+        account_labels = {account.id: f"{account.code} - {account.name}" for account in accounts}
+        for invoice_id, partner_id, account_id, amount, payment_date in other_lines:
+            others.setdefault(invoice_id, []).append({
+                'partner': partner_names[partner_id],
+                'partner_id': partner_id,
+                'account': account_labels[account_id],
+                'account_id': account_id,
+                'amount': amount,
+                'date': payment_date.strftime('%d/%m/%Y') if payment_date else '',
+            })
+
+        result = {}
+        for invoice in invoices:
+            invoice_amounts = amounts.get(invoice.id, {})
+            distribution = result[invoice.id] = {'other': others.get(invoice.id, [])}
+            # حساب الضريبة النسبية
+            for bucket in ('cash', 'bank', 'commission', 'commission_tax'):
+                amount = invoice_amounts.get(bucket, 0)
+                if invoice.amount_total > 0:
+                    proportional_tax = (amount / invoice.amount_total) * invoice.amount_tax
+                else:
+                    proportional_tax = 0.0
+                distribution[bucket] = (amount, proportional_tax)
+        return result
 
-        # البحث عن الدفعات المرتبطة بالفاتورة
-        for payable_line in invoice_payable_lines:
-            # فواتير المشتريات: Payable بيكون Credit، والدفعة بتكون Debit
-            if payable_line.credit > 0:
-                for partial in payable_line.matched_debit_ids:
-                    if partial.debit_move_id.move_id and partial.debit_move_id.move_id.id != invoice.id:
-                        payment_moves |= partial.debit_move_id.move_id
+    def _get_purchase_distributions(self, invoices, cash_account_id, bank_account_id):
+        """
+        حساب المدفوعات من المشتريات (الفلوس اللي خرجت) لجميع الفواتير مرة واحدة
 
-        for payment_move in payment_moves:
+        :return: {invoice_id: {'cash': amount, 'bank': amount}}
+        """
+        result = {invoice_id: {'cash': 0, 'bank': 0} for invoice_id in invoices.ids}
+        for invoice_id, __, __, account_id, __, __, __, credit in self._get_payment_lines(
+                invoices.ids, ('liability_payable',), payable_credit_only=True):
             # في دفعات المشتريات: Cash/Bank بيكون Credit (الفلوس خرجت)
-            for line in payment_move.line_ids:
-                if line.credit > 0 and line.account_id.account_type not in ('asset_receivable', 'liability_payable'):
-                    if line.account_id.id == cash_account_id:
-                        result['cash'] += line.credit
-                    elif line.account_id.id == bank_account_id:
-                        result['bank'] += line.credit
-
+            if credit <= 0:
+                continue
+            if account_id == cash_account_id:
+                result[invoice_id]['cash'] += credit
+            elif account_id == bank_account_id:
+                result[invoice_id]['bank'] += credit
         return result
+
+    def _get_other_expense_lines(self, date_from, date_to, excluded_account_ids):
+        """
+        سطور المصروفات المرتبطة بشركاء في جميع القيود المرحلة خلال الفترة (استعلام واحد)
+
+        :return: list of (move_id, move_name, move_date, partner_id, account_id, debit)
+        """
+        self.env['account.move.line'].flush_model()
+        self.env['account.move'].flush_model(['state', 'date', 'name'])
+        self.env.cr.execute("""
+            SELECT m.id, m.name, m.date, l.partner_id, l.account_id, l.debit
+              FROM account_move_line l
+              JOIN account_move m ON m.id = l.move_id
+              JOIN account_account a ON a.id = l.account_id
+             WHERE m.state = 'posted'
+               AND m.date >= %(date_from)s
+               AND m.date <= %(date_to)s
+               AND l.partner_id IS NOT NULL
+               AND l.debit > 0
+               AND a.account_type = 'expense'
+               AND NOT (l.account_id = ANY(%(excluded_account_ids)s))
+             ORDER BY m.date DESC, m.name DESC, m.id DESC, l.id
+        """, {
+            'date_from': date_from,
+            'date_to': date_to,
+            'excluded_account_ids': list(excluded_account_ids),
+        })
+        return self.env.cr.fetchall()
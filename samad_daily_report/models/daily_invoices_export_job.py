@@ -0,0 +1,80 @@
+# models/daily_invoices_export_job.py
+from odoo import models, fields, api
+from datetime import timedelta
+import logging
+import tempfile
+
+_logger = logging.getLogger(__name__)
+
+# عدد الأيام التي تبقى فيها ملفات التصدير قبل حذفها
+EXPORT_JOB_RETENTION_DAYS = 2
+
+
+class DailyInvoicesExportJob(models.Model):
+    """تصدير التقرير إلى Excel في الخلفية للفترات الكبيرة، مع رابط تحميل عند الانتهاء"""
+    _name = 'daily.invoices.export.job'
+    _description = 'Daily Invoices Excel Export Job'
+    _order = 'id desc'
+
+    date_from = fields.Date(string='From Date', required=True)
+    date_to = fields.Date(string='To Date', required=True)
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='Status', default='pending', required=True, index=True)
+    attachment_id = fields.Many2one('ir.attachment', string='Excel File', readonly=True, ondelete='set null')
+    error_message = fields.Text(string='Error', readonly=True)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        jobs = super().create(vals_list)
+        self.env.ref('samad_daily_report.ir_cron_daily_invoices_export')._trigger()
+        return jobs
+
+    def unlink(self):
+        self.sudo().attachment_id.unlink()
+        return super().unlink()
+
+    def _process(self):
+        """إنشاء ملف Excel بصلاحيات المستخدم الذي طلب التصدير"""
+        from ..controllers.export_controller import DailyInvoicesExportController, XLSX_MIMETYPE
+
+        self.ensure_one()
+        date_from = fields.Date.to_string(self.date_from)
+        date_to = fields.Date.to_string(self.date_to)
+        dashboard = self.env['daily.invoices.dashboard'].with_user(self.create_uid)
+        with tempfile.TemporaryFile() as output:
+            DailyInvoicesExportController()._write_workbook(dashboard, output, date_from, date_to)
+            output.seek(0)
+            attachment = self.env['ir.attachment'].create({
+                'name': f"Daily_Report_{date_from}_to_{date_to}.xlsx",
+                'type': 'binary',
+                'raw': output.read(),
+                'mimetype': XLSX_MIMETYPE,
+                'res_model': self._name,
+                'res_id': self.id,
+            })
+        self.write({'state': 'done', 'attachment_id': attachment.id})
+
+    @api.model
+    def _cron_process_jobs(self, batch_size=2):
+        """تنفيذ طلبات التصدير المعلقة"""
+        jobs = self.search([('state', '=', 'pending')], order='id', limit=batch_size)
+
+        for job in jobs:
+            try:
+                with self.env.cr.savepoint():
+                    job._process()
+            except Exception as e:
+                _logger.error("خطأ أثناء تصدير التقرير اليومي %s: %s", job.id, str(e))
+                job.write({'state': 'failed', 'error_message': str(e)})
+
+        if len(jobs) == batch_size:
+            self.env.ref('samad_daily_report.ir_cron_daily_invoices_export')._trigger()
+
+    @api.autovacuum
+    def _gc_export_jobs(self):
+        """حذف طلبات التصدير القديمة وملفاتها"""
+        limit_date = fields.Datetime.now() - timedelta(days=EXPORT_JOB_RETENTION_DAYS)
+        self.search([('create_date', '<', limit_date)]).unlink()
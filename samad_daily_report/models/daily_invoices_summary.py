@@ -0,0 +1,213 @@
+# models/daily_invoices_summary.py
+from odoo import models, fields, api
+from odoo.tools.sql import create_index, create_unique_index
+from datetime import timedelta
+import logging
+
+from .daily_invoices_dashboard import PAYMENT_MOVES_CTE
+
+_logger = logging.getLogger(__name__)
+
+# عدد الأيام في كل دفعة عند إعادة بناء الملخص
+REBUILD_BATCH_DAYS = 31
+
+# تحديثان متزامنان لنفس اليوم يكتبان نفس الصف بدلاً من إضافة صفين
+UPSERT_CLAUSE = """
+    ON CONFLICT (date, company_id, account_id, flow_type)
+    DO UPDATE SET amount = EXCLUDED.amount, line_count = EXCLUDED.line_count
+"""
+
+
+class DailyInvoicesSummary(models.Model):
+    """
+    ملخص يومي مجمع للتدفقات النقدية لكل حساب.
+    يتم تحديث الأيام المتأثرة فقط عند ترحيل القيود أو تسويتها (قبل حفظ المعاملة)،
+    ولوحة التحكم والتصدير تقرأ منه الإجماليات بدلاً من الفواتير والتسويات.
+    """
+    _name = 'daily.invoices.summary'
+    _description = 'Daily Cash/Bank Flow Summary'
+    _order = 'date desc, flow_type, account_id'
+    _log_access = False
+
+    date = fields.Date(string='Date', required=True, index=True, readonly=True)
+    company_id = fields.Many2one('res.company', string='Company', required=True, readonly=True)
+    account_id = fields.Many2one('account.account', string='Account', required=True, readonly=True,
+                                 ondelete='cascade')
+    flow_type = fields.Selection([
+        ('sale', 'Sales Receipts'),
+        ('sale_other', 'Sales Other Payments'),
+        ('purchase', 'Purchase Payments'),
+        ('expense', 'Partner Expenses'),
+    ], string='Flow Type', required=True, readonly=True)
+    amount = fields.Float(string='Amount', readonly=True)
+    line_count = fields.Integer(string='Lines', readonly=True)
+
+    def init(self):
+        create_index(
+            self._cr, 'daily_invoices_summary_date_flow_account_index',
+            self._table, ['date', 'flow_type', 'account_id']
+        )
+        # أيام تكررت صفوفها قبل إضافة القيد الفريد (تحديثات متزامنة): يعاد حسابها بعده
+        self._cr.execute("""
+            SELECT DISTINCT date
+              FROM daily_invoices_summary
+             GROUP BY date, company_id, account_id, flow_type
+            HAVING COUNT(*) > 1
+        """)
+        duplicated_dates = [row[0] for row in self._cr.fetchall()]
+        if duplicated_dates:
+            self._cr.execute("DELETE FROM daily_invoices_summary WHERE date = ANY(%s)", [duplicated_dates])
+        create_unique_index(
+            self._cr, 'daily_invoices_summary_key_uniq',
+            self._table, ['date', 'company_id', 'account_id', 'flow_type']
+        )
+        if duplicated_dates:
+            _logger.info("Daily cash flow summary: rebuilding %s duplicated days", len(duplicated_dates))
+            self._refresh_dates(duplicated_dates)
+
+    @api.model
+    def _mark_dates(self, dates):
+        """تسجيل الأيام التي تغيرت، يتم إعادة حسابها مرة واحدة قبل حفظ المعاملة"""
+        dates = set(dates) - {False, None}
+        if not dates:
+            return
+        pending = self.env.cr.precommit.data.setdefault('daily_invoices.summary.dates', set())
+        if not pending:
+            self.env.cr.precommit.add(self._flush_marked_dates)
+        pending.update(dates)
+
+    def _flush_marked_dates(self):
+        dates = self.env.cr.precommit.data.pop('daily_invoices.summary.dates', set())
+        if dates:
+            self._refresh_dates(sorted(dates))
+
+    @api.model
+    def _refresh_dates(self, dates):
+        """
+        إعادة حساب صفوف الأيام المحددة من القيود المرحلة:
+        - sale / sale_other / purchase: الدفعات المسواة مع فواتير اليوم (حسب تاريخ الفاتورة)
+        - expense: سطور المصروفات المرتبطة بشركاء في قيود اليوم
+        القيد الفريد على (اليوم، الشركة، الحساب، النوع) يمنع تكرار الصفوف عند التحديث المتزامن:
+        إحدى المعاملتين تفشل بخطأ serialization ويعاد تنفيذها.
+        """
+        self.env.flush_all()
+        cr = self.env.cr
+        cr.execute("DELETE FROM daily_invoices_summary WHERE date = ANY(%s)", [list(dates)])
+
+        cr.execute("""
+            SELECT move_type, array_agg(id)
+              FROM account_move
+             WHERE state = 'posted'
+               AND move_type IN ('out_invoice', 'in_invoice')
+               AND invoice_date = ANY(%s)
+             GROUP BY move_type
+        """, [list(dates)])
+        invoice_ids = dict(cr.fetchall())
+
+        if invoice_ids.get('out_invoice'):
+            params = {
+                'invoice_ids': invoice_ids['out_invoice'],
+                'account_types': ['asset_receivable', 'liability_payable'],
+                'payable_credit_only': False,
+            }
+            # المبالغ المستلمة لكل حساب (مدين أو دائن)
+            cr.execute("""
+                INSERT INTO daily_invoices_summary (date, company_id, account_id, flow_type, amount, line_count)
+            """ + PAYMENT_MOVES_CTE + """
+                SELECT inv.invoice_date, inv.company_id, pl.account_id, 'sale',
+                       SUM(CASE WHEN pl.debit > 0 THEN pl.debit ELSE pl.credit END), COUNT(*)
+                  FROM payment_moves pm
+                  JOIN account_move inv ON inv.id = pm.invoice_id
+                  JOIN account_move_line pl ON pl.move_id = pm.move_id
+                  JOIN account_account a ON a.id = pl.account_id
+                 WHERE pm.move_id != pm.invoice_id
+                   AND a.account_type NOT IN ('asset_receivable', 'liability_payable')
+                   AND (pl.debit > 0 OR pl.credit > 0)
+                 GROUP BY inv.invoice_date, inv.company_id, pl.account_id
+            """ + UPSERT_CLAUSE, params)
+            # مصروفات الشركاء المدينة في دفعات المبيعات (Other payments)
+            cr.execute("""
+                INSERT INTO daily_invoices_summary (date, company_id, account_id, flow_type, amount, line_count)
+            """ + PAYMENT_MOVES_CTE + """
+                SELECT inv.invoice_date, inv.company_id, pl.account_id, 'sale_other', SUM(pl.debit), COUNT(*)
+                  FROM payment_moves pm
+                  JOIN account_move inv ON inv.id = pm.invoice_id
+                  JOIN account_move_line pl ON pl.move_id = pm.move_id
+                  JOIN account_account a ON a.id = pl.account_id
+                 WHERE pm.move_id != pm.invoice_id
+                   AND a.account_type = 'expense'
+                   AND pl.partner_id IS NOT NULL
+                   AND pl.debit > 0
+                 GROUP BY inv.invoice_date, inv.company_id, pl.account_id
+            """ + UPSERT_CLAUSE, params)
+
+        if invoice_ids.get('in_invoice'):
+            # في دفعات المشتريات: Cash/Bank بيكون Credit (الفلوس خرجت)
+            cr.execute("""
+                INSERT INTO daily_invoices_summary (date, company_id, account_id, flow_type, amount, line_count)
+            """ + PAYMENT_MOVES_CTE + """
+                SELECT inv.invoice_date, inv.company_id, pl.account_id, 'purchase', SUM(pl.credit), COUNT(*)
+                  FROM payment_moves pm
+                  JOIN account_move inv ON inv.id = pm.invoice_id
+                  JOIN account_move_line pl ON pl.move_id = pm.move_id
+                  JOIN account_account a ON a.id = pl.account_id
+                 WHERE pm.move_id != pm.invoice_id
+                   AND a.account_type NOT IN ('asset_receivable', 'liability_payable')
+                   AND pl.credit > 0
+                 GROUP BY inv.invoice_date, inv.company_id, pl.account_id
+            """ + UPSERT_CLAUSE, {
+                'invoice_ids': invoice_ids['in_invoice'],
+                'account_types': ['liability_payable'],
+                'payable_credit_only': True,
+            })
+
+        # سطر واحد لكل (قيد، حساب، شريك) مثل التقرير
+        cr.execute("""
+            INSERT INTO daily_invoices_summary (date, company_id, account_id, flow_type, amount, line_count)
+            SELECT e.date, e.company_id, e.account_id, 'expense', SUM(e.debit), COUNT(*)
+              FROM (
+                    SELECT DISTINCT ON (l.move_id, l.account_id, l.partner_id)
+                           m.date, m.company_id, l.account_id, l.debit
+                      FROM account_move_line l
+                      JOIN account_move m ON m.id = l.move_id
+                      JOIN account_account a ON a.id = l.account_id
+                     WHERE m.state = 'posted'
+                       AND m.date = ANY(%s)
+                       AND l.partner_id IS NOT NULL
+                       AND l.debit > 0
+                       AND a.account_type = 'expense'
+                     ORDER BY l.move_id, l.account_id, l.partner_id, l.id
+                   ) e
+             GROUP BY e.date, e.company_id, e.account_id
+        """ + UPSERT_CLAUSE, [list(dates)])
+        self.invalidate_model()
+
+    @api.model
+    def action_rebuild(self, date_from=None, date_to=None):
+        """
+        إعادة بناء الملخص لفترة محددة أو لكل القيود (على دفعات من الأيام).
+        يستخدم عند التثبيت ومن الإعدادات، ويمكن تشغيله من odoo shell:
+        env['daily.invoices.summary'].action_rebuild('2024-01-01', '2024-12-31')
+        """
+        if not date_from or not date_to:
+            self.env['account.move'].flush_model(['state', 'date', 'invoice_date'])
+            self.env.cr.execute("""
+                SELECT LEAST(MIN(date), MIN(invoice_date)), GREATEST(MAX(date), MAX(invoice_date))
+                  FROM account_move
+                 WHERE state = 'posted'
+            """)
+            first_date, last_date = self.env.cr.fetchone()
+            if not first_date:
+                return True
+            date_from = date_from or first_date
+            date_to = date_to or last_date
+
+        day = fields.Date.to_date(date_from)
+        date_to = fields.Date.to_date(date_to)
+        while day <= date_to:
+            batch_end = min(day + timedelta(days=REBUILD_BATCH_DAYS - 1), date_to)
+            dates = [day + timedelta(days=offset) for offset in range((batch_end - day).days + 1)]
+            self._refresh_dates(dates)
+            _logger.info("Daily cash flow summary rebuilt from %s to %s", day, batch_end)
+            day = batch_end + timedelta(days=1)
+        return True
@@ -33,3 +33,13 @@ class ResConfigSettings(models.TransientModel):
         config_parameter='daily_invoices.sales_commission_tax_account_id',
         help='Account used for commission tax in invoice lines'
     )
+
+
+    def action_rebuild_daily_summary(self):
+        """إعادة بناء ملخص التدفقات اليومية لكل القيود المرحلة"""
+        self.env['daily.invoices.summary'].sudo().action_rebuild()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {'message': 'Daily cash/bank summary rebuilt', 'type': 'success'},
+        }
@@ -28,6 +28,7 @@ export class DailyInvoicesDashboard extends Component {
             dateTo: this.getTodayDate(),
             period: 'today',
             isLoading: true,
+            linesLoaded: false,
         });
 
         onWillStart(async () => {
@@ -47,10 +48,13 @@ export class DailyInvoicesDashboard extends Component {
 
     async loadReportData() {
         this.state.isLoading = true;
+        this.state.linesLoaded = false;
         try {
+            // The cards come from the pre-aggregated daily summary, the invoice
+            // lists are only loaded when a section is opened
             const data = await this.orm.call(
                 'daily.invoices.dashboard',
-                'get_report_data',
+                'get_dashboard_summary',
                 [this.state.dateFrom, this.state.dateTo]
             );
 
@@ -66,14 +70,40 @@ export class DailyInvoicesDashboard extends Component {
             console.error("Error loading report data:", error);
         }
         this.state.isLoading = false;
+
+        if (Object.values(this.state.expandedSections).some(Boolean)) {
+            await this.loadReportLines();
+        }
+    }
+
+    async loadReportLines() {
+        const dateFrom = this.state.dateFrom;
+        const dateTo = this.state.dateTo;
+        try {
+            const data = await this.orm.call(
+                'daily.invoices.dashboard',
+                'get_report_data',
+                [dateFrom, dateTo]
+            );
+            // Ignore the answer if the period changed in the meantime
+            if (dateFrom === this.state.dateFrom && dateTo === this.state.dateTo) {
+                this.state.reportData = data;
+                this.state.linesLoaded = true;
+            }
+        } catch (error) {
+            console.error("Error loading report lines:", error);
+        }
     }
 
     formatNumber(num) {
         return (num || 0).toLocaleString('en-US', { minimumFractionDigits: 2, maximumFractionDigits: 2 });
     }
 
-    toggleSection(section) {
+    async toggleSection(section) {
         this.state.expandedSections[section] = !this.state.expandedSections[section];
+        if (this.state.expandedSections[section] && !this.state.linesLoaded) {
+            await this.loadReportLines();
+        }
     }
 
     isSectionExpanded(section) {